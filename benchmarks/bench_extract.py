@@ -0,0 +1,82 @@
+"""
+Benchmark arrival extraction against the NYCTFeed.filter_trips path.
+
+Usage (from the project root):
+    python -m benchmarks.bench_extract                       # synthetic full-size feeds
+    python -m benchmarks.bench_extract --feed ace.pb --stops A44N,A44S
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from nyct_gtfs import NYCTFeed
+from benchmarks.feedgen import FEEDS, build_feed, load_static, static_files
+from train_times.extract import extract_arrivals
+from train_times.static_index import StaticIndex
+
+
+def filter_trips_path(feed, stop_ids):
+    """The pre-extraction fetch_train_times loop: Trip objects + StopTimeUpdate wrappers."""
+    arrivals = []
+    for train in feed.filter_trips(headed_for_stop_id=stop_ids):
+        for stop_update in train.stop_time_updates:
+            if stop_update.stop_id in stop_ids:
+                arrivals.append((train.route_id, train.headsign_text, stop_update.stop_id, stop_update.arrival))
+    return arrivals
+
+
+def extract_path(feed, stop_ids):
+    return extract_arrivals(feed._feed, stop_ids)
+
+
+def time_it(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feed", action="append", help="Recorded GTFS-RT payload (repeatable)")
+    parser.add_argument("--stops", default="A44N,A44S,127N,127S,D20N,D20S", help="Comma-separated target stop ids")
+    parser.add_argument("--trips-per-route", type=int, default=60, help="Synthetic feed size")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    stop_ids = args.stops.split(",")
+    trips_file, stops_file = static_files()
+    with tempfile.TemporaryDirectory() as tmp:
+        index = StaticIndex.load(trips_file, stops_file, Path(tmp) / "gtfs_static.idx")
+
+        if args.feed:
+            payloads = {name: Path(name).read_bytes() for name in args.feed}
+        else:
+            static = load_static(trips_file, stops_file)
+            payloads = {
+                name: build_feed(name, trips_per_route=args.trips_per_route, static=static).SerializeToString()
+                for name in FEEDS
+            }
+
+        print(f"{'feed':<12} {'bytes':>8} {'filter_trips ms':>16} {'extract ms':>11} {'speedup':>8}")
+        for name, payload in payloads.items():
+            feed = NYCTFeed("C", fetch_immediately=False, trips_txt=index, stops_txt=index)
+            index.attach(feed)
+            feed.load_gtfs_bytes(payload)
+
+            old_count = len(filter_trips_path(feed, stop_ids))
+            new_count = len(extract_path(feed, stop_ids))
+            if old_count != new_count:
+                print(f"WARNING: {name}: filter_trips found {old_count} arrivals, extract found {new_count}")
+
+            old_ms, _ = time_it(lambda: filter_trips_path(feed, stop_ids), args.repeat)
+            new_ms, _ = time_it(lambda: extract_path(feed, stop_ids), args.repeat)
+            print(f"{Path(name).name:<12} {len(payload):>8} {old_ms:>16.2f} {new_ms:>11.2f} {old_ms / new_ms:>7.1f}x")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+End-to-end benchmark of the arrival pipeline over the recorded fixtures.
+
+Times each stage separately and reports latency percentiles and peak traced
+memory per stage (tracemalloc sees the Python heap only, so the protobuf
+parse's C-side arena does not show up in its peak):
+
+    static_compile  compile trips.txt/stops.txt into the binary index
+    static_load     open the compiled index (what a normal start does)
+    parse           NYCTFeed.load_gtfs_bytes
+    parse_cpp       NYCTFeed.load_gtfs_bytes(cpp_accelerated=True), if nyct_gtfs_cpp is installed
+    parse_selective decode_selected: only the trips calling at the target stops
+    filter_trips    the old Trip/StopTimeUpdate arrival loop
+    extract         extract_arrivals, headsigns and the MAX_MINUTES_AWAY countdown,
+                    as fetch_upcoming and ArrivalStore.countdown do it
+    layout          line layouts for the countdown, cold layout cache
+    render          one display rotation through the virtual backend
+
+Usage (from the project root):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --save-baseline baseline.json
+    python -m benchmarks.bench_pipeline --compare baseline.json --threshold 0.25
+
+In --compare mode the exit status is 1 if any stage's median got slower than
+the baseline by more than the threshold, or if parse_selective's median is
+not faster than parse's on some fixture (FEED_DECODE=selective would then
+cost more than it saves there).
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from nyct_gtfs import NYCTFeed
+from benchmarks.bench_extract import filter_trips_path
+from benchmarks.feedgen import static_files
+from benchmarks.make_fixtures import fixture_paths
+from config import Config
+from display import DisplayManager, map_route_to_bullet
+from train_times.arrivals import ArrivalBatch
+from train_times.extract import extract_arrivals
+from train_times.fetch import to_arrival
+from train_times.static_index import StaticIndex, compile_index
+from train_times.store import ArrivalStore
+from train_times.wire import decode_selected
+
+
+class BenchConfig(Config):
+    DISPLAY_BACKEND = "virtual"
+    VIRTUAL_FRAME_DIR = ""
+
+
+def cpp_parser_available():
+    try:
+        from nyct_gtfs import cpp_parser_wrapper  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def measure(fn, repeat):
+    """
+    Run fn `repeat` times for timing, then once more under tracemalloc.
+
+    Returns:
+        dict: p50/p90/p99/max in ms and peak_kib of traced allocations
+    """
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": cuts[49],
+        "p90": cuts[89],
+        "p99": cuts[98],
+        "max": max(samples),
+        "peak_kib": peak / 1024,
+    }
+
+
+def bench_static(trips_file, stops_file, tmp, repeat):
+    index_file = Path(tmp) / "gtfs_static.idx"
+    results = {"static_compile": measure(lambda: compile_index(trips_file, stops_file, index_file), repeat)}
+
+    def load():
+        StaticIndex.load(trips_file, stops_file, index_file).close()
+
+    results["static_load"] = measure(load, repeat)
+    return results, StaticIndex.load(trips_file, stops_file, index_file)
+
+
+def bench_fixture(payload, index, display, stop_ids, repeat):
+    feed = NYCTFeed("C", fetch_immediately=False, trips_txt=index, stops_txt=index)
+    index.attach(feed)
+    feed.load_gtfs_bytes(payload)
+    now = feed._feed.header.timestamp
+    results = {"parse": measure(lambda: feed.load_gtfs_bytes(payload), repeat)}
+    if cpp_parser_available():
+        results["parse_cpp"] = measure(lambda: feed.load_gtfs_bytes(payload, cpp_accelerated=True), repeat)
+        feed.load_gtfs_bytes(payload)
+    results["parse_selective"] = measure(lambda: decode_selected(payload, stop_ids), repeat)
+
+    results["filter_trips"] = measure(lambda: filter_trips_path(feed, stop_ids), repeat)
+
+    def extract():
+        upcoming = ArrivalBatch(extract_arrivals(feed._feed, stop_ids)).upcoming(now)
+        store = ArrivalStore([to_arrival(record, index) for record in upcoming], fetched_epoch=now)
+        return store.countdown(Config.MAX_MINUTES_AWAY, now)
+
+    results["extract"] = measure(extract, repeat)
+    countdown = extract()
+
+    def layout():
+        display.layout.layout_line.cache_clear()
+        lines = []
+        for number, (arrival, m) in enumerate(countdown, start=1):
+            lines.append(
+                display.layout.layout_line(number, map_route_to_bullet(arrival.route_id), arrival.headsign, f"{m}m")
+            )
+        return lines
+
+    results["layout"] = measure(layout, repeat)
+
+    arrivals = countdown[: Config.MAX_TRAINS_DISPLAY] or [None]
+
+    def render():
+        for i in range(1, max(2, len(arrivals))):
+            display.update_display(arrivals[0], arrivals[i] if i < len(arrivals) else None, i + 1)
+
+    results["render"] = measure(render, repeat)
+    return results, len(countdown)
+
+
+def print_report(report):
+    print(f"{'fixture':<10} {'stage':<16} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'peak KiB':>9}")
+    for fixture, stages in report.items():
+        for stage, s in stages.items():
+            print(
+                f"{fixture:<10} {stage:<16} {s['p50']:>9.3f} {s['p90']:>9.3f} "
+                f"{s['p99']:>9.3f} {s['max']:>9.3f} {s['peak_kib']:>9.1f}"
+            )
+
+
+def selective_slower(report):
+    """Print parse_selective/parse per fixture; return True if the selective decode lost anywhere."""
+    slower = False
+    for fixture, stages in report.items():
+        if "parse" not in stages or "parse_selective" not in stages:
+            continue
+        ratio = stages["parse_selective"]["p50"] / stages["parse"]["p50"]
+        print(f"{fixture:<10} parse_selective/parse p50 {ratio:.2f}x")
+        if ratio >= 1:
+            slower = True
+            print(f"SLOWER {fixture}/parse_selective: no faster than a full parse")
+    return slower
+
+
+def compare(report, baseline, threshold):
+    """Print stages slower than baseline by more than threshold; return True if any regressed."""
+    regressed = False
+    for fixture, stages in report.items():
+        for stage, s in stages.items():
+            old = baseline.get(fixture, {}).get(stage)
+            if not old:
+                continue
+            ratio = s["p50"] / old["p50"] if old["p50"] else 1.0
+            if ratio > 1 + threshold:
+                regressed = True
+                print(f"REGRESSION {fixture}/{stage}: p50 {old['p50']:.3f} -> {s['p50']:.3f} ms ({ratio:.2f}x)")
+    if not regressed:
+        print(f"No stage regressed by more than {threshold:.0%}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", action="append", help="Fixture name or .pb path (repeatable, default all)")
+    parser.add_argument("--stops", default="A41N,A41S,A44N,A44S,A46N,A46S", help="Comma-separated target stop ids")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    fixtures = fixture_paths()
+    if args.fixture:
+        fixtures = {Path(f).stem: fixtures.get(f, Path(f)) for f in args.fixture}
+    stop_ids = args.stops.split(",")
+
+    display = DisplayManager(BenchConfig)
+    with tempfile.TemporaryDirectory() as tmp:
+        static_results, index = bench_static(*static_files(), tmp, args.repeat)
+        report = {"static": static_results}
+        for name, path in fixtures.items():
+            report[name], count = bench_fixture(path.read_bytes(), index, display, stop_ids, args.repeat)
+            print(f"{name}: {path.stat().st_size} bytes, {count} arrivals in window")
+        index.close()
+
+    if not cpp_parser_available():
+        print("parse_cpp skipped: nyct_gtfs_cpp is not installed")
+    print_report(report)
+    selective_lost = selective_slower(report)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {args.save_baseline}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(report, baseline, args.threshold) or selective_lost:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Fetch-cycle cost against feed size, over HTTP from a local feed server.
+
+For each trips-per-route level, benchmarks.feedserver serves a synthetic
+gtfs-ace feed and a FeedClient pointed at it with FEED_BASE_URL runs complete
+fetch_upcoming cycles: HTTP round trip, protobuf decode, extraction and
+headsign lookups, exactly as the clock does. A new feed version is published
+before every cycle (and built before the clock starts), so each cycle
+downloads and parses a full payload and the server's build time is not
+counted.
+
+Usage (from the project root):
+    python -m benchmarks.bench_scaling
+    python -m benchmarks.bench_scaling --levels 10,40,160,640 --cycles 10 --decode full
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.feedgen import static_files
+from benchmarks.feedserver import FeedServer, SyntheticFeeds
+from config import Config
+from train_times.client import FeedClient
+from train_times.fetch import fetch_upcoming
+from train_times.static_index import StaticIndex
+
+
+class SteppedClock:
+    """POSIX clock that moves one publish interval per step, so every step is a new feed version."""
+
+    def __init__(self, start, step):
+        self.now = start
+        self.step = step
+
+    def __call__(self):
+        return self.now
+
+    def advance(self):
+        self.now += self.step
+
+
+def measure_level(static_index, trips_per_route, cycles, decode):
+    """Return (payload bytes, [seconds per fetch cycle]) for one feed size."""
+    clock = SteppedClock(time.time(), 30)
+    feeds = SyntheticFeeds(30, clock=clock, trips_per_route=trips_per_route)
+    server = FeedServer(feeds, port=0).start()
+
+    class LevelConfig(Config):
+        FEED_BASE_URL = server.url
+        FEED_DECODE = decode
+        SUBWAY_ROUTE = "C"
+        SUBWAY_ROUTES = ["C"]
+
+    client = FeedClient(static_index, config=LevelConfig)
+    timings = []
+    size = 0
+    try:
+        for cycle in range(cycles + 1):
+            clock.advance()
+            _, payload, _ = feeds.get("gtfs-ace")
+            size = len(payload)
+            start = time.perf_counter()
+            fetch_upcoming(client, LevelConfig)
+            if cycle:  # the first cycle opens the connection
+                timings.append(time.perf_counter() - start)
+    finally:
+        client.close()
+        server.stop()
+    return size, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="10,20,40,80,160", help="trips per route at each level")
+    parser.add_argument("--cycles", type=int, default=20, help="timed fetch cycles per level")
+    parser.add_argument("--decode", choices=("selective", "full"), default=Config.FEED_DECODE)
+    args = parser.parse_args(argv)
+
+    trips_file, stops_file = static_files()
+    with tempfile.TemporaryDirectory() as tmp:
+        static_index = StaticIndex.load(trips_file, stops_file, Path(tmp) / "gtfs_static.idx")
+        print(f"{'trips/route':>11} {'bytes':>9} {'p50 ms':>8} {'p95 ms':>8} {'ms/100KB':>9}")
+        for level in (int(n) for n in args.levels.split(",")):
+            size, timings = measure_level(static_index, level, args.cycles, args.decode)
+            timings.sort()
+            p50 = statistics.median(timings) * 1000
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000
+            print(f"{level:>11} {size:>9} {p50:>8.2f} {p95:>8.2f} {p50 * 100 * 1024 / size:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
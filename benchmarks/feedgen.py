@@ -0,0 +1,190 @@
+"""
+Deterministic NYCT GTFS-realtime feed builder for benchmarks.
+
+Builds full-size FeedMessages whose route, shape and stop ids come from the
+bundled GTFS static trips.txt/stops.txt, so extraction and headsign lookups
+exercise the same code paths as a live feed. benchmarks.feedserver serves
+them over HTTP in place of the MTA.
+"""
+import csv
+import os
+import random
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+from nyct_gtfs import NYCTFeed
+from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2, nyct_subway_pb2
+from config import Config
+
+# Routes carried by each MTA feed, and the stop id prefixes their stations use
+FEEDS = {
+    "gtfs": (["1", "2", "3", "4", "5", "6", "7", "GS"], "12345679"),
+    "gtfs-ace": (["A", "C", "E", "H", "FS"], "AHS"),
+    "gtfs-bdfm": (["B", "D", "F", "M"], "BDFM"),
+    "gtfs-g": (["G"], "G"),
+    "gtfs-jz": (["J", "Z"], "JM"),
+    "gtfs-nqrw": (["N", "Q", "R", "W"], "NQR"),
+    "gtfs-l": (["L"], "L"),
+    "gtfs-si": (["SI"], "S"),
+}
+
+
+def feed_paths():
+    """Return {URL path: FEEDS key} for every MTA feed endpoint NYCTFeed requests."""
+    paths = {}
+    for url in NYCTFeed._train_to_url.values():
+        path = urlsplit(url).path
+        name = unquote(path).rsplit("/", 1)[-1]  # ".../nyct%2Fgtfs-ace" -> "gtfs-ace"
+        if name in FEEDS:
+            paths[path] = name
+    return paths
+
+
+def static_files():
+    """Return (trips.txt, stops.txt), preferring Config paths and falling back to nyct_gtfs's copies."""
+    if os.path.exists(Config.TRIPS_FILE) and os.path.exists(Config.STOPS_FILE):
+        return Config.TRIPS_FILE, Config.STOPS_FILE
+    import nyct_gtfs
+
+    static_dir = Path(nyct_gtfs.__file__).parent / "gtfs_static"
+    return str(static_dir / "trips.txt"), str(static_dir / "stops.txt")
+
+
+def load_static(trips_file, stops_file):
+    """
+    Read the shape ids per route and the parent station ids from GTFS static files.
+
+    Returns:
+        tuple: ({route_id: [shape_id, ...]}, [parent_station_id, ...])
+    """
+    shapes = {}
+    with open(trips_file, newline="") as f:
+        for row in csv.DictReader(f):
+            shape_id = row["trip_id"].split("_")[2] if row["trip_id"].count("_") >= 2 else None
+            if shape_id and shape_id not in shapes.setdefault(row["route_id"], []):
+                shapes[row["route_id"]].append(shape_id)
+
+    stations = []
+    with open(stops_file, newline="") as f:
+        for row in csv.DictReader(f):
+            if row.get("location_type") == "1":
+                stations.append(row["stop_id"])
+    return shapes, sorted(stations)
+
+
+def build_feed(
+    feed_name="gtfs-ace",
+    trips_per_route=40,
+    stops_per_trip=(15, 40),
+    vehicle_ratio=0.7,
+    alert_ratio=0.05,
+    now=None,
+    seed=0,
+    static=None,
+):
+    """
+    Build a synthetic GTFS-realtime feed.
+
+    Args:
+        feed_name: Key of FEEDS selecting the routes and station pool
+        trips_per_route: Number of trip_update entities per route
+        stops_per_trip: (min, max) remaining stops per trip
+        vehicle_ratio: Fraction of trips that also get a vehicle entity (underway)
+        alert_ratio: Fraction of trips with a delay alert
+        now: Feed header timestamp (defaults to the current time)
+        seed: Random seed, so a given set of arguments always yields the same feed
+        static: Optional pre-loaded load_static() result
+
+    Returns:
+        gtfs_realtime_pb2.FeedMessage
+    """
+    rng = random.Random(seed)
+    now = int(time.time()) if now is None else int(now)
+    shapes, stations = static or load_static(*static_files())
+    routes, prefixes = FEEDS[feed_name]
+    pool = [s for s in stations if s[0] in prefixes]
+
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "1.0"
+    message.header.incrementality = gtfs_realtime_pb2.FeedHeader.FULL_DATASET
+    message.header.timestamp = now
+    nyct_header = message.header.Extensions[nyct_subway_pb2.nyct_feed_header]
+    nyct_header.nyct_subway_version = "1.0"
+    for route_id in routes:
+        period = nyct_header.trip_replacement_period.add(route_id=route_id)
+        period.replacement_period.end = now + 30 * 60
+
+    entity_id = 0
+    start_date = time.strftime("%Y%m%d", time.localtime(now))
+    for route_id in routes:
+        route_shapes = shapes.get(route_id) or [f"{route_id}..N01R"]
+        for _ in range(trips_per_route):
+            shape_id = rng.choice(route_shapes)
+            direction = "S" if "S" in shape_id.split(".")[-1][:1] else "N"
+            origin = rng.randrange(0, 144000)
+            trip_id = f"{origin:06d}_{shape_id}"
+            train_id = f"0{route_id} {origin // 6000:02d}{origin % 6000 // 100:02d}+ ORG/DST"
+
+            entity_id += 1
+            trip_update = message.entity.add(id=str(entity_id)).trip_update
+            trip_update.trip.trip_id = trip_id
+            trip_update.trip.route_id = route_id
+            trip_update.trip.start_date = start_date
+            descriptor = trip_update.trip.Extensions[nyct_subway_pb2.nyct_trip_descriptor]
+            descriptor.train_id = train_id
+            descriptor.is_assigned = True
+            descriptor.direction = (
+                nyct_subway_pb2.NyctTripDescriptor.SOUTH
+                if direction == "S"
+                else nyct_subway_pb2.NyctTripDescriptor.NORTH
+            )
+
+            count = min(len(pool), rng.randint(*stops_per_trip))
+            first = rng.randrange(0, max(1, len(pool) - count))
+            arrival = now + rng.randint(-60, 20 * 60)
+            track = str(rng.randint(1, 4))
+            stop_ids = [f"{station}{direction}" for station in pool[first : first + count]]
+            for stop_id in stop_ids:
+                update = trip_update.stop_time_update.add(stop_id=stop_id)
+                update.arrival.time = arrival
+                update.departure.time = arrival + 30
+                update.Extensions[nyct_subway_pb2.nyct_stop_time_update].scheduled_track = track
+                update.Extensions[nyct_subway_pb2.nyct_stop_time_update].actual_track = track
+                arrival += rng.randint(60, 180)
+
+            if rng.random() < vehicle_ratio:
+                entity_id += 1
+                vehicle = message.entity.add(id=str(entity_id)).vehicle
+                vehicle.trip.CopyFrom(trip_update.trip)
+                vehicle.timestamp = now - rng.randint(0, 90)
+                vehicle.stop_id = stop_ids[0] if stop_ids else ""
+                vehicle.current_status = gtfs_realtime_pb2.VehiclePosition.IN_TRANSIT_TO
+
+            if rng.random() < alert_ratio:
+                entity_id += 1
+                alert = message.entity.add(id=str(entity_id)).alert
+                informed = alert.informed_entity.add()
+                informed.trip.CopyFrom(trip_update.trip)
+                translation = alert.header_text.translation.add()
+                translation.text = "Train delayed"
+
+    return message
+
+
+def trips_for_size(feed_name, size, static=None, **options):
+    """
+    trips_per_route that makes build_feed(feed_name, ...) about `size` bytes serialized.
+
+    Args:
+        feed_name: Key of FEEDS
+        size: Target payload size in bytes
+        static: Optional pre-loaded load_static() result
+        **options: Other build_feed arguments the feed will be built with
+
+    Returns:
+        int: at least 1
+    """
+    probe = 10
+    options.pop("trips_per_route", None)
+    probe_size = build_feed(feed_name, trips_per_route=probe, static=static, **options).ByteSize()
+    return max(1, round(probe * size / max(probe_size, 1)))
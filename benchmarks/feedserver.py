@@ -0,0 +1,258 @@
+"""
+Local stand-in for the MTA GTFS-realtime endpoints, for load testing.
+
+Serves synthetic feeds from benchmarks.feedgen at the MTA's own paths
+(NYCTFeed._train_to_url), so the whole clock runs against it unchanged once
+FEED_BASE_URL points at it:
+
+    python -m benchmarks.feedserver --port 8089 --latency 0.05 --slow-ratio 0.05 --slow-latency 4
+    FEED_BASE_URL=http://127.0.0.1:8089 DISPLAY_BACKEND=virtual python main.py
+
+Each feed is rebuilt every --publish-interval seconds with a new header
+timestamp, as the MTA publishes, and conditional GETs get a 304 in between.
+Responses can be delayed (a base latency, random jitter and an optional slow
+tail) and failed with a 5xx at a given rate, and their size set by trips per
+route or a target payload size. GET /stats returns the request counters as
+JSON.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from benchmarks.feedgen import build_feed, feed_paths, load_static, static_files, trips_for_size
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticFeeds:
+    """Synthetic payloads per feed, rebuilt once per publish interval and shared by every request."""
+
+    def __init__(self, publish_interval=30.0, size=None, seed=0, clock=time.time, **feed_options):
+        """
+        Args:
+            publish_interval: Seconds between new versions of each feed
+            size: Target payload size in bytes (overrides trips_per_route)
+            seed: Base random seed; each version of a feed gets its own
+            clock: POSIX time source (injectable for tests and benchmarks)
+            **feed_options: build_feed arguments (trips_per_route, stops_per_trip,
+                vehicle_ratio, alert_ratio)
+        """
+        self.publish_interval = publish_interval
+        self.size = size
+        self.seed = seed
+        self.clock = clock
+        self.feed_options = feed_options
+        self.static = load_static(*static_files())
+        self._lock = threading.Lock()
+        # feed name -> (published, payload, etag)
+        self._published = {}
+        self._trips = {}
+
+    def get(self, name):
+        """
+        The current version of feed `name`.
+
+        Returns:
+            tuple: (publish time, serialized FeedMessage, ETag)
+        """
+        published = int(self.clock() // self.publish_interval * self.publish_interval)
+        with self._lock:
+            current = self._published.get(name)
+            if current is None or current[0] != published:
+                options = dict(self.feed_options)
+                if self.size:
+                    if name not in self._trips:
+                        self._trips[name] = trips_for_size(name, self.size, self.static, **options)
+                    options["trips_per_route"] = self._trips[name]
+                message = build_feed(name, now=published, seed=self.seed + published, static=self.static, **options)
+                payload = message.SerializeToString()
+                etag = '"%s"' % hashlib.blake2b(payload, digest_size=8).hexdigest()
+                current = self._published[name] = (published, payload, etag)
+        return current
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40ms to small feeds
+    disable_nagle_algorithm = True
+    feed_server = None
+
+    def do_GET(self):
+        server = self.feed_server
+        path = urlsplit(self.path).path
+        if path == "/stats":
+            body = json.dumps(server.stats).encode("utf-8")
+            self._send(200, body, {"Content-Type": "application/json"})
+            return
+        name = server.paths.get(path)
+        if name is None:
+            self.send_error(404)
+            return
+
+        server.count("requests")
+        delay = server.delay()
+        if delay:
+            time.sleep(delay)
+        if server.rng.random() < server.error_rate:
+            server.count("errors")
+            self.send_error(server.error_status)
+            return
+
+        published, payload, etag = server.feeds.get(name)
+        headers = {"ETag": etag, "Last-Modified": formatdate(published, usegmt=True)}
+        if self.headers.get("If-None-Match") == etag:
+            server.count("not_modified")
+            self._send(304, b"", headers)
+            return
+        server.count("bytes", len(payload))
+        headers["Content-Type"] = "application/x-protobuf"
+        self._send(200, payload, headers)
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("feeds %s - %s", self.address_string(), format % args)
+
+
+class FeedServer:
+    """Serves SyntheticFeeds at the MTA feed paths from a daemon thread, with injected latency and errors."""
+
+    def __init__(
+        self,
+        feeds,
+        host="127.0.0.1",
+        port=8089,
+        latency=0.0,
+        jitter=0.0,
+        slow_ratio=0.0,
+        slow_latency=0.0,
+        error_rate=0.0,
+        error_status=503,
+        seed=0,
+    ):
+        """
+        Args:
+            feeds: SyntheticFeeds to serve
+            host: Interface to bind
+            port: TCP port (0 picks a free one; see .port)
+            latency: Seconds every feed response is delayed
+            jitter: Up to this many extra seconds, uniformly distributed
+            slow_ratio: Fraction of responses delayed a further slow_latency seconds
+            slow_latency: Extra delay of the slow tail
+            error_rate: Fraction of feed requests answered with error_status
+            error_status: HTTP status of the injected errors
+            seed: Random seed for the injected delays and errors
+        """
+        self.feeds = feeds
+        self.paths = feed_paths()
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_ratio = slow_ratio
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "not_modified": 0, "bytes": 0}
+        self._stats_lock = threading.Lock()
+
+        handler = type("FeedHandler", (_FeedHandler,), {"feed_server": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.url = f"http://{host}:{self.port}"
+        self._thread = None
+
+    def count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def delay(self):
+        """Seconds to hold the next response."""
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if self.rng.random() < self.slow_ratio:
+            delay += self.slow_latency
+        return delay
+
+    def start(self):
+        """Start serving in the background; returns self."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="feed-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--publish-interval", type=float, default=30.0, help="seconds between feed versions")
+    parser.add_argument("--trips-per-route", type=int, default=40)
+    parser.add_argument("--stops-per-trip", default="15,40", help="min,max remaining stops per trip")
+    parser.add_argument("--vehicle-ratio", type=float, default=0.7, help="fraction of trips with a vehicle entity")
+    parser.add_argument("--alert-ratio", type=float, default=0.05, help="fraction of trips with a delay alert")
+    parser.add_argument("--size-kb", type=float, help="target payload size, instead of --trips-per-route")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every response is delayed")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds of delay")
+    parser.add_argument("--slow-ratio", type=float, default=0.0, help="fraction of responses in the slow tail")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="extra seconds for the slow tail")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    low, high = (int(n) for n in args.stops_per_trip.split(","))
+    feeds = SyntheticFeeds(
+        args.publish_interval,
+        size=args.size_kb * 1024 if args.size_kb else None,
+        seed=args.seed,
+        trips_per_route=args.trips_per_route,
+        stops_per_trip=(low, high),
+        vehicle_ratio=args.vehicle_ratio,
+        alert_ratio=args.alert_ratio,
+    )
+    server = FeedServer(
+        feeds,
+        args.host,
+        args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        slow_ratio=args.slow_ratio,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    ).start()
+    logger.info(
+        "Serving %d synthetic feeds at %s; run the clock with FEED_BASE_URL=%s",
+        len(set(server.paths.values())),
+        server.url,
+        server.url,
+    )
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    logger.info("Served %s", server.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Regenerate the GTFS-realtime payloads in benchmarks/fixtures/.
+
+The fixtures are synthetic gtfs-ace feeds built by benchmarks.feedgen from the
+bundled GTFS static files, shaped after three service conditions:
+
+    offpeak     few trips, no alerts
+    rush        full-size feed, every route running
+    disrupted   short-turned trips, heavy alerts, most trains reporting positions
+
+Each has a fixed header timestamp, so the benchmark numbers are reproducible.
+
+Usage (from the project root):
+    python -m benchmarks.make_fixtures
+"""
+from pathlib import Path
+from benchmarks.feedgen import build_feed, load_static, static_files
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+SCENARIOS = {
+    "offpeak": dict(trips_per_route=12, vehicle_ratio=0.6, alert_ratio=0.0, now=1718053200, seed=1),
+    "rush": dict(trips_per_route=45, vehicle_ratio=0.7, alert_ratio=0.02, now=1718021700, seed=2),
+    "disrupted": dict(
+        trips_per_route=30, stops_per_trip=(4, 18), vehicle_ratio=0.9, alert_ratio=0.5, now=1718036100, seed=3
+    ),
+}
+
+
+def fixture_paths():
+    """Return {scenario: path} for the fixtures in benchmarks/fixtures/."""
+    return {name: FIXTURE_DIR / f"{name}.pb" for name in SCENARIOS}
+
+
+def main():
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    static = load_static(*static_files())
+    for name, path in fixture_paths().items():
+        payload = build_feed("gtfs-ace", static=static, **SCENARIOS[name]).SerializeToString()
+        path.write_bytes(payload)
+        print(f"{path}: {len(payload)} bytes")
+
+
+if __name__ == "__main__":
+    main()
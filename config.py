@@ -26,13 +26,79 @@ class Config:
 
     # Subway configuration
     SUBWAY_ROUTE: str = os.getenv("SUBWAY_ROUTE", "C")
+    # SUBWAY_ROUTE may list several lines (e.g. "A,C,E,F"); each distinct feed is fetched once
+    SUBWAY_ROUTES: List[str] = [r.strip() for r in SUBWAY_ROUTE.split(",") if r.strip()]
     STOP_IDS: List[str] = os.getenv("STOP_IDS", "A44N,A44S").split(",")
     MAX_TRAINS_DISPLAY: int = int(os.getenv("MAX_TRAINS_DISPLAY", "4"))
     MAX_MINUTES_AWAY: int = int(os.getenv("MAX_MINUTES_AWAY", "30"))
 
+    # Feed HTTP client (timeouts in seconds)
+    FEED_CONNECT_TIMEOUT: float = float(os.getenv("FEED_CONNECT_TIMEOUT", "5"))
+    FEED_READ_TIMEOUT: float = float(os.getenv("FEED_READ_TIMEOUT", "10"))
+    FEED_KEEPALIVE_EXPIRY: float = float(os.getenv("FEED_KEEPALIVE_EXPIRY", "120"))
+    # Request the MTA feed paths from this scheme://host[:port] instead, e.g. a local
+    # benchmarks.feedserver for load testing (empty = the MTA)
+    FEED_BASE_URL: str = os.getenv("FEED_BASE_URL", "")
+    # Every feed of one refresh must answer within FETCH_DEADLINE seconds or falls back to its
+    # last payload; a feed that has not answered after FETCH_HEDGE_AFTER seconds is requested
+    # a second time and the first answer wins (0 = never hedge)
+    FETCH_DEADLINE: float = float(os.getenv("FETCH_DEADLINE", "15"))
+    FETCH_HEDGE_AFTER: float = float(os.getenv("FETCH_HEDGE_AFTER", "0"))
+    # After BREAKER_FAILURES failed refreshes in a row a feed is not requested again for
+    # BREAKER_RESET seconds, then one trial request decides whether to resume
+    BREAKER_FAILURES: int = int(os.getenv("BREAKER_FAILURES", "3"))
+    BREAKER_RESET: float = float(os.getenv("BREAKER_RESET", "60"))
+
+    # Feed decoding: "full" parses everything, "selective" parses only trips calling at STOP_IDS
+    # (only faster when those trips are a small part of the feed; check with bench_pipeline)
+    FEED_DECODE: str = os.getenv("FEED_DECODE", "full")
+
+    # Background refresh (in seconds): fetch cadence, independent of the display rotation.
+    # Polls follow each feed's learned publish cadence, POLL_PUBLISH_LAG seconds after a new
+    # feed is due, no more often than POLL_MIN_INTERVAL and no less often than FETCH_INTERVAL
+    # (which is also the fixed interval until the cadence is known)
+    FETCH_INTERVAL: float = float(os.getenv("FETCH_INTERVAL", "30"))
+    POLL_MIN_INTERVAL: float = float(os.getenv("POLL_MIN_INTERVAL", "15"))
+    POLL_PUBLISH_LAG: float = float(os.getenv("POLL_PUBLISH_LAG", "2"))
+    # Low-frequency polling overnight, while blanked, or with no trains within MAX_MINUTES_AWAY
+    POLL_IDLE_INTERVAL: float = float(os.getenv("POLL_IDLE_INTERVAL", "300"))
+    # Data older than this is flagged on the panel with a staleness bar
+    STALE_AFTER: float = float(os.getenv("STALE_AFTER", "90"))
+    STALE_BAR_SECONDS_PER_PIXEL: float = float(os.getenv("STALE_BAR_SECONDS_PER_PIXEL", "5"))
+
+    # Feed recording (main.py --record DIR): segment size before rotating, segments to keep (0 = all)
+    RECORD_MAX_BYTES: int = int(os.getenv("RECORD_MAX_BYTES", str(50 * 1024 * 1024)))
+    RECORD_MAX_FILES: int = int(os.getenv("RECORD_MAX_FILES", "0"))
+
+    # "thread" fetches in a background thread; "process" fetches and parses in a separate
+    # worker process feeding the display through shared memory, restarted by a watchdog if
+    # it makes no progress for WORKER_TIMEOUT seconds
+    FETCH_WORKER: str = os.getenv("FETCH_WORKER", "thread")
+    WORKER_TIMEOUT: float = float(os.getenv("WORKER_TIMEOUT", "60"))
+
+    # Time-of-day windows: "HH:MM" or "sunrise"/"sunset" with an optional minute offset
+    # ("sunset+30"); a window may wrap past midnight, and an empty setting disables it
+    OVERNIGHT_START: str = os.getenv("OVERNIGHT_START", "01:00")
+    OVERNIGHT_END: str = os.getenv("OVERNIGHT_END", "05:00")
+    # The panel is turned off (and polling idles) between BLANK_START and BLANK_END
+    BLANK_START: str = os.getenv("BLANK_START", "")
+    BLANK_END: str = os.getenv("BLANK_END", "")
+
     # Display timing (in seconds)
     DISPLAY_REFRESH_INITIAL: int = int(os.getenv("DISPLAY_REFRESH_INITIAL", "3"))
     DISPLAY_REFRESH_CYCLE: int = int(os.getenv("DISPLAY_REFRESH_CYCLE", "5"))
+    # Scroll headsigns that do not fit instead of truncating them: MARQUEE_SPEED pixels per
+    # second after a MARQUEE_PAUSE second hold, animated at up to MARQUEE_FPS frames per second
+    MARQUEE: bool = os.getenv("MARQUEE", "false").lower() == "true"
+    MARQUEE_FPS: float = float(os.getenv("MARQUEE_FPS", "30"))
+    MARQUEE_SPEED: float = float(os.getenv("MARQUEE_SPEED", "20"))
+    MARQUEE_PAUSE: float = float(os.getenv("MARQUEE_PAUSE", "1.5"))
+
+    # Display backend: "rgbmatrix" drives the LED panel, "virtual" renders into memory
+    DISPLAY_BACKEND: str = os.getenv("DISPLAY_BACKEND", "rgbmatrix")
+    # Virtual backend: optional directory to dump frames into, as "ppm", "png" or a "raw" RGB stream
+    VIRTUAL_FRAME_DIR: str = os.getenv("VIRTUAL_FRAME_DIR", "")
+    VIRTUAL_FRAME_FORMAT: str = os.getenv("VIRTUAL_FRAME_FORMAT", "ppm")
 
     # Matrix hardware configuration
     MATRIX_ROWS: int = int(os.getenv("MATRIX_ROWS", "32"))
@@ -42,8 +108,20 @@ class Config:
     MATRIX_PWM_LSB_NANOSECONDS: int = int(os.getenv("MATRIX_PWM_LSB_NANOSECONDS", "50"))
     MATRIX_PWM_BITS: int = int(os.getenv("MATRIX_PWM_BITS", "5"))
     MATRIX_HARDWARE_MAPPING: str = os.getenv("MATRIX_HARDWARE_MAPPING", "adafruit-hat")
+    # Cap on the panel refresh rate in Hz (0 = unlimited); raise for smoother animation
+    MATRIX_LIMIT_REFRESH_RATE_HZ: int = int(os.getenv("MATRIX_LIMIT_REFRESH_RATE_HZ", "0"))
     MATRIX_SHOW_REFRESH_RATE: bool = os.getenv("MATRIX_SHOW_REFRESH_RATE", "true").lower() == "true"
 
+    # Arrivals aggregation server (main.py --serve): serves every stop in the SUBWAY_ROUTE feeds
+    SERVE_HOST: str = os.getenv("SERVE_HOST", "0.0.0.0")
+    SERVE_PORT: int = int(os.getenv("SERVE_PORT", "8088"))
+    # Clocks with ARRIVALS_SERVER set (e.g. "http://192.168.1.20:8088") read from it instead of the MTA
+    ARRIVALS_SERVER: str = os.getenv("ARRIVALS_SERVER", "")
+
+    # Prometheus-style metrics endpoint (http://METRICS_HOST:METRICS_PORT/metrics, port 0 = off)
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9108"))
+
     # Font configuration
     FONT_PATH: str = os.getenv("FONT_PATH", str(PROJECT_ROOT / "MTA.ttf"))
     FONT_SIZE: int = int(os.getenv("FONT_SIZE", "16"))
@@ -53,11 +131,27 @@ class Config:
     LOG_FILE: str = os.getenv("LOG_FILE", str(PROJECT_ROOT / "logs" / "subway_clock.log"))
     LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # 10MB default
     LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))  # Keep 5 old logs
+    # Log lines are written to disk in batches of up to LOG_FLUSH_RECORDS, at most
+    # LOG_FLUSH_INTERVAL seconds after they were logged (WARNING and above are written immediately)
+    LOG_FLUSH_RECORDS: int = int(os.getenv("LOG_FLUSH_RECORDS", "100"))
+    LOG_FLUSH_INTERVAL: float = float(os.getenv("LOG_FLUSH_INTERVAL", "5"))
+    # Max records per minute for any one message below WARNING (0 = unlimited)
+    LOG_RATE_LIMIT: int = int(os.getenv("LOG_RATE_LIMIT", "20"))
 
     # GTFS static files
     TRIPS_FILE: str = str(PROJECT_ROOT / "nyct-gtfs" / "nyct_gtfs" / "gtfs_static" / "trips.txt")
     STOPS_FILE: str = str(PROJECT_ROOT / "nyct-gtfs" / "nyct_gtfs" / "gtfs_static" / "stops.txt")
 
+    # Compiled GTFS static index (rebuilt automatically when trips.txt/stops.txt change)
+    STATIC_INDEX_FILE: str = os.getenv(
+        "STATIC_INDEX_FILE", str(PROJECT_ROOT / "cache" / "gtfs_static.idx")
+    )
+
+    # Last fetched arrivals, saved at most every SNAPSHOT_SAVE_INTERVAL seconds and at shutdown,
+    # so a restart draws its first frame before the first fetch completes (empty = off)
+    SNAPSHOT_FILE: str = os.getenv("SNAPSHOT_FILE", str(PROJECT_ROOT / "cache" / "last_arrivals.json"))
+    SNAPSHOT_SAVE_INTERVAL: float = float(os.getenv("SNAPSHOT_SAVE_INTERVAL", "300"))
+
     # Display line numbering offset
     SECONDARY_INDEX_BASE: int = 2
 
@@ -75,6 +169,21 @@ class Config:
         if not os.path.exists(cls.STOPS_FILE):
             errors.append(f"Stops file not found: {cls.STOPS_FILE}")
 
+        if cls.MARQUEE and not (0 < cls.MARQUEE_FPS <= 60 and cls.MARQUEE_SPEED > 0):
+            errors.append("MARQUEE_FPS must be between 0 and 60 and MARQUEE_SPEED above 0")
+
+        if cls.FETCH_DEADLINE <= 0 or not 0 <= cls.FETCH_HEDGE_AFTER < cls.FETCH_DEADLINE:
+            errors.append("FETCH_DEADLINE must be above 0 and FETCH_HEDGE_AFTER between 0 and FETCH_DEADLINE")
+
+        if cls.BREAKER_FAILURES < 1 or cls.BREAKER_RESET <= 0:
+            errors.append("BREAKER_FAILURES must be at least 1 and BREAKER_RESET above 0")
+
+        if cls.FETCH_WORKER not in ("thread", "process"):
+            errors.append(f"FETCH_WORKER must be 'thread' or 'process', not {cls.FETCH_WORKER!r}")
+
+        if cls.FEED_DECODE not in ("full", "selective"):
+            errors.append(f"FEED_DECODE must be 'full' or 'selective', not {cls.FEED_DECODE!r}")
+
         # Ensure logs directory exists
         log_dir = Path(cls.LOG_FILE).parent
         log_dir.mkdir(parents=True, exist_ok=True)
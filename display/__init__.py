@@ -1,4 +1,11 @@
 """Display module for LED matrix."""
+from .backends import RGBMatrixBackend, VirtualBackend, create_backend
 from .update import DisplayManager, map_route_to_bullet
 
-__all__ = ["DisplayManager", "map_route_to_bullet"]
+__all__ = [
+    "DisplayManager",
+    "map_route_to_bullet",
+    "RGBMatrixBackend",
+    "VirtualBackend",
+    "create_backend",
+]
@@ -0,0 +1,102 @@
+"""
+Glyph atlas: text composed from pre-rasterized alpha masks.
+
+Each glyph of a font is rasterized once by FreeType into an 8-bit alpha mask
+one line high and one advance wide. Drawing text is then a masked color
+copy (Image.paste with a solid color and the mask) per glyph, which PIL does
+in C over a handful of small rectangles, so the cost of a frame depends only
+on how many glyphs are on it and never on the font engine.
+
+Route bullets the font has no glyph for are composed the same way: a disc
+in the route color with the route letter from a smaller font centered on it,
+built once per route.
+"""
+from PIL import Image, ImageDraw
+
+
+class GlyphAtlas:
+    """Alpha masks for the glyphs of one font at one size, rasterized on first use."""
+
+    def __init__(self, font):
+        """
+        Args:
+            font: PIL ImageFont (one atlas per font size)
+        """
+        self.font = font
+        ascent, descent = font.getmetrics()
+        self.height = ascent + descent
+        # char -> (mask or None for blank glyphs, advance width)
+        self._glyphs = {}
+        # (letter, color, letter color) -> (tile, mask, advance width)
+        self._bullets = {}
+
+    def glyph(self, char):
+        """Return (alpha mask, advance width) for one character; the mask is None for blank glyphs."""
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            width = self.font.getbbox(char)[2]
+            mask = Image.new("L", (max(width, 1), self.height))
+            ImageDraw.Draw(mask).text((0, 0), char, font=self.font, fill=255)
+            glyph = self._glyphs[char] = (mask if mask.getbbox() else None, width)
+        return glyph
+
+    def glyph_width(self, char):
+        """Advance width of one character in pixels; TextLayout measures with this too."""
+        return self.glyph(char)[1]
+
+    def text_width(self, text):
+        """Width of a string as the sum of its glyph advances."""
+        return sum(self.glyph(char)[1] for char in text)
+
+    def draw(self, image, position, text, color):
+        """
+        Draw `text` in `color` onto `image` with its top-left corner at `position`.
+
+        Returns:
+            int: x just past the last glyph
+        """
+        x, y = position
+        for char in text:
+            mask, width = self.glyph(char)
+            if mask is not None:
+                image.paste(color, (x, y, x + mask.width, y + mask.height), mask)
+            x += width
+        return x
+
+    def bullet(self, letter, color, letter_color, letter_atlas, template):
+        """
+        A route bullet shaped like the font's `template` bullet glyph.
+
+        Args:
+            letter: Route letter or digit shown on the bullet
+            color: RGB fill of the disc
+            letter_color: RGB color of the letter
+            letter_atlas: GlyphAtlas of the (smaller) font the letter is drawn in
+            template: Bullet glyph of this font whose size and position the disc copies
+
+        Returns:
+            tuple: (tile, mask, advance width); paste the tile through the mask
+        """
+        key = (letter, color, letter_color)
+        bullet = self._bullets.get(key)
+        if bullet is None:
+            template_mask, width = self.glyph(template)
+            left, top, right, bottom = template_mask.getbbox()
+            mask = Image.new("L", template_mask.size)
+            ImageDraw.Draw(mask).ellipse((left, top, right - 1, bottom - 1), fill=255)
+
+            tile = Image.new("RGB", template_mask.size, color)
+            letter_mask, _ = letter_atlas.glyph(letter)
+            if letter_mask is not None:
+                ink = letter_mask.getbbox()
+                x = (left + right - ink[0] - ink[2]) // 2
+                y = (top + bottom - ink[1] - ink[3]) // 2
+                tile.paste(letter_color, (x, y, x + letter_mask.width, y + letter_mask.height), letter_mask)
+            bullet = self._bullets[key] = (tile, mask, width)
+        return bullet
+
+    def draw_bullet(self, image, position, bullet):
+        """Paste a bullet from bullet() at `position`."""
+        tile, mask, _ = bullet
+        x, y = position
+        image.paste(tile, (x, y, x + tile.width, y + tile.height), mask)
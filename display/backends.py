@@ -0,0 +1,137 @@
+"""
+Display backends.
+
+DisplayManager composes each frame into a PIL image and hands it to a backend:
+
+- RGBMatrixBackend drives the LED panel through rpi-rgb-led-matrix. rgbmatrix is
+  imported when the backend is created, so the rest of the display package
+  imports fine on machines without the library.
+- VirtualBackend keeps the last frame in an in-memory framebuffer and can
+  optionally dump every frame as a PPM/PNG sequence or append it to a raw RGB
+  stream. It is for benchmarking, CI and pixel-exact tests without hardware.
+
+The backend is chosen with Config.DISPLAY_BACKEND ("rgbmatrix" or "virtual").
+"""
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class RGBMatrixBackend:
+    """Pushes frames to the LED matrix via an offscreen canvas swapped on vsync."""
+
+    name = "rgbmatrix"
+
+    def __init__(self, config, width, height):
+        """
+        Args:
+            config: Config object with the MATRIX_* settings
+            width: Frame width in pixels
+            height: Frame height in pixels
+        """
+        from rgbmatrix import RGBMatrix, RGBMatrixOptions
+
+        self.width = width
+        self.height = height
+
+        options = RGBMatrixOptions()
+        options.rows = config.MATRIX_ROWS
+        options.cols = config.MATRIX_COLS
+        options.chain_length = config.MATRIX_CHAIN_LENGTH
+        options.parallel = 1
+        options.hardware_mapping = config.MATRIX_HARDWARE_MAPPING
+        options.gpio_slowdown = config.MATRIX_GPIO_SLOWDOWN
+        options.show_refresh_rate = config.MATRIX_SHOW_REFRESH_RATE
+        options.pwm_lsb_nanoseconds = config.MATRIX_PWM_LSB_NANOSECONDS
+        options.pwm_bits = config.MATRIX_PWM_BITS
+        options.limit_refresh_rate_hz = config.MATRIX_LIMIT_REFRESH_RATE_HZ
+
+        self.matrix = RGBMatrix(options=options)
+
+        # Create offscreen canvas for double buffering
+        self.offscreen_canvas = self.matrix.CreateFrameCanvas()
+
+    def push(self, image):
+        """
+        Push a composed frame to the matrix.
+
+        The whole image is copied into the offscreen canvas in one call and the
+        canvas is swapped in on the next vertical sync, so frames are tear-free
+        and the Python cost per frame does not depend on the panel size.
+        """
+        self.offscreen_canvas.SetImage(image)
+        self.offscreen_canvas = self.matrix.SwapOnVSync(self.offscreen_canvas)
+
+    def close(self):
+        """Blank the panel."""
+        self.matrix.Clear()
+
+
+class VirtualBackend:
+    """In-memory framebuffer, optionally dumping frames to disk."""
+
+    name = "virtual"
+    FORMATS = ("ppm", "png", "raw")
+
+    def __init__(self, width, height, frame_dir=None, frame_format="ppm"):
+        """
+        Args:
+            width: Frame width in pixels
+            height: Frame height in pixels
+            frame_dir: Directory to dump frames into (None keeps frames in memory only)
+            frame_format: "ppm" or "png" for one numbered file per frame, or "raw"
+                to append packed RGB bytes to a single frames.rgb stream
+        """
+        if frame_format not in self.FORMATS:
+            raise ValueError(f"Unknown frame format {frame_format!r}, expected one of {self.FORMATS}")
+        self.width = width
+        self.height = height
+        self.frame_format = frame_format
+        self.frame_dir = Path(frame_dir) if frame_dir else None
+        self.framebuffer = bytes(width * height * 3)
+        self.frame_count = 0
+        self._stream = None
+
+        if self.frame_dir:
+            self.frame_dir.mkdir(parents=True, exist_ok=True)
+            if frame_format == "raw":
+                self._stream = open(self.frame_dir / "frames.rgb", "ab")
+            logger.info(f"Virtual display dumping {frame_format} frames to {self.frame_dir}")
+
+    def push(self, image):
+        """Copy a composed frame into the framebuffer (and dump it if configured)."""
+        self.framebuffer = image.tobytes()
+        self.frame_count += 1
+        if self._stream is not None:
+            self._stream.write(self.framebuffer)
+        elif self.frame_dir:
+            image.save(self.frame_dir / f"frame_{self.frame_count:06d}.{self.frame_format}")
+
+    def pixel(self, x, y):
+        """Return the RGB tuple at (x, y) of the last pushed frame."""
+        offset = (y * self.width + x) * 3
+        return tuple(self.framebuffer[offset : offset + 3])
+
+    def close(self):
+        """Flush and close the raw frame stream, if any."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+def create_backend(config, width, height):
+    """
+    Build the display backend selected by config.DISPLAY_BACKEND.
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    name = config.DISPLAY_BACKEND.lower()
+    if name == RGBMatrixBackend.name:
+        return RGBMatrixBackend(config, width, height)
+    if name == VirtualBackend.name:
+        return VirtualBackend(
+            width, height, frame_dir=config.VIRTUAL_FRAME_DIR, frame_format=config.VIRTUAL_FRAME_FORMAT
+        )
+    raise ValueError(f"Unknown DISPLAY_BACKEND {config.DISPLAY_BACKEND!r}, expected 'rgbmatrix' or 'virtual'")
@@ -0,0 +1,128 @@
+"""
+Cached text layout for the LED matrix.
+
+Glyph advance widths come from the GlyphAtlas the frames are drawn with (so
+text is laid out at exactly the advances it is drawn at), truncation is a
+binary search over cumulative widths, and the finished layout of each
+(line number, bullet, headsign, time) tuple is memoized. The display
+rotation shows the same few strings over and over, so after warm-up a frame
+needs no font measuring at all.
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from itertools import accumulate
+
+# A run of consecutive characters drawn in one color starting at x
+GlyphRun = namedtuple("GlyphRun", ["x", "text", "color"])
+
+# A composed route bullet (for routes the font has no bullet glyph for) at x
+BulletRun = namedtuple("BulletRun", ["x", "route", "color"])
+
+# Everything needed to draw one display line; bullet is a BulletRun or None
+LineLayout = namedtuple("LineLayout", ["runs", "time_text", "time_x", "bullet"], defaults=(None,))
+
+
+class TextLayout:
+    """Measures and lays out display lines for one font/size, caching everything it can."""
+
+    def __init__(
+        self,
+        atlas,
+        max_width,
+        bullet_chars,
+        bullet_color,
+        text_color,
+        time_padding=10,
+        cache_size=128,
+        route_bullets=None,
+    ):
+        """
+        Args:
+            atlas: GlyphAtlas of the font the lines are drawn in (e.g. MTA.ttf at FONT_SIZE)
+            max_width: Width of the display in pixels
+            bullet_chars: Characters drawn in bullet_color (the route bullets)
+            bullet_color: RGB tuple for route bullets
+            text_color: RGB tuple for everything else
+            time_padding: Pixels kept free between the headsign and the arrival time
+            cache_size: Number of finished line layouts to memoize
+            route_bullets: {bullet: RGB} for bullets with no glyph in the font; these are
+                laid out as a BulletRun as wide as the font's bullet glyphs
+        """
+        self.atlas = atlas
+        self.max_width = max_width
+        self.bullet_chars = frozenset(bullet_chars)
+        self.bullet_color = bullet_color
+        self.text_color = text_color
+        self.time_padding = time_padding
+        self.route_bullets = dict(route_bullets or {})
+        self.layout_line = lru_cache(maxsize=cache_size)(self._layout_line)
+        self.composed_bullet_width = max(map(self.glyph_width, self.bullet_chars), default=atlas.font.size)
+
+    def glyph_width(self, char):
+        """Advance width of one character in pixels (measured once by the atlas)."""
+        return self.atlas.glyph_width(char)
+
+    def text_width(self, text):
+        """Width of a string as the sum of its glyph advances."""
+        return sum(map(self.glyph_width, text))
+
+    def truncate(self, text, max_width):
+        """
+        Return the longest prefix of `text` that fits within `max_width` pixels.
+
+        Binary search over the cumulative glyph widths, so the cost is
+        O(log n) after the glyphs have been measured once.
+        """
+        cumulative = list(accumulate(map(self.glyph_width, text)))
+        return text[: bisect_right(cumulative, max_width)]
+
+    def bullet_width(self, bullet):
+        """Width of a route bullet, whether a font glyph or composed."""
+        return self.composed_bullet_width if bullet in self.route_bullets else self.text_width(bullet)
+
+    def fits(self, bullet, headsign, arrival_time):
+        """True if the headsign can be shown in full next to `arrival_time` (no truncation)."""
+        available_width = self.max_width - self.text_width(arrival_time) - self.time_padding
+        return self.bullet_width(bullet) + self.text_width(f" {headsign}") <= available_width
+
+    def marquee_region(self, line_number, bullet, arrival_time):
+        """
+        Where a scrolling headsign goes on a line.
+
+        Returns:
+            tuple: (x, width) of the space between "N. <bullet> " and the arrival time
+        """
+        x = self.text_width(f"{line_number}. ") + self.bullet_width(bullet) + self.glyph_width(" ")
+        return x, self.max_width - self.text_width(arrival_time) - self.time_padding - x
+
+    def _layout_line(self, line_number, bullet, headsign, arrival_time):
+        time_width = self.text_width(arrival_time)
+        available_width = self.max_width - time_width - self.time_padding
+        prefix = f"{line_number}. "
+        bullet_run = None
+        if bullet in self.route_bullets:
+            # Composed bullets are drawn separately; the text runs resume after them
+            bullet_run = BulletRun(self.text_width(prefix), bullet, self.route_bullets[bullet])
+            segments = (prefix, self.truncate(f" {headsign}", available_width - self.composed_bullet_width))
+        else:
+            segments = (prefix + self.truncate(f"{bullet} {headsign}", available_width),)
+
+        runs = []
+        x = 0
+        for index, segment in enumerate(segments):
+            if index:
+                x += self.composed_bullet_width
+            run_color = None
+            for char in segment:
+                color = self.bullet_color if char in self.bullet_chars else self.text_color
+                if color != run_color:
+                    runs.append([x, "", color])
+                    run_color = color
+                runs[-1][1] += char
+                x += self.glyph_width(char)
+
+        return LineLayout(
+            tuple(GlyphRun(*run) for run in runs), arrival_time, self.max_width - time_width, bullet_run
+        )
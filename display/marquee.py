@@ -0,0 +1,83 @@
+"""
+Marquee scrolling for headsigns too long for their line.
+
+A headsign that overflows is rasterized once into an off-screen strip: the
+text, a gap, and the start of the text again, so every scroll position is one
+contiguous window. An animation frame is a crop of that strip pasted onto the
+canvas; no text is drawn per frame.
+
+FramePacer schedules frames on fixed deadlines (start + n / fps) rather than
+sleeping a fixed time after each one, so drawing time does not slow the
+scroll, and frames that are already late are dropped instead of queued.
+"""
+import time
+from PIL import Image
+
+# Blank pixels between the end of a headsign and its next repetition
+GAP = 24
+
+
+class MarqueeStrip:
+    """One headsign pre-rendered for scrolling through a window `width` pixels wide."""
+
+    def __init__(self, text, atlas, width, height, color, speed, pause):
+        """
+        Args:
+            text: Headsign text
+            atlas: GlyphAtlas to render it from
+            width: Width of the window it scrolls through
+            height: Height of the line
+            color: RGB text color
+            speed: Scroll speed in pixels per second
+            pause: Seconds to hold the start of the text before each pass
+        """
+        self.width = width
+        self.speed = speed
+        self.pause = pause
+        self.period = atlas.text_width(text) + GAP
+        self.strip = Image.new("RGB", (self.period + width, height), color=(0, 0, 0))
+        atlas.draw(self.strip, (0, 0), text, color)
+        atlas.draw(self.strip, (self.period, 0), text, color)
+        self._cycle = pause + self.period / speed
+
+    def offset(self, elapsed):
+        """Scroll position in pixels `elapsed` seconds after the text first appeared."""
+        t = elapsed % self._cycle
+        if t < self.pause:
+            return 0
+        return min(int((t - self.pause) * self.speed), self.period - 1)
+
+    def window(self, elapsed):
+        """The visible part of the strip at `elapsed` seconds, as an image `width` pixels wide."""
+        x = self.offset(elapsed)
+        return self.strip.crop((x, 0, x + self.width, self.strip.height))
+
+
+class FramePacer:
+    """Fixed-rate frame deadlines on the monotonic clock."""
+
+    def __init__(self, fps, clock=time.monotonic):
+        """
+        Args:
+            fps: Frames per second
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.period = 1.0 / fps
+        self.clock = clock
+        self.deadline = clock()
+        self.dropped = 0
+
+    def next_deadline(self):
+        """
+        Time the next frame is due.
+
+        If drawing fell behind by whole frames, those frames are skipped (and
+        counted in .dropped) so the animation keeps its speed without bursts.
+        """
+        self.deadline += self.period
+        late = self.clock() - self.deadline
+        if late > 0:
+            missed = int(late / self.period) + 1
+            self.dropped += missed
+            self.deadline += missed * self.period
+        return self.deadline
@@ -1,8 +1,14 @@
 import logging
-from utils.helpers import hex_to_rgb, truncate_text
+import time
+from functools import lru_cache
+from utils.helpers import hex_to_rgb
+from utils.metrics import FRAMES_RENDERED, time_stage
 from PIL import Image, ImageDraw, ImageFont
-from rgbmatrix import RGBMatrix, RGBMatrixOptions
 from config import Config
+from .atlas import GlyphAtlas
+from .backends import create_backend
+from .layout import TextLayout
+from .marquee import MarqueeStrip
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +16,24 @@ logger = logging.getLogger(__name__)
 # Mapping for route bullets (used with custom MTA font)
 ROUTE_TO_BULLET = {"A": "!", "C": "@", "E": "#"}
 
+# Route bullet colors; other routes' bullets are composed in these (see display/atlas.py)
+ROUTE_COLORS = {
+    **dict.fromkeys(("A", "C", "E"), "#003986"),
+    **dict.fromkeys(("B", "D", "F", "FX", "M"), "#FF6319"),
+    "G": "#6CBE45",
+    **dict.fromkeys(("J", "Z"), "#996633"),
+    "L": "#A7A9AC",
+    **dict.fromkeys(("N", "Q", "R", "W"), "#FCCC0A"),
+    **dict.fromkeys(("1", "2", "3"), "#EE352E"),
+    **dict.fromkeys(("4", "5", "6", "6X"), "#00933C"),
+    **dict.fromkeys(("7", "7X"), "#B933AD"),
+    **dict.fromkeys(("GS", "FS", "H"), "#808183"),
+}
+
+# Shuttles show an S; bullets in yellow take a black letter
+SHUTTLE_ROUTES = frozenset(("GS", "FS", "H"))
+DARK_LETTER_COLORS = frozenset(("#FCCC0A",))
+
 
 def map_route_to_bullet(route_id):
     """
@@ -20,32 +44,15 @@ def map_route_to_bullet(route_id):
     return ROUTE_TO_BULLET.get(route_id, route_id)
 
 
-def is_valid_train_data(arrival_tuple):
-    """
-    Check if arrival data represents actual train info (not error message).
-
-    Args:
-        arrival_tuple: Tuple of (arrival_text, minutes_away)
-
-    Returns:
-        bool: True if valid train data, False if error message or invalid
-    """
-    if not arrival_tuple or not arrival_tuple[0]:
-        return False
-    text = arrival_tuple[0]
-    # Check for known error messages
-    if text in ["No trains available", "Error", ""]:
-        return False
-    # Valid train data should have route ID and arrival time
-    return " " in text and len(text.split()) >= 2
-
-
 class DisplayManager:
     """
     Manages the LED matrix display for subway arrival times.
     Encapsulates all display state and configuration.
     """
 
+    # Log an average frame render time every this many frames
+    FRAME_STATS_INTERVAL = 100
+
     def __init__(self, config=None):
         """
         Initialize the DisplayManager with configuration.
@@ -66,137 +73,222 @@ class DisplayManager:
         self.image = Image.new("RGB", (self.matrix_width, self.matrix_height), color=(0, 0, 0))
         self.draw = ImageDraw.Draw(self.image)
 
-        # Matrix setup
-        options = RGBMatrixOptions()
-        options.rows = self.config.MATRIX_ROWS
-        options.cols = self.config.MATRIX_COLS
-        options.chain_length = self.config.MATRIX_CHAIN_LENGTH
-        options.parallel = 1
-        options.hardware_mapping = self.config.MATRIX_HARDWARE_MAPPING
-        options.gpio_slowdown = self.config.MATRIX_GPIO_SLOWDOWN
-        options.show_refresh_rate = self.config.MATRIX_SHOW_REFRESH_RATE
-        options.pwm_lsb_nanoseconds = self.config.MATRIX_PWM_LSB_NANOSECONDS
-        options.pwm_bits = self.config.MATRIX_PWM_BITS
-
-        self.matrix = RGBMatrix(options=options)
+        # Output backend (LED matrix, or an in-memory framebuffer for headless runs)
+        self.backend = create_backend(self.config, self.matrix_width, self.matrix_height)
 
-        # Create offscreen canvas for double buffering
-        self.offscreen_canvas = self.matrix.CreateFrameCanvas()
+        # Frame render timing
+        self.frame_count = 0
+        self.last_frame_ms = 0.0
+        self.total_frame_ms = 0.0
 
         # Display colors
         self.blue_color = hex_to_rgb("#003986")  # MTA blue
         self.white_color = (255, 255, 255)
+        self.stale_color = (255, 140, 0)  # Amber staleness bar
         self.circle_size = self.config.FONT_SIZE - 6
 
-        logger.info(f"DisplayManager initialized: {self.matrix_width}x{self.matrix_height}")
+        # Glyphs are rasterized once into alpha masks; frames are composed by pasting them.
+        # Composed route bullets take their letter from a smaller size of the same font
+        self.atlas = GlyphAtlas(self.font)
+        self.letter_atlas = GlyphAtlas(ImageFont.truetype(self.config.FONT_PATH, self.config.FONT_SIZE * 3 // 4))
+        self._circle_masks = {}
+
+        # Line layouts are measured through the atlas once and reused every frame
+        self.layout = TextLayout(
+            self.atlas,
+            self.matrix_width,
+            bullet_chars=ROUTE_TO_BULLET.values(),
+            bullet_color=self.blue_color,
+            text_color=self.white_color,
+            route_bullets={
+                route: hex_to_rgb(color) for route, color in ROUTE_COLORS.items() if route not in ROUTE_TO_BULLET
+            },
+        )
 
-    def draw_colored_text(self, text, position, route_color, default_color):
-        """
-        Draw text with special coloring for route bullets.
-        Route bullets (!@#) are colored with route_color, other text with default_color.
-        """
-        x, y = position
-        for char in text:
-            self.draw.text(
-                (x, y),
-                char,
-                font=self.font,
-                fill=route_color if char in "!@#" else default_color,
-            )
-            x += self.draw.textbbox((x, y), char, font=self.font)[2] - x
+        # Arrival lines repeat every rotation; each (line, route, headsign, minutes) is laid out once
+        self.arrival_line = lru_cache(maxsize=128)(self._arrival_line)
+
+        # Scrolling headsigns: each strip is rendered once, then only cropped per frame.
+        # _marquees maps a line's y to (strip, x, time it started scrolling)
+        self.marquee_strip = lru_cache(maxsize=32)(self._marquee_strip)
+        self._marquees = {}
+        self._stale_age = None
+
+        logger.info(
+            f"DisplayManager initialized: {self.matrix_width}x{self.matrix_height} "
+            f"({self.backend.name} backend)"
+        )
 
-    def draw_right_justified_text(self, text, y, color, max_width):
-        """Draw text right-justified within max_width."""
-        text_width = self.draw.textbbox((0, 0), text, font=self.font)[2]
-        x = max_width - text_width
-        self.draw.text((x, y), text, font=self.font, fill=color)
+    def draw_line(self, line_layout, y):
+        """Draw a laid-out arrival line (circle, colored runs, right-justified time) at row y."""
+        self.draw_white_circle((0, y), self.circle_size)
+        for run in line_layout.runs:
+            self.atlas.draw(self.image, (run.x, y), run.text, run.color)
+        if line_layout.bullet is not None:
+            self.draw_route_bullet(line_layout.bullet, y)
+        self.atlas.draw(self.image, (line_layout.time_x, y), line_layout.time_text, self.white_color)
+
+    def draw_route_bullet(self, bullet_run, y):
+        """Draw a composed bullet (a route without a bullet glyph in the font) at row y."""
+        route = bullet_run.route
+        letter = "S" if route in SHUTTLE_ROUTES else route[0]
+        letter_color = (0, 0, 0) if ROUTE_COLORS[route] in DARK_LETTER_COLORS else self.white_color
+        bullet = self.atlas.bullet(letter, bullet_run.color, letter_color, self.letter_atlas, template="!")
+        self.atlas.draw_bullet(self.image, (bullet_run.x, y), bullet)
 
     def draw_white_circle(self, position, size):
         """Draw a white circle at the given position."""
+        mask = self._circle_masks.get(size)
+        if mask is None:
+            mask = self._circle_masks[size] = Image.new("L", (size + 1, size + 1))
+            ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
         x, y = position
         offset_x = 17
         offset_y = 1
-        self.draw.ellipse(
-            (x + offset_x, y + offset_y, x + offset_x + size, y + offset_y + size),
-            fill=self.white_color,
-        )
+        x, y = x + offset_x, y + offset_y
+        self.image.paste(self.white_color, (x, y, x + size + 1, y + size + 1), mask)
+
+    def draw_staleness_bar(self, age_seconds):
+        """
+        Draw an amber bar along the bottom row showing how old the data is.
+        The bar grows one pixel per STALE_BAR_SECONDS_PER_PIXEL, up to full width.
+        """
+        length = min(self.matrix_width, 1 + int(age_seconds // self.config.STALE_BAR_SECONDS_PER_PIXEL))
+        y = self.matrix_height - 1
+        self.draw.line((0, y, length - 1, y), fill=self.stale_color)
+
+    def _arrival_line(self, line_number, route_id, headsign, minutes):
+        """
+        Format and lay out one arrival line.
 
-    def update_display(self, closest_arrival, next_arrival, line_number):
+        Returns:
+            tuple: (LineLayout, marquee) where marquee is (headsign, x, width) if the
+            headsign scrolls (MARQUEE and it does not fit) and is left out of the layout
+        """
+        bullet = map_route_to_bullet(route_id)
+        arrival_time = f"{minutes}m"
+        if self.config.MARQUEE and not self.layout.fits(bullet, headsign, arrival_time):
+            x, width = self.layout.marquee_region(line_number, bullet, arrival_time)
+            return self.layout.layout_line(line_number, bullet, "", arrival_time), (headsign, x, width)
+        return self.layout.layout_line(line_number, bullet, headsign, arrival_time), None
+
+    def update_display(self, closest_arrival, next_arrival, line_number, stale_age=None):
         """
         Update the LED matrix display with train arrival information.
 
         Args:
-            closest_arrival: Tuple of (arrival_text, minutes_away) for the closest train
-            next_arrival: Tuple of (arrival_text, minutes_away) for the next train
+            closest_arrival: (Arrival, minutes_away) for the closest train, or None
+            next_arrival: (Arrival, minutes_away) for the next train, or None
             line_number: Line number to display for the next train (2, 3, or 4)
+            stale_age: Age of the data in seconds if it is stale, None when fresh
         """
+        start = time.perf_counter()
         logger.debug(
-            f"update_display: closest={closest_arrival}, next={next_arrival}, line={line_number}"
+            "update_display: closest=%s, next=%s, line=%s", closest_arrival, next_arrival, line_number
         )
 
-        # Print to console for debugging
-        print(f"Displaying on matrix:")
-        print(f" - Closest arrival: {closest_arrival}")
-        print(f" - Next arrival: {next_arrival}")
-        print(f" - Line number: {line_number}")
-
         # Clear the display
         self.draw.rectangle((0, 0, self.matrix_width, self.matrix_height), fill=(0, 0, 0))
 
-        # Display closest arrival on line 1
-        if is_valid_train_data(closest_arrival):
-            closest_parts = closest_arrival[0].rsplit(" ", 1)
-            route_id = closest_parts[0].split()[0]  # Extract route ID
-            headsign_text = (
-                " ".join(closest_parts[0].split()[1:]).replace("Train", "").strip()
-            )
-            mapped_route = map_route_to_bullet(route_id)
-            arrival_time = closest_parts[1]
-            
-            # Calculate time width to determine available space for headsign
-            time_width = self.draw.textbbox((0, 0), arrival_time, font=self.font)[2]
-            available_width = self.matrix_width - time_width - 10  # 10px padding between text and time
-            
-            closest_headsign = truncate_text(
-                f"{mapped_route} {headsign_text}", self.font, available_width
-            )
+        # Display closest arrival on line 1, next arrival on line 2
+        lines = []
+        marquees = {}
+        now = time.monotonic()
+        with time_stage("layout"):
+            for item, number, y in ((closest_arrival, 1, 0), (next_arrival, line_number, 16)):
+                if item is None:
+                    continue
+                arrival, minutes = item
+                line_layout, marquee = self.arrival_line(number, arrival.route_id, arrival.headsign, minutes)
+                if marquee is not None:
+                    headsign, x, width = marquee
+                    strip = self.marquee_strip(headsign, width)
+                    previous = self._marquees.get(y)
+                    # A headsign still on the same line keeps scrolling from where it was
+                    started = previous[2] if previous is not None and previous[0] is strip else now
+                    marquees[y] = (strip, x, started)
+                lines.append((line_layout, y))
+        for line_layout, y in lines:
+            self.draw_line(line_layout, y)
+        self._marquees = marquees
+        self._stale_age = stale_age
+        self._draw_marquees(now)
+
+        if stale_age is not None:
+            self.draw_staleness_bar(stale_age)
+
+        with time_stage("push"):
+            self.push_frame()
+        self.record_frame_time(start)
+
+    @property
+    def animating(self):
+        """True while the current frame has a scrolling headsign (see animate())."""
+        return bool(self._marquees)
+
+    def _marquee_strip(self, text, width):
+        return MarqueeStrip(
+            text,
+            self.atlas,
+            width,
+            self.matrix_height // 2,
+            self.white_color,
+            self.config.MARQUEE_SPEED,
+            self.config.MARQUEE_PAUSE,
+        )
 
-            self.draw_white_circle((0, 0), self.circle_size)
-            self.draw_colored_text(
-                f"1. {closest_headsign}", (0, 0), self.blue_color, self.white_color
-            )
-            self.draw_right_justified_text(
-                arrival_time, 0, self.white_color, self.matrix_width
-            )
+    def _draw_marquees(self, now):
+        for y, (strip, x, started) in self._marquees.items():
+            self.image.paste(strip.window(now - started), (x, y))
 
-        # Display next arrival on line 2
-        if is_valid_train_data(next_arrival):
-            next_parts = next_arrival[0].rsplit(" ", 1)
-            route_id = next_parts[0].split()[0]  # Extract route ID
-            headsign_text = (
-                " ".join(next_parts[0].split()[1:]).replace("Train", "").strip()
-            )
-            mapped_route = map_route_to_bullet(route_id)
-            arrival_time = next_parts[1]
-            
-            # Calculate time width to determine available space for headsign
-            time_width = self.draw.textbbox((0, 0), arrival_time, font=self.font)[2]
-            available_width = self.matrix_width - time_width - 10  # 10px padding between text and time
-            
-            next_headsign = truncate_text(
-                f"{mapped_route} {headsign_text}", self.font, available_width
-            )
+    def animate(self, now=None):
+        """
+        Advance the scrolling headsigns of the current frame and push it.
 
-        self.matrix.SetImage(self.image.convert("RGB"))
-            )
-            self.draw_right_justified_text(
-                arrival_time, 16, self.white_color, self.matrix_width
-            )
+        Only the marquee windows are re-blitted; the rest of the frame is left
+        as update_display() drew it.
+
+        Args:
+            now: time.monotonic() of the frame (defaults to now)
+        """
+        if not self._marquees:
+            return
+        with time_stage("scroll"):
+            self._draw_marquees(time.monotonic() if now is None else now)
+            if self._stale_age is not None:
+                self.draw_staleness_bar(self._stale_age)
+            self.push_frame()
+        FRAMES_RENDERED.inc()
+
+    def blank(self):
+        """Turn every pixel off (while the schedule blanks the panel)."""
+        self._marquees = {}
+        self.draw.rectangle((0, 0, self.matrix_width, self.matrix_height), fill=(0, 0, 0))
+        self.push_frame()
 
-        # Render to offscreen canvas then swap
-        image_rgb = self.image.convert("RGB")
-        pixels = image_rgb.load()
-        for x in range(self.matrix_width):
-            for y in range(self.matrix_height):
-                r, g, b = pixels[x, y]
-                self.matrix.SetPixel(x, y, r, g, b)
+    def push_frame(self):
+        """Push the composed frame to the display backend."""
+        self.backend.push(self.image)
+
+    def close(self):
+        """Release the display backend."""
+        self.backend.close()
+
+    def record_frame_time(self, start):
+        """
+        Record how long a frame took to compose and push (in ms) and log a periodic average.
+        Includes the wait for vertical sync in SwapOnVSync.
+        """
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.frame_count += 1
+        FRAMES_RENDERED.inc()
+        self.last_frame_ms = elapsed_ms
+        self.total_frame_ms += elapsed_ms
+        logger.debug("Frame %d rendered in %.2f ms", self.frame_count, elapsed_ms)
+        if self.frame_count % self.FRAME_STATS_INTERVAL == 0:
+            logger.info(
+                "Frame render: last %.2f ms, average %.2f ms over %d frames",
+                elapsed_ms,
+                self.total_frame_ms / self.frame_count,
+                self.frame_count,
+            )
@@ -2,19 +2,50 @@
 NYC Subway Clock - Main application
 Displays real-time subway arrival times on an LED matrix
 """
+import argparse
+import atexit
 import logging
+import queue
 import sys
+import threading
 import time
+import tracemalloc
 import pytz
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from config import Config
-from train_times import fetch_train_times
+# Only modules that are cheap to import are imported here; the feed client (httpx,
+# nyct_gtfs and the protobuf modules) is imported in the background once the first
+# frame is on the panel
+from train_times import fetch_upcoming, ArrivalStore, FeedRefresher, SnapshotFile
 from display import DisplayManager
+from display.marquee import FramePacer
+from utils.log_handlers import BatchingRotatingFileHandler, RateLimitFilter
+from utils.memory import MemoryReport
+from utils.metrics import DATA_STALENESS, MetricsServer, time_stage
+from utils.scheduler import DisplaySchedule, PollScheduler, clock_is_idle
+from utils.startup import Deferred, StartupTimer
+
+# Seconds between schedule checks while the panel is blanked
+BLANK_CHECK_INTERVAL = 30
+# Longest pause after repeated unexpected errors in the main loop (the first retry is after 1s)
+ERROR_BACKOFF_MAX = 10
 
 # Configure logging
 def setup_logging():
-    """Configure logging with both file and console output with rotation."""
+    """
+    Configure logging with both file and console output with rotation.
+
+    Logging calls on the fetch and render threads format the message (the
+    QueueHandler does that before enqueueing) and put the record on a queue;
+    a listener thread does all the I/O, writing the file in batches, so the SD
+    card sees a few large writes instead of one per line. Each message
+    template below WARNING is rate-limited to LOG_RATE_LIMIT records a minute.
+
+    Returns:
+        QueueListener: already started, and stopped automatically at exit
+    """
     log_file = Path(Config.LOG_FILE)
     log_file.parent.mkdir(parents=True, exist_ok=True)
 
@@ -24,12 +55,13 @@ def setup_logging():
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
-    # Rotating file handler - prevents logs from growing unbounded
-    from logging.handlers import RotatingFileHandler
-    file_handler = RotatingFileHandler(
+    # Rotating file handler - prevents logs from growing unbounded, writes in batches
+    file_handler = BatchingRotatingFileHandler(
         log_file,
         maxBytes=Config.LOG_MAX_BYTES,
         backupCount=Config.LOG_BACKUP_COUNT,
+        capacity=Config.LOG_FLUSH_RECORDS,
+        flush_interval=Config.LOG_FLUSH_INTERVAL,
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
@@ -39,65 +71,335 @@ def setup_logging():
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
 
+    # Callers format and enqueue; the listener thread does the I/O
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(limit=Config.LOG_RATE_LIMIT))
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     # Root logger configuration
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO))
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(queue_handler)
+    return listener
 
 
 logger = logging.getLogger(__name__)
 
 
-def cycle_display(display_manager, train_times_data):
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="NYC Subway Clock")
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Archive every raw feed payload into DIR (rotating, gzip-compressed)",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        nargs="+",
+        help="Replay recorded archive segments (files or directories) instead of fetching",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as an arrivals server for other clocks (ARRIVALS_SERVER) instead of driving a display",
+    )
+    parser.add_argument(
+        "--memory-report",
+        type=float,
+        metavar="SECONDS",
+        help="Trace memory with tracemalloc and log a footprint report every SECONDS (slows the clock down)",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay speed: 1 = wall clock, 60 = an hour per minute, 0 = as fast as possible",
+    )
+    return parser.parse_args(argv)
+
+
+def rotation_frames(train_times_data):
     """
-    Cycle through train arrivals on the display.
+    Frames of one display rotation for a list of arrivals.
 
     Args:
-        display_manager: DisplayManager instance
-        train_times_data: List of train arrival tuples [(text, minutes), ...]
+        train_times_data: [(Arrival, minutes_away), ...] as returned by ArrivalStore.countdown()
 
-    This function displays the closest arrival and cycles through the next 2-3 arrivals.
+    Returns:
+        list: (closest_arrival, next_arrival, line_number) for each frame; the
+        closest arrival stays on line 1 while line 2 cycles through the next ones
+        (None for a line with no train)
     """
     if not train_times_data:
-        no_trains = ("No trains available", 0)
-        display_manager.update_display(no_trains, ("", 0), Config.SECONDARY_INDEX_BASE)
-        return
+        return [(None, None, Config.SECONDARY_INDEX_BASE)]
 
     # Closest arrival stays on line 1
     closest_arrival = train_times_data[0]
 
     # Next arrivals to cycle through on line 2
     next_arrivals = train_times_data[1 : Config.MAX_TRAINS_DISPLAY]
-
     if not next_arrivals:
         # Only one train available
-        display_manager.update_display(closest_arrival, ("", 0), Config.SECONDARY_INDEX_BASE)
-        return
+        return [(closest_arrival, None, Config.SECONDARY_INDEX_BASE)]
 
-    # Display the first next arrival initially
-    secondary_index = 0
-    next_arrival = next_arrivals[secondary_index]
-    line_number = secondary_index + Config.SECONDARY_INDEX_BASE
-    display_manager.update_display(closest_arrival, next_arrival, line_number)
-    time.sleep(Config.DISPLAY_REFRESH_INITIAL)
+    return [
+        (closest_arrival, next_arrival, index + Config.SECONDARY_INDEX_BASE)
+        for index, next_arrival in enumerate(next_arrivals)
+    ]
+
+
+def dwell(display_manager, refresher, version, seconds):
+    """
+    Hold the current frame for `seconds`, or until a snapshot newer than `version` is published.
 
-    # Cycle through remaining arrivals
+    While the frame has a scrolling headsign it is animated at MARQUEE_FPS:
+    frames are due on fixed deadlines, the time between them is spent waiting
+    on the refresher (so new data still interrupts at once), and frames that
+    are already late are skipped rather than drawn back to back.
+
+    Returns:
+        The latest snapshot (the same object as before if nothing new arrived)
+    """
+    if not display_manager.animating:
+        with time_stage("wait"):
+            return refresher.wait_for_update(version, seconds)
+
+    end = time.monotonic() + seconds
+    pacer = FramePacer(Config.MARQUEE_FPS)
     while True:
-        secondary_index = (secondary_index + 1) % len(next_arrivals)
-        next_arrival = next_arrivals[secondary_index]
-        line_number = secondary_index + Config.SECONDARY_INDEX_BASE
+        deadline = min(pacer.next_deadline(), end)
+        with time_stage("wait"):
+            latest = refresher.wait_for_update(version, deadline - time.monotonic())
+        if latest.version != version or deadline >= end:
+            if pacer.dropped:
+                logger.debug("Marquee dropped %d late frame(s)", pacer.dropped)
+            return latest
+        display_manager.animate(deadline)
 
-        display_manager.update_display(closest_arrival, next_arrival, line_number)
-        time.sleep(Config.DISPLAY_REFRESH_CYCLE)
 
-        # If we've cycled back to the start, break to fetch fresh data
-        if secondary_index == 0:
+def cycle_display(display_manager, refresher):
+    """
+    Cycle through train arrivals on the display.
+
+    Args:
+        display_manager: DisplayManager instance
+        refresher: FeedRefresher publishing arrival snapshots
+
+    This function displays the closest arrival and cycles through the next 2-3 arrivals.
+    It never waits on the network: every frame renders the latest published snapshot,
+    and a new snapshot is drawn as soon as it arrives. Minutes-away are recomputed
+    from the snapshot's absolute arrival times on every frame, so the countdown keeps
+    running (and departed trains drop off) between fetches.
+    """
+    snapshot = refresher.latest()
+    secondary_index = 0
+
+    while True:
+        store = snapshot.arrivals
+        train_times_data = store.countdown(Config.MAX_MINUTES_AWAY)
+        frames = rotation_frames(train_times_data)
+        stale_age = store.age() if store.is_stale(Config.STALE_AFTER) else None
+
+        secondary_index = min(secondary_index, len(frames) - 1)
+        display_manager.update_display(*frames[secondary_index], stale_age=stale_age)
+
+        if len(train_times_data) < 2:
+            # Nothing to cycle through: hold the frame, then let the caller redraw
+            dwell(display_manager, refresher, snapshot.version, Config.DISPLAY_REFRESH_CYCLE)
+            return
+
+        seconds = Config.DISPLAY_REFRESH_INITIAL if secondary_index == 0 else Config.DISPLAY_REFRESH_CYCLE
+        latest = dwell(display_manager, refresher, snapshot.version, seconds)
+        if latest is not snapshot:
+            # Fresh data arrived mid-dwell: redraw it straight away at the same position
+            snapshot = latest
+            continue
+
+        secondary_index += 1
+        if secondary_index >= len(frames):
             break
 
 
-def main():
+def run_replay(display_manager, static_index, paths, speed):
+    """
+    Replay archived feed payloads through the arrival pipeline and the display.
+
+    At speed > 0 each snapshot is rotated on the display, with dwell times
+    scaled by speed, until the simulated clock reaches the next payload. At
+    speed 0 each snapshot's rotation is rendered once, back to back, which is
+    the mode for load tests and CPU-per-feed-hour measurements.
+    """
+    from train_times.archive import read_archive
+    from train_times.replay import replay
+
+    current = []
+
+    def show(seconds):
+        deadline = time.monotonic() + seconds
+        while True:
+            for index, frame in enumerate(rotation_frames(current)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                display_manager.update_display(*frame)
+                dwell = Config.DISPLAY_REFRESH_INITIAL if index == 0 else Config.DISPLAY_REFRESH_CYCLE
+                time.sleep(min(dwell / speed, remaining))
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    first = last = None
+    payloads = 0
+    for fetched_at, arrivals in replay(read_archive(paths), static_index, speed=speed, sleep=show):
+        first = fetched_at if first is None else first
+        last = fetched_at
+        payloads += 1
+        current = arrivals
+        if speed <= 0:
+            for frame in rotation_frames(arrivals):
+                display_manager.update_display(*frame)
+
+    if speed > 0 and payloads:
+        # Give the last snapshot one full rotation
+        frames = len(rotation_frames(current))
+        show((Config.DISPLAY_REFRESH_INITIAL + (frames - 1) * Config.DISPLAY_REFRESH_CYCLE) / speed)
+
+    wall = time.perf_counter() - start_wall
+    cpu = time.process_time() - start_cpu
+    feed_hours = (last - first) / 3600 if payloads else 0.0
+    logger.info(
+        f"Replayed {payloads} payloads covering {feed_hours:.2f} feed-hours "
+        f"in {wall:.1f}s wall / {cpu:.1f}s CPU"
+    )
+    if feed_hours:
+        logger.info(f"CPU per feed-hour: {cpu / feed_hours:.2f}s ({feed_hours * 3600 / wall:.0f}x real time)")
+
+
+def run_server(static_index, display_schedule, record_dir=None):
+    """
+    Fetch every feed once per poll and serve all its stops to clocks on the network.
+
+    Runs until interrupted. Clocks point ARRIVALS_SERVER at SERVE_HOST:SERVE_PORT.
+    """
+    from train_times import FeedClient
+    from train_times.archive import FeedRecorder
+    from train_times.server import ArrivalServer, ServerConfig, StopIndex, fetch_stop_index
+
+    recorder = None
+    if record_dir:
+        recorder = FeedRecorder(record_dir, Config.RECORD_MAX_BYTES, Config.RECORD_MAX_FILES)
+    feed_client = FeedClient(static_index, config=ServerConfig, recorder=recorder)
+    poll_scheduler = PollScheduler()
+
+    def fetch():
+        index = fetch_stop_index(feed_client)
+        poll_scheduler.observe(feed_client.generated_times())
+        return index
+
+    def next_fetch(index):
+        now = time.time()
+        return poll_scheduler.next_delay(now, idle=display_schedule.is_overnight(now))
+
+    refresher = FeedRefresher(fetch, initial=StopIndex(), next_interval=next_fetch).start()
+    DATA_STALENESS.set_function(lambda: refresher.latest().age())
+    try:
+        server = ArrivalServer(refresher, Config.SERVE_HOST, Config.SERVE_PORT).start()
+    except OSError as e:
+        logger.error(f"Could not bind arrivals server to {Config.SERVE_HOST}:{Config.SERVE_PORT}: {e}")
+        refresher.stop(timeout=5)
+        feed_client.close()
+        sys.exit(1)
+    logger.info(
+        f"Serving arrivals for {Config.SUBWAY_ROUTES} at http://{Config.SERVE_HOST}:{server.port}/arrivals"
+    )
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info("Received keyboard interrupt, shutting down server...")
+
+    server.stop()
+    refresher.stop(timeout=5)
+    feed_client.close()
+    if recorder is not None:
+        recorder.close()
+
+
+def load_static_index():
+    """Load the compiled GTFS static index (built from trips.txt/stops.txt on first run)."""
+    from train_times import StaticIndex
+
+    logger.info("Loading GTFS static index...")
+    with time_stage("static_load"):
+        static_index = StaticIndex.load(Config.TRIPS_FILE, Config.STOPS_FILE, Config.STATIC_INDEX_FILE)
+    logger.info(f"Static index ready: {static_index.shape_count} shapes, {static_index.stop_count} stops")
+    return static_index
+
+
+def open_source(remote, record_dir, timer):
+    """
+    Set up where arrivals come from; runs in the background while the first frame is drawn.
+
+    Args:
+        remote: Read from the ARRIVALS_SERVER instead of the MTA feeds
+        record_dir: Optional directory to archive raw feed payloads into
+        timer: StartupTimer to mark the end of this phase on
+
+    Returns:
+        tuple: (source, recorder) - a RemoteArrivalClient or a FeedClient with its
+        static index loaded, and the FeedRecorder (or None)
+
+    Raises:
+        ValueError: for an unknown SUBWAY_ROUTE
+        OSError: if the GTFS static files cannot be read
+    """
+    if remote:
+        from train_times.remote import RemoteArrivalClient
+
+        # The server does the MTA polling; an unchanged local poll is a bodyless 304
+        source = RemoteArrivalClient(Config.ARRIVALS_SERVER)
+        logger.info(f"Reading arrivals for {Config.STOP_IDS} from {Config.ARRIVALS_SERVER}")
+        timer.mark("source")
+        return source, None
+
+    from train_times import FeedClient
+    from train_times.archive import FeedRecorder
+
+    static_index = load_static_index()
+    timer.mark("static_index")
+    recorder = None
+    if record_dir:
+        recorder = FeedRecorder(record_dir, Config.RECORD_MAX_BYTES, Config.RECORD_MAX_FILES)
+
+    # One long-lived client keeps its connection pool and cache validators across fetches
+    feed_client = FeedClient(static_index, recorder=recorder)
+    try:
+        feed_urls = feed_client.feed_urls(Config.SUBWAY_ROUTES)
+    except ValueError as e:
+        feed_client.close()
+        if recorder is not None:
+            recorder.close()
+        raise ValueError(f"Invalid SUBWAY_ROUTE: {e}") from e
+    logger.info(f"Fetching {len(feed_urls)} feed(s) for {len(Config.SUBWAY_ROUTES)} route(s)")
+    timer.mark("source")
+    return feed_client, recorder
+
+
+def main(argv=None):
     """Main application loop."""
+    # Phases are timed from process start, so interpreter start-up and imports are included
+    timer = StartupTimer()
+    timer.mark("imports")
+    args = parse_args(argv)
+    if args.memory_report:
+        # Started before anything else is allocated, so the report covers the whole run
+        tracemalloc.start()
+
     # Setup logging first
     setup_logging()
     logger.info("=" * 60)
@@ -113,35 +415,64 @@ def main():
         sys.exit(1)
 
     # Log configuration
-    logger.info(f"Subway Route: {Config.SUBWAY_ROUTE}")
+    logger.info(f"Subway Routes: {Config.SUBWAY_ROUTES}")
     logger.info(f"Stop IDs: {Config.STOP_IDS}")
     logger.info(f"Timezone: {Config.TIMEZONE}")
     logger.info(f"Display: {Config.MATRIX_COLS * Config.MATRIX_CHAIN_LENGTH}x{Config.MATRIX_ROWS}")
 
-    # Set up timezone (convert once, use everywhere)
+    # Validate timezone (arrival math is done on epoch seconds; only the schedule needs it)
     try:
-        nyc_tz = pytz.timezone(Config.TIMEZONE)
+        pytz.timezone(Config.TIMEZONE)
         logger.info(f"Timezone '{Config.TIMEZONE}' loaded successfully")
     except pytz.UnknownTimeZoneError:
         logger.error(f"Invalid timezone: {Config.TIMEZONE}")
         sys.exit(1)
 
-    # Read GTFS static files once at startup
     try:
-        logger.info(f"Reading GTFS files...")
-        with open(Config.TRIPS_FILE, "r") as f:
-            trips_content = f.read()
-            logger.info(f"Loaded {len(trips_content)} bytes from trips.txt")
-
-        with open(Config.STOPS_FILE, "r") as f:
-            stops_content = f.read()
-            logger.info(f"Loaded {len(stops_content)} bytes from stops.txt")
-    except FileNotFoundError as e:
-        logger.error(f"GTFS file not found: {e}")
-        sys.exit(1)
-    except Exception as e:
-        logger.error(f"Error reading GTFS files: {e}")
+        display_schedule = DisplaySchedule()
+    except ValueError as e:
+        logger.error(f"Invalid display schedule: {e}")
         sys.exit(1)
+    if display_schedule.blank:
+        logger.info(f"Display blanked from {Config.BLANK_START} to {Config.BLANK_END}")
+    timer.mark("config")
+
+    # Clocks reading from an arrivals server receive finished headsigns and need no static
+    # index; with FETCH_WORKER=process the worker loads it
+    remote = bool(Config.ARRIVALS_SERVER) and not (args.serve or args.replay)
+    worker = Config.FETCH_WORKER == "process" and not (remote or args.serve or args.replay)
+
+    static_index = None
+    if args.serve or args.replay:
+        try:
+            static_index = load_static_index()
+        except FileNotFoundError as e:
+            logger.error(f"GTFS file not found: {e}")
+            sys.exit(1)
+        except Exception as e:
+            logger.error(f"Error loading GTFS static data: {e}")
+            sys.exit(1)
+
+    # The static index and feed client load in the background while the display starts up
+    source_loader = None
+    if not (worker or args.serve or args.replay):
+        source_loader = Deferred(lambda: open_source(remote, args.record, timer), name="source-loader").start()
+
+    # Local Prometheus endpoint; the metrics themselves are always recorded
+    metrics_server = None
+    if Config.METRICS_PORT:
+        try:
+            metrics_server = MetricsServer(Config.METRICS_HOST, Config.METRICS_PORT).start()
+            logger.info(f"Serving metrics at http://{Config.METRICS_HOST}:{metrics_server.port}/metrics")
+        except OSError as e:
+            logger.warning(f"Metrics endpoint disabled, could not bind port {Config.METRICS_PORT}: {e}")
+
+    if args.serve:
+        run_server(static_index, display_schedule, args.record)
+        if metrics_server is not None:
+            metrics_server.stop()
+        logger.info("NYC Subway Clock server shutdown complete")
+        return
 
     # Initialize display manager
     try:
@@ -151,32 +482,163 @@ def main():
     except Exception as e:
         logger.error(f"Failed to initialize display: {e}")
         sys.exit(1)
+    timer.mark("display")
+
+    if args.replay:
+        logger.info(f"Replaying recorded feeds from {args.replay} at speed {args.speed}")
+        try:
+            run_replay(display_manager, static_index, args.replay, args.speed)
+        except KeyboardInterrupt:
+            logger.info("Received keyboard interrupt, stopping replay...")
+        display_manager.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        return
 
-    # Main loop - fetch train data and display it
+    # First frame: the last arrivals saved to disk, counted down to now (stale bar included)
+    snapshot_file = None
+    initial = ArrivalStore()
+    if Config.SNAPSHOT_FILE:
+        snapshot_file = SnapshotFile(Config.SNAPSHOT_FILE, Config.SNAPSHOT_SAVE_INTERVAL)
+        initial = snapshot_file.load() or initial
+        if initial.fetched_epoch is not None:
+            logger.info(f"Loaded {len(initial)} saved arrivals from {initial.age():.0f}s ago")
+    frames = rotation_frames(initial.countdown(Config.MAX_MINUTES_AWAY))
+    display_manager.update_display(
+        *frames[0], stale_age=initial.age() if initial.is_stale(Config.STALE_AFTER) else None
+    )
+    logger.info(f"First frame drawn {timer.mark('first_frame'):.2f}s after process start")
+
+    if worker:
+        from train_times.worker import WorkerRefresher
+
+        # Fetching and parsing run in their own process; the panel reads snapshots from shared memory
+        refresher = WorkerRefresher(record_dir=args.record, initial=initial).start()
+        logger.info(f"Fetch worker process started (watchdog timeout {Config.WORKER_TIMEOUT:g}s)")
+    elif remote:
+
+        def fetch():
+            source, _ = source_loader.result()
+            return source.fetch_upcoming()
+
+        def next_fetch(store):
+            return Config.POLL_IDLE_INTERVAL if clock_is_idle(display_schedule, store) else Config.POLL_MIN_INTERVAL
+
+    else:
+        # Poll when the feeds are due to publish, slowly when nobody needs the data
+        poll_scheduler = PollScheduler()
+
+        def fetch():
+            # Waits for the static index and feed client on the first fetch only
+            feed_client, _ = source_loader.result()
+            store = fetch_upcoming(feed_client)
+            poll_scheduler.observe(feed_client.generated_times())
+            return store
+
+        def next_fetch(store):
+            now = time.time()
+            return poll_scheduler.next_delay(now, idle=clock_is_idle(display_schedule, store, now))
+
+    memory_report = None
+    if args.memory_report:
+
+        def memory_structures():
+            structures = {"arrivals": refresher.latest().arrivals, "text layout": display_manager.layout}
+            static_index = None
+            if source_loader is not None and source_loader.done() and source_loader.error is None:
+                static_index = getattr(source_loader.result()[0], "static_index", None)
+            if static_index is not None:
+                structures["static index lookups"] = static_index
+                structures["static index (mapped)"] = static_index.mapped_bytes
+            return structures
+
+        memory_report = MemoryReport(memory_structures)
+        if not worker:
+            # With FETCH_WORKER=process the fetch cycles run (untraced) in the worker
+            fetch = memory_report.track(fetch)
+
+    if not worker:
+        # Fetch in the background so network round trips and retries never freeze the panel
+        refresher = FeedRefresher(fetch, initial=initial, next_interval=next_fetch).start()
+        logger.info(
+            f"Background refresher started (every {Config.POLL_MIN_INTERVAL:g}-{refresher.interval:g}s, "
+            f"{Config.POLL_IDLE_INTERVAL:g}s when idle)"
+        )
+    DATA_STALENESS.set_function(lambda: refresher.latest().age())
+
+    # The startup report goes out once the first fetch (possibly a worker's) is published
+    stopping = threading.Event()
+
+    def report_startup():
+        while refresher.wait_for_update(0, Config.FETCH_INTERVAL).version == 0:
+            if stopping.is_set():
+                return
+        timer.mark("first_fetch")
+        timer.report()
+
+    Deferred(report_startup, name="startup-report").start()
+    if memory_report is not None:
+        memory_report.start(args.memory_report)
+        logger.info(f"Memory report every {args.memory_report:g}s")
+
+    # Main loop - display whatever the refresher has published most recently
     logger.info("Entering main loop")
+    exit_code = 0
+    blanked = False
+    errors_in_a_row = 0
     while True:
         try:
-            # Fetch fresh train times
-            logger.debug("Fetching train times...")
-            train_times_data = fetch_train_times(trips_content, stops_content, nyc_tz)
-
-            if train_times_data:
-                logger.info(f"Fetched {len(train_times_data)} train arrivals")
-            else:
-                logger.warning("No train data available")
-
-            # Display and cycle through arrivals
-            cycle_display(display_manager, train_times_data)
+            if source_loader is not None and source_loader.error is not None:
+                # Bad SUBWAY_ROUTE or unreadable GTFS files: fetching can never succeed
+                logger.error(f"Could not start fetching: {source_loader.error}")
+                exit_code = 1
+                break
+
+            if display_schedule.is_blank(time.time()):
+                if not blanked:
+                    logger.info(f"Display blanked until {Config.BLANK_END}")
+                    display_manager.blank()
+                    blanked = True
+                time.sleep(BLANK_CHECK_INTERVAL)
+                continue
+            if blanked:
+                logger.info("Display schedule ended, resuming")
+                blanked = False
+                refresher.wake()
+
+            cycle_display(display_manager, refresher)
+            if snapshot_file is not None:
+                snapshot_file.save(refresher.latest().arrivals)
+            errors_in_a_row = 0
 
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt, shutting down...")
             break
         except Exception as e:
             logger.error(f"Unexpected error in main loop: {e}", exc_info=True)
-            # Wait a bit before retrying to avoid tight error loops
-            time.sleep(10)
-
+            # Back off 1, 2, 4... seconds to avoid a tight error loop without freezing the panel for long
+            time.sleep(min(2**errors_in_a_row, ERROR_BACKOFF_MAX))
+            errors_in_a_row += 1
+
+    stopping.set()
+    if memory_report is not None:
+        memory_report.stop()
+    # Scrapes read the refresher (DATA_STALENESS), so stop serving them first
+    if metrics_server is not None:
+        metrics_server.stop()
+    refresher.stop(timeout=5)
+    if snapshot_file is not None:
+        snapshot_file.save(refresher.latest().arrivals, force=True)
+    if source_loader is not None and source_loader.done() and source_loader.error is None:
+        source, recorder = source_loader.result()
+        source.close()
+        if recorder is not None:
+            recorder.close()
+            logger.info(f"Recorded {recorder.records} feed payloads to {recorder.directory}")
+    display_manager.close()
     logger.info("NYC Subway Clock shutdown complete")
+    if exit_code:
+        sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+import unittest
+from train_times.arrivals import ArrivalBatch
+from train_times.extract import ArrivalRecord
+
+
+def record(arrival, stop_id="A44N"):
+    return ArrivalRecord("C", "C..N04R", stop_id, arrival, "A09N")
+
+
+class TestArrivalBatch(unittest.TestCase):
+    """Tests for epoch-sorted arrival batches."""
+
+    NOW = 1_700_000_000
+
+    def test_upcoming_sorted_and_departed_dropped(self):
+        """Test records are sorted by arrival and those before now are dropped, however far ahead the rest are."""
+        now = self.NOW
+        batch = ArrivalBatch([record(now + 90 * 60), record(now - 1), record(now), record(now + 59)])
+        self.assertEqual(len(batch), 4)
+        self.assertEqual([r.arrival - now for r in batch.upcoming(now)], [0, 59, 90 * 60])
+
+    def test_empty_batch(self):
+        """Test an empty batch has nothing upcoming."""
+        self.assertEqual(ArrivalBatch().upcoming(self.NOW), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from PIL import Image, ImageDraw, ImageFont
+from config import Config
+from display import DisplayManager
+from display.atlas import GlyphAtlas
+from train_times.arrivals import Arrival
+
+WHITE = (255, 255, 255)
+
+
+class VirtualConfig(Config):
+    DISPLAY_BACKEND = "virtual"
+    VIRTUAL_FRAME_DIR = ""
+
+
+class TestGlyphAtlas(unittest.TestCase):
+    """Tests for text composed from pre-rasterized glyph masks."""
+
+    def setUp(self):
+        self.font = ImageFont.truetype(Config.FONT_PATH, Config.FONT_SIZE)
+        self.atlas = GlyphAtlas(self.font)
+
+    def test_matches_freetype_rendering(self):
+        """Test pasted glyph masks reproduce FreeType's rendering of the whole string."""
+        for text in ("1. @ Euclid Av", "12m", "Inwood-207 St"):
+            expected = Image.new("RGB", (128, 16))
+            ImageDraw.Draw(expected).text((3, 0), text, font=self.font, fill=WHITE)
+            composed = Image.new("RGB", (128, 16))
+            end = self.atlas.draw(composed, (3, 0), text, WHITE)
+            self.assertEqual(composed.tobytes(), expected.tobytes())
+            self.assertEqual(end, 3 + self.font.getlength(text))
+
+    def test_glyphs_rasterized_once(self):
+        """Test each glyph is rasterized once and blank glyphs have no mask."""
+        self.atlas.draw(Image.new("RGB", (128, 16)), (0, 0), "Av Av", WHITE)
+        self.assertEqual(sorted(self.atlas._glyphs), [" ", "A", "v"])
+        self.assertIsNone(self.atlas.glyph(" ")[0])
+        self.assertIs(self.atlas.glyph("A"), self.atlas.glyph("A"))
+
+    def test_composed_bullet(self):
+        """Test a route without a bullet glyph gets a disc in its color with the letter on it."""
+        display = DisplayManager(VirtualConfig)
+        display.update_display(
+            (Arrival("1", "S", "A44S", "Van Cortlandt Park-242 St", 0, 0), 4),
+            (Arrival("Q", "S", "A44S", "96 St", 0, 0), 7),
+            2,
+        )
+        line = display.layout.layout_line(1, "1", "Van Cortlandt Park-242 St", "4m")
+        self.assertEqual(line.bullet.color, (0xEE, 0x35, 0x2E))
+        # Disc edge in the route color, letter in the middle, on both lines
+        self.assertEqual(display.backend.pixel(line.bullet.x + 2, 4), (0xEE, 0x35, 0x2E))
+        self.assertEqual(display.backend.pixel(line.bullet.x + 2, 20), (0xFC, 0xCC, 0x0A))
+        tile = display.atlas.bullet("1", (0xEE, 0x35, 0x2E), WHITE, display.letter_atlas, "!")[0]
+        self.assertIn(WHITE, [color for _, color in tile.getcolors()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+from pathlib import Path
+from config import Config
+from display import DisplayManager, VirtualBackend, create_backend
+from train_times.arrivals import Arrival
+
+
+class VirtualConfig(Config):
+    DISPLAY_BACKEND = "virtual"
+    VIRTUAL_FRAME_DIR = ""
+
+
+class TestVirtualBackend(unittest.TestCase):
+    """Tests for headless rendering through the virtual display backend."""
+
+    def test_render_into_framebuffer(self):
+        """Test frames land in the in-memory framebuffer pixel for pixel."""
+        display = DisplayManager(VirtualConfig)
+        display.update_display(
+            (Arrival("C", "S", "A44S", "Euclid Av", 0, 0), 5),
+            (Arrival("A", "S", "A44S", "Inwood-207 St", 0, 0), 12),
+            2,
+        )
+
+        backend = display.backend
+        self.assertIsInstance(backend, VirtualBackend)
+        self.assertEqual(backend.frame_count, 1)
+        self.assertEqual(backend.framebuffer, display.image.tobytes())
+        # Blue route bullet with the white circle showing through its letter
+        self.assertEqual(backend.pixel(20, 0), display.blue_color)
+        self.assertEqual(backend.pixel(21, 2), display.white_color)
+
+    def test_staleness_bar(self):
+        """Test a stale frame draws the amber bar on the bottom row."""
+        display = DisplayManager(VirtualConfig)
+        display.update_display((Arrival("C", "S", "A44S", "Euclid Av", 0, 0), 5), None, 2, stale_age=100)
+
+        bottom = display.matrix_height - 1
+        self.assertEqual(display.backend.pixel(0, bottom), display.stale_color)
+        self.assertEqual(display.backend.pixel(display.matrix_width - 1, bottom), (0, 0, 0))
+
+    def test_frame_dumps(self):
+        """Test PPM sequences and raw RGB streams are written per frame."""
+        with tempfile.TemporaryDirectory() as tmp:
+            ppm = VirtualBackend(128, 32, frame_dir=Path(tmp) / "ppm", frame_format="ppm")
+            raw = VirtualBackend(128, 32, frame_dir=Path(tmp) / "raw", frame_format="raw")
+            display = DisplayManager(VirtualConfig)
+            arrival = Arrival("C", "S", "A44S", "Euclid Av", 0, 0)
+            for minutes in (5, 4):
+                display.update_display((arrival, minutes), None, 2)
+                ppm.push(display.image)
+                raw.push(display.image)
+            raw.close()
+
+            self.assertEqual(
+                sorted(p.name for p in (Path(tmp) / "ppm").iterdir()),
+                ["frame_000001.ppm", "frame_000002.ppm"],
+            )
+            self.assertEqual((Path(tmp) / "raw" / "frames.rgb").stat().st_size, 2 * 128 * 32 * 3)
+
+    def test_unknown_backend(self):
+        """Test an unknown DISPLAY_BACKEND is rejected."""
+
+        class BadConfig(Config):
+            DISPLAY_BACKEND = "hologram"
+
+        with self.assertRaises(ValueError):
+            create_backend(BadConfig, 128, 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
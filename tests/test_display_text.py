@@ -1,8 +1,9 @@
+import time
 import unittest
-from unittest.mock import patch, MagicMock
-from datetime import datetime
-import pytz
+from unittest.mock import MagicMock
+from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2
 from train_times import fetch_train_times
+from train_times.arrivals import Arrival
 from display import map_route_to_bullet
 from utils import hex_to_rgb
 
@@ -10,38 +11,31 @@ from utils import hex_to_rgb
 class TestTrainTimes(unittest.TestCase):
     """Tests for train times fetching functionality."""
 
-    @patch("train_times.fetch.NYCTFeed")
-    def test_fetch_train_times(self, mock_nyctfeed):
-        """Test that fetch_train_times returns properly formatted train data."""
-        # Mock the NYCTFeed and its methods
+    def test_fetch_train_times(self):
+        """Test that fetch_train_times returns typed arrivals with minutes away."""
+        now = int(time.time())
+        message = gtfs_realtime_pb2.FeedMessage()
+        message.header.gtfs_realtime_version = "1.0"
+        message.header.timestamp = now
+        trip_update = message.entity.add(id="1").trip_update
+        trip_update.trip.trip_id = "084600_C..S04R"
+        trip_update.trip.route_id = "C"
+        for stop_id, offset in (("A42S", 60), ("A44S", 5 * 60 + 30), ("A55S", 900)):
+            update = trip_update.stop_time_update.add(stop_id=stop_id)
+            update.arrival.time = now + offset
+
+        # Mock the feed client and the NYCTFeed it returns
         mock_feed = MagicMock()
-        mock_nyctfeed.return_value = mock_feed
+        mock_feed._feed = message
+        feed_client = MagicMock()
+        feed_client.refresh_many.return_value = [mock_feed]
+        feed_client.static_index.headsign.return_value = "Euclid Av"
+        feed_client.age.return_value = 0.0
 
-        # Create a mock train with arrival data
-        mock_stop_update = MagicMock()
-        mock_stop_update.stop_id = "A44N"
-        mock_stop_update.arrival = datetime(
-            2025, 1, 16, 14, 30, tzinfo=pytz.timezone("America/New_York")
-        )
+        train_times = fetch_train_times(feed_client)
 
-        mock_train = MagicMock()
-        mock_train.headsign_text = "Test Train"
-        mock_train.route_id = "C"
-        mock_train.stop_time_updates = [mock_stop_update]
-
-        mock_feed.filter_trips.return_value = [mock_train]
-
-        # Mock timezone
-        nyc_tz = pytz.timezone("America/New_York")
-
-        # Test with mock trips and stops content
-        trips_content = "route_id,trip_id\nC,test_trip"
-        stops_content = "stop_id,stop_name\nA44N,Test Stop"
-
-        train_times = fetch_train_times(trips_content, stops_content, nyc_tz)
-
-        # Should return a list
-        self.assertIsInstance(train_times, list)
+        self.assertEqual(train_times, [(Arrival("C", "S", "A44S", "Euclid Av", now + 5 * 60 + 30, 0), 5)])
+        feed_client.static_index.headsign.assert_called_with("C..S04R")
 
     def test_map_route_to_bullet(self):
         """Test route ID to bullet character mapping."""
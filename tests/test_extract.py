@@ -0,0 +1,55 @@
+import unittest
+from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2
+from nyct_gtfs.compiled_gtfs.nyct_subway_pb2 import nyct_trip_descriptor
+from train_times.extract import ASSIGNED, DELAYED, UNDERWAY, ArrivalRecord, extract_arrivals
+
+
+def make_feed():
+    """Two trips through A44, plus the northbound train's vehicle position."""
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "1.0"
+    message.header.timestamp = 1000
+
+    north = message.entity.add(id="1").trip_update
+    north.trip.trip_id = "084600_C..N04R"
+    north.trip.route_id = "C"
+    for stop_id, arrival in (("A44N", 1100), ("A42N", 1200), ("A09N", 2000)):
+        north.stop_time_update.add(stop_id=stop_id).arrival.time = arrival
+
+    south = message.entity.add(id="2").trip_update
+    south.trip.trip_id = "085000_C..S04R"
+    south.trip.route_id = "C"
+    south.stop_time_update.add(stop_id="A44S").departure.time = 1150  # no arrival: skipped
+    south.stop_time_update.add(stop_id="A55S").arrival.time = 1500
+
+    vehicle = message.entity.add(id="3").vehicle
+    vehicle.trip.trip_id = "084600_C..N04R"
+    vehicle.stop_id = "A44N"
+    return message
+
+
+class TestExtractArrivals(unittest.TestCase):
+    """Tests for single-pass arrival extraction."""
+
+    def test_extracts_only_target_stops(self):
+        """Test only target stops with arrival times are emitted."""
+        records = extract_arrivals(make_feed(), ["A44N", "A44S"])
+        self.assertEqual(records, [ArrivalRecord("C", "C..N04R", "A44N", 1100, "A09N", "N", UNDERWAY)])
+
+    def test_trip_flags(self):
+        """Test assignment, delay alerts and future-dated vehicle positions set the flags like nyct_gtfs."""
+        message = make_feed()
+        north = message.entity[0].trip_update.trip
+        north.Extensions[nyct_trip_descriptor].is_assigned = True
+        north.Extensions[nyct_trip_descriptor].train_id = "1C 1446 207/EUC"
+        message.entity[2].vehicle.timestamp = 1000 + 120  # scheduled departure: not underway yet
+        alert = message.entity.add(id="4").alert
+        alert.informed_entity.add().trip.Extensions[nyct_trip_descriptor].train_id = "1C 1446 207/EUC"
+
+        (record,) = extract_arrivals(message, ["A44N"])
+        self.assertEqual(record.flags, ASSIGNED | DELAYED)
+        self.assertEqual(extract_arrivals(message, ["A55S"])[0].flags, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
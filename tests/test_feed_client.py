@@ -0,0 +1,192 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+import httpx
+from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2
+from config import Config
+from train_times.client import FeedClient
+from train_times.resilience import CircuitOpenError
+
+
+def make_feed_bytes(timestamp):
+    """Build a minimal valid GTFS-realtime payload."""
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "1.0"
+    message.header.timestamp = timestamp
+    return message.SerializeToString()
+
+
+class TestFeedClient(unittest.TestCase):
+    """Tests for conditional GETs and parse skipping in FeedClient."""
+
+    def setUp(self):
+        self.responses = []
+        self.seen_headers = []
+
+        def handler(request):
+            self.seen_headers.append(dict(request.headers))
+            return self.responses.pop(0)
+
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.client = FeedClient(MagicMock(), http_client=http_client)
+        self.addCleanup(self.client.close)
+
+    def test_conditional_get_and_not_modified(self):
+        """Test validators are sent back and a 304 skips parsing."""
+        self.responses = [
+            httpx.Response(
+                200,
+                content=make_feed_bytes(1000),
+                headers={"ETag": '"v1"', "Last-Modified": "Sat, 17 Oct 2026 12:00:00 GMT"},
+            ),
+            httpx.Response(304),
+        ]
+
+        feed = self.client.refresh("C")
+        self.assertEqual(feed._feed.header.timestamp, 1000)
+        self.assertNotIn("if-none-match", self.seen_headers[0])
+
+        same_feed = self.client.refresh("C")
+        self.assertIs(same_feed, feed)
+        self.assertEqual(self.seen_headers[1]["if-none-match"], '"v1"')
+        self.assertEqual(self.seen_headers[1]["if-modified-since"], "Sat, 17 Oct 2026 12:00:00 GMT")
+        self.assertEqual(self.client.stats.not_modified, 1)
+        self.assertEqual(self.client.stats.parse_skips, 1)
+        self.assertEqual(self.client.stats.parses, 1)
+
+    def test_identical_payload_skips_parse(self):
+        """Test a byte-identical 200 body is not parsed again."""
+        payload = make_feed_bytes(2000)
+        self.responses = [
+            httpx.Response(200, content=payload),
+            httpx.Response(200, content=payload),
+            httpx.Response(200, content=make_feed_bytes(2030)),
+        ]
+
+        self.client.refresh("A")
+        self.client.refresh("C")  # A and C share the ACE feed
+        feed = self.client.refresh("E")
+
+        self.assertEqual(feed._feed.header.timestamp, 2030)
+        self.assertEqual(self.client.stats.parses, 2)
+        self.assertEqual(self.client.stats.parse_skips, 1)
+        self.assertEqual(self.client.stats.bytes_transferred, 2 * len(payload) + len(make_feed_bytes(2030)))
+
+    def test_refresh_many_dedupes_and_runs_concurrently(self):
+        """Test a shared feed is downloaded once and feeds are fetched in parallel."""
+        requested = []
+
+        async def handler(request):
+            requested.append(str(request.url))
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, content=make_feed_bytes(3000))
+
+        client = FeedClient(
+            MagicMock(), http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        self.addCleanup(client.close)
+
+        start = time.monotonic()
+        feeds = client.refresh_many(["A", "C", "E", "F", "M"])
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(feeds), 2)
+        self.assertEqual(len(requested), 2)
+        self.assertTrue(any(url.endswith("gtfs-ace") for url in requested))
+        self.assertTrue(any(url.endswith("gtfs-bdfm") for url in requested))
+        self.assertLess(elapsed, 0.35)
+
+    def test_refresh_many_keeps_last_payload_on_partial_failure(self):
+        """Test a failing feed falls back to its last payload while others update."""
+        self.responses = [
+            httpx.Response(200, content=make_feed_bytes(100)),
+            httpx.Response(200, content=make_feed_bytes(200)),
+        ]
+        self.client.refresh_many(["C", "F"])
+
+        self.responses = [
+            httpx.Response(500),
+            httpx.Response(200, content=make_feed_bytes(230)),
+        ]
+        feeds = self.client.refresh_many(["C", "F"])
+        self.assertEqual([feed._feed.header.timestamp for feed in feeds], [100, 230])
+
+    def test_error_status_raises(self):
+        """Test non-200 responses raise RuntimeError like NYCTFeed.refresh."""
+        self.responses = [httpx.Response(503, content=b"unavailable")]
+        with self.assertRaises(RuntimeError):
+            self.client.refresh("C")
+
+
+class ResilientConfig(Config):
+    FETCH_DEADLINE = 0.3
+    FETCH_HEDGE_AFTER = 0
+    BREAKER_FAILURES = 2
+    BREAKER_RESET = 60
+
+
+class HedgingConfig(ResilientConfig):
+    FETCH_DEADLINE = 2.0
+    FETCH_HEDGE_AFTER = 0.05
+
+
+class TestFeedClientResilience(unittest.TestCase):
+    """Tests for the fetch deadline, circuit breaker and hedged requests."""
+
+    def make_client(self, config, replies):
+        """FeedClient answering each request with the next (delay, status) in `replies`."""
+        self.requests = 0
+
+        async def handler(request):
+            self.requests += 1
+            number = self.requests
+            delay, status = replies[number - 1]
+            await asyncio.sleep(delay)
+            return httpx.Response(status, content=make_feed_bytes(1000 + number))
+
+        client = FeedClient(
+            MagicMock(), config=config, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def test_deadline_falls_back_to_aged_payload(self):
+        """Test a feed missing the deadline keeps its last payload and reports its age."""
+        client = self.make_client(ResilientConfig, [(0, 200), (5, 200)])
+        client.refresh_many(["C"])
+        time.sleep(0.1)
+
+        start = time.monotonic()
+        (feed,) = client.refresh_many(["C"])
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(feed._feed.header.timestamp, 1001)
+        self.assertGreaterEqual(client.age(["C"]), 0.3)
+
+    def test_breaker_short_circuits_failing_feed(self):
+        """Test consecutive failures open the circuit and stop requests to the feed."""
+        client = self.make_client(ResilientConfig, [(0, 500), (0, 503)])
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                client.refresh("C")
+        with self.assertRaises(CircuitOpenError):
+            client.refresh("C")
+        self.assertEqual(self.requests, 2)
+        self.assertEqual(client.stats.short_circuits, 1)
+        self.assertIsNone(client.age(["C"]))
+
+    def test_slow_request_is_hedged(self):
+        """Test a second request answers for a slow first one and the saving is recorded."""
+        client = self.make_client(HedgingConfig, [(0.5, 200), (0, 200)])
+        start = time.monotonic()
+        feed = client.refresh("C")
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(feed._feed.header.timestamp, 1002)
+        self.assertEqual((client.stats.hedges, client.stats.hedge_wins), (1, 1))
+
+        time.sleep(0.6)  # the losing first request finishes in the background
+        self.assertAlmostEqual(client.stats.hedge_saved, 0.45, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import MagicMock
+from benchmarks.feedserver import FeedServer, SyntheticFeeds
+from config import Config
+from train_times.client import FeedClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1718021700.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFeedServer(unittest.TestCase):
+    """Tests for the local stand-in MTA feed server."""
+
+    def start(self, feeds, **options):
+        server = FeedServer(feeds, port=0, **options).start()
+        self.addCleanup(server.stop)
+
+        class LocalConfig(Config):
+            FEED_BASE_URL = server.url
+            FEED_DECODE = "full"
+            BREAKER_FAILURES = 10
+
+        client = FeedClient(MagicMock(), config=LocalConfig)
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_serves_feeds_at_mta_paths(self):
+        """Test FEED_BASE_URL clients get synthetic feeds, then 304s until the next publish."""
+        clock = FakeClock()
+        server, client = self.start(SyntheticFeeds(30, clock=clock, trips_per_route=5))
+        self.assertTrue(client.feed_urls(["C"])[0].startswith(server.url + "/Dataservice/mtagtfsfeeds/"))
+
+        feed = client.refresh("C")
+        routes = {entity.trip_update.trip.route_id for entity in feed._feed.entity if entity.HasField("trip_update")}
+        self.assertEqual(routes, {"A", "C", "E", "H", "FS"})
+        self.assertEqual(feed._feed.header.timestamp, 1718021700)
+
+        client.refresh("C")
+        clock.now += 30
+        self.assertEqual(client.refresh("C")._feed.header.timestamp, 1718021730)
+        self.assertEqual(server.stats["requests"], 3)
+        self.assertEqual(server.stats["not_modified"], 1)
+
+    def test_payload_size_target(self):
+        """Test a target size is met to within a few percent."""
+        feeds = SyntheticFeeds(30, size=200 * 1024, clock=FakeClock())
+        _, payload, _ = feeds.get("gtfs-bdfm")
+        self.assertAlmostEqual(len(payload) / (200 * 1024), 1, delta=0.1)
+
+    def test_injected_errors(self):
+        """Test the configured error rate fails requests with the configured status."""
+        server, client = self.start(SyntheticFeeds(30, clock=FakeClock(), trips_per_route=2), error_rate=1.0)
+        with self.assertRaisesRegex(RuntimeError, "HTTP 503"):
+            client.refresh("L")
+        self.assertEqual(server.stats["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+from unittest.mock import MagicMock
+from train_times.fetch import display_headsign
+
+
+class TestDisplayHeadsign(unittest.TestCase):
+    """Tests for headsign resolution."""
+
+    def test_falls_back_to_last_stop(self):
+        """Test headsign lookup falls back to the trip's final stop name, cleaned for the font."""
+        static_index = MagicMock()
+        static_index.headsign.return_value = None
+        static_index.stop_name.return_value = '"168 St"'
+
+        self.assertEqual(display_headsign("C..X99R", "A09N", static_index), "168 St")
+        static_index.headsign.assert_called_once_with("C..X99R")
+        static_index.stop_name.assert_called_once_with("A09N")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from PIL import ImageFont
+from config import Config
+from display.atlas import GlyphAtlas
+from display.layout import TextLayout
+
+BLUE = (0, 57, 134)
+WHITE = (255, 255, 255)
+
+
+class TestTextLayout(unittest.TestCase):
+    """Tests for the cached text layout engine."""
+
+    def setUp(self):
+        self.font = ImageFont.truetype(Config.FONT_PATH, Config.FONT_SIZE)
+        self.layout = TextLayout(GlyphAtlas(self.font), 128, "!@#", BLUE, WHITE)
+
+    def test_truncate_matches_font_measurement(self):
+        """Test truncation keeps the longest prefix whose rendered width fits."""
+        text = "! Far Rockaway-Mott Av"
+        for max_width in (0, 5, 40, 97, 500):
+            truncated = self.layout.truncate(text, max_width)
+            self.assertTrue(text.startswith(truncated))
+            self.assertLessEqual(self.font.getlength(truncated), max_width)
+            if truncated != text:
+                self.assertGreater(self.font.getlength(text[: len(truncated) + 1]), max_width)
+
+    def test_layout_runs_and_time_position(self):
+        """Test bullets get their own color run and the time is right-justified."""
+        line = self.layout.layout_line(1, "@", "Euclid Av", "5m")
+        self.assertEqual([run.color for run in line.runs], [WHITE, BLUE, WHITE])
+        self.assertEqual("".join(run.text for run in line.runs), "1. @ Euclid Av")
+        self.assertEqual(line.runs[1].x, self.font.getlength("1. "))
+        self.assertEqual(line.time_x, 128 - self.font.getlength("5m"))
+
+    def test_layout_is_memoized(self):
+        """Test repeated (line, bullet, headsign, time) tuples reuse the finished layout."""
+        first = self.layout.layout_line(2, "!", "Inwood-207 St", "12m")
+        second = self.layout.layout_line(2, "!", "Inwood-207 St", "12m")
+        self.assertIs(first, second)
+        self.assertEqual(self.layout.layout_line.cache_info().hits, 1)
+
+    def test_composed_route_bullet(self):
+        """Test routes without a bullet glyph get a BulletRun as wide as the font's bullets."""
+        layout = TextLayout(self.layout.atlas, 128, "!@#", BLUE, WHITE, route_bullets={"1": (238, 53, 46)})
+        line = layout.layout_line(1, "1", "Van Cortlandt Park-242 St", "4m")
+        prefix = self.font.getlength("1. ")
+        self.assertEqual(line.bullet, (prefix, "1", (238, 53, 46)))
+        self.assertEqual(line.runs[0].text, "1. ")
+        self.assertEqual(line.runs[1].x, prefix + self.font.getlength("!"))
+        self.assertTrue(line.runs[1].text.startswith(" Van"))
+        # Glyph bullets are laid out as before
+        self.assertIsNone(layout.layout_line(1, "@", "Euclid Av", "5m").bullet)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import logging
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from utils.log_handlers import BatchingRotatingFileHandler, RateLimitFilter
+
+
+def make_record(msg, *args, level=logging.INFO, name="train_times.fetch"):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestBatchingRotatingFileHandler(unittest.TestCase):
+    """Tests for batched log writes."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.log_file = Path(tmp.name) / "clock.log"
+
+    def test_writes_in_batches(self):
+        """Test lines reach the file only once a batch is full or a WARNING arrives."""
+        handler = BatchingRotatingFileHandler(self.log_file, capacity=3, flush_interval=3600)
+        self.addCleanup(handler.close)
+
+        handler.handle(make_record("one"))
+        handler.handle(make_record("two"))
+        self.assertEqual(self.log_file.read_text(), "")
+
+        handler.handle(make_record("three"))
+        self.assertEqual(self.log_file.read_text().splitlines(), ["one", "two", "three"])
+
+        handler.handle(make_record("four"))
+        handler.handle(make_record("feed down", level=logging.WARNING))
+        self.assertEqual(self.log_file.read_text().splitlines()[-2:], ["four", "feed down"])
+        self.assertEqual(handler.batches, 2)
+
+    def test_lone_record_written_after_interval(self):
+        """Test a buffered line is written once flush_interval passes, with no record after it."""
+        handler = BatchingRotatingFileHandler(self.log_file, capacity=100, flush_interval=0.05)
+        self.addCleanup(handler.close)
+
+        handler.handle(make_record("only line"))
+        self.assertEqual(self.log_file.read_text(), "")
+
+        deadline = time.monotonic() + 5
+        while not self.log_file.read_text() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.log_file.read_text().splitlines(), ["only line"])
+        self.assertEqual(handler.batches, 1)
+
+    def test_rotation(self):
+        """Test the file rotates when a batch would push it past maxBytes."""
+        handler = BatchingRotatingFileHandler(self.log_file, maxBytes=100, backupCount=2, capacity=5)
+        for i in range(12):
+            handler.handle(make_record("line %02d xxxxxxxxxx", i))
+        handler.close()
+
+        self.assertTrue(Path(f"{self.log_file}.1").exists())
+        self.assertLessEqual(self.log_file.stat().st_size, 100)
+        self.assertIn("line 11", self.log_file.read_text())
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    """Tests for per-template rate limiting."""
+
+    def test_limits_per_template_and_reports_suppressed(self):
+        """Test a template is capped per period and the next one through reports what was dropped."""
+        rate_filter = RateLimitFilter(limit=2, period=60)
+        passed = [rate_filter.filter(make_record("Frame %d rendered", i)) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertEqual(rate_filter.suppressed, 3)
+
+        # Other templates and warnings are unaffected
+        self.assertTrue(rate_filter.filter(make_record("Fetch cycle: %d feeds", 1)))
+        self.assertTrue(rate_filter.filter(make_record("Frame %d rendered", 6, level=logging.WARNING)))
+
+        rate_filter.period = 0
+        record = make_record("Frame %d rendered", 7)
+        self.assertTrue(rate_filter.filter(record))
+        self.assertEqual(record.getMessage(), "Frame 7 rendered [3 similar messages suppressed]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from PIL import ImageFont
+from config import Config
+from display import DisplayManager
+from display.atlas import GlyphAtlas
+from display.marquee import GAP, FramePacer, MarqueeStrip
+from train_times.arrivals import Arrival
+
+
+class MarqueeConfig(Config):
+    DISPLAY_BACKEND = "virtual"
+    VIRTUAL_FRAME_DIR = ""
+    MARQUEE = True
+    MARQUEE_SPEED = 20.0
+    MARQUEE_PAUSE = 1.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMarqueeStrip(unittest.TestCase):
+    """Tests for pre-rendered scrolling strips."""
+
+    def setUp(self):
+        font = ImageFont.truetype(Config.FONT_PATH, Config.FONT_SIZE)
+        atlas = GlyphAtlas(font)
+        self.text_width = atlas.text_width("Far Rockaway-Mott Av")
+        self.strip = MarqueeStrip("Far Rockaway-Mott Av", atlas, 50, 16, (255, 255, 255), 20, 1.0)
+
+    def test_holds_then_scrolls_and_wraps(self):
+        """Test the text holds for the pause, scrolls at speed, then starts over."""
+        self.assertEqual(self.strip.period, self.text_width + GAP)
+        self.assertEqual(self.strip.offset(0.5), 0)
+        self.assertEqual(self.strip.offset(1.5), 10)
+        cycle = 1.0 + self.strip.period / 20
+        self.assertEqual(self.strip.offset(cycle + 0.5), 0)
+        self.assertLess(self.strip.offset(cycle - 0.01), self.strip.period)
+
+    def test_window_is_a_crop(self):
+        """Test every window is the strip width and the repeated text lines up with the start."""
+        window = self.strip.window(1.5)
+        self.assertEqual(window.size, (50, 16))
+        start = self.strip.strip.crop((0, 0, 50, 16))
+        repeat = self.strip.strip.crop((self.strip.period, 0, self.strip.period + 50, 16))
+        self.assertEqual(start.tobytes(), repeat.tobytes())
+
+
+class TestFramePacer(unittest.TestCase):
+    """Tests for deadline-based frame pacing."""
+
+    def test_deadlines_do_not_drift(self):
+        """Test deadlines advance by exactly one period when frames are on time."""
+        clock = FakeClock()
+        pacer = FramePacer(10, clock=clock)
+        self.assertAlmostEqual(pacer.next_deadline(), 100.1)
+        clock.now = 100.15
+        self.assertAlmostEqual(pacer.next_deadline(), 100.2)
+        self.assertEqual(pacer.dropped, 0)
+
+    def test_late_frames_are_dropped(self):
+        """Test falling behind skips the missed frames instead of bursting through them."""
+        clock = FakeClock()
+        pacer = FramePacer(10, clock=clock)
+        clock.now = 100.35
+        self.assertAlmostEqual(pacer.next_deadline(), 100.4)
+        self.assertEqual(pacer.dropped, 3)
+
+
+class TestDisplayMarquee(unittest.TestCase):
+    """Tests for scrolling headsigns on the display."""
+
+    def test_long_headsign_scrolls(self):
+        """Test an overflowing headsign animates between frames while the rest stays put."""
+        display = DisplayManager(MarqueeConfig)
+        display.update_display(
+            (Arrival("C", "S", "A44S", "Euclid Av", 0, 0), 5),
+            (Arrival("A", "S", "A44S", "Far Rockaway-Mott Av", 0, 0), 12),
+            2,
+        )
+        self.assertTrue(display.animating)
+        (strip, x, started), = display._marquees.values()
+        drawn = display.image.copy()
+
+        display.animate(started + 0.5)
+        self.assertEqual(display.image.tobytes(), drawn.tobytes())
+        display.animate(started + 2.0)
+        self.assertNotEqual(display.image.tobytes(), drawn.tobytes())
+        # Line 1 and the arrival time are left as update_display drew them
+        for box in ((0, 0, 128, 16), (x + strip.width, 16, 128, 32)):
+            self.assertEqual(display.image.crop(box).tobytes(), drawn.crop(box).tobytes())
+        self.assertEqual(display.backend.frame_count, 3)
+
+    def test_strip_reused_across_frames(self):
+        """Test redrawing the same headsign keeps its strip and scroll position."""
+        display = DisplayManager(MarqueeConfig)
+        arrival = Arrival("A", "S", "A44S", "Far Rockaway-Mott Av", 0, 0)
+        display.update_display((arrival, 12), None, 2)
+        first = display._marquees[0]
+        display.update_display((arrival, 11), None, 2)
+        self.assertIs(display._marquees[0][0], first[0])
+        self.assertEqual(display._marquees[0][2], first[2])
+
+    def test_short_headsign_is_static(self):
+        """Test headsigns that fit are drawn as before, with nothing to animate."""
+        display = DisplayManager(MarqueeConfig)
+        display.update_display((Arrival("C", "S", "A44S", "Euclid Av", 0, 0), 5), None, 2)
+        self.assertFalse(display.animating)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+import tracemalloc
+import unittest
+from unittest.mock import MagicMock
+from train_times.arrivals import Arrival, decode_arrival
+from train_times.fetch import display_headsign
+from train_times.store import ArrivalStore
+from utils.memory import MemoryReport, deep_sizeof
+
+
+class TestMemory(unittest.TestCase):
+    """Tests for compact arrival storage and the memory report."""
+
+    def test_headsigns_are_shared_across_fetches(self):
+        """Test the same trip gets the same headsign object every fetch, also when decoded again."""
+        static_index = MagicMock()
+        static_index.headsign.return_value = '"168 St"'
+        first = display_headsign("C..N04R", "A09N", static_index)
+        self.assertEqual(first, "168 St")
+        self.assertIs(display_headsign("C..N04R", "A09N", static_index), first)
+        self.assertEqual(static_index.headsign.call_count, 1)
+
+        # e.g. read back from the ring or a snapshot file
+        decoded = decode_arrival(["C", "N", "A44N", "".join(["168 ", "St"]), 100, 0])
+        self.assertIs(decoded.headsign, first)
+
+    def test_deep_sizeof_follows_slots_and_containers(self):
+        """Test nested containers and __slots__ are counted once each."""
+        arrivals = [Arrival("C", "N", "A44N", "168 St", epoch, 0) for epoch in (100, 200)]
+        store = ArrivalStore(arrivals)
+        size = deep_sizeof(store)
+        shallow = sys.getsizeof(store) + sys.getsizeof(store.arrivals) + 2 * sys.getsizeof(arrivals[0])
+        self.assertGreaterEqual(size, shallow)
+        self.assertLess(size, shallow + 1024)
+
+    def test_report_tracks_cycles(self):
+        """Test tracked calls are summarized per cycle and structures are listed."""
+        report = MemoryReport(lambda: {"arrivals": ArrivalStore(), "mapped": 4096})
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        fetch = report.track(lambda: [bytearray(10000) for _ in range(10)])
+        self.assertEqual(len(fetch()), 10)
+        fetch()
+
+        lines = report.report()
+        self.assertTrue(lines[0].startswith("Memory report:"))
+        self.assertTrue(any(line.split() == ["mapped", "4.0", "KiB"] for line in lines))
+        cycle_line = next(line for line in lines if "per fetch cycle (2)" in line)
+        self.assertIn("KiB peak allocated", cycle_line)
+        self.assertFalse(any("per fetch cycle" in line for line in report.report()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import urllib.error
+import urllib.request
+from utils.metrics import MetricsRegistry, MetricsServer
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests for the metrics registry and its Prometheus text endpoint."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_exposition(self):
+        """Test cumulative buckets, sum and count per label set."""
+        histogram = self.registry.histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.01, 0.1))
+        for value in (0.005, 0.01, 0.05, 3.0):
+            histogram.labels("fetch").observe(value)
+
+        text = self.registry.expose()
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{stage="fetch",le="0.01"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="fetch",le="0.1"} 3', text)
+        self.assertIn('stage_seconds_bucket{stage="fetch",le="+Inf"} 4', text)
+        self.assertIn('stage_seconds_sum{stage="fetch"} 3.065', text)
+        self.assertIn('stage_seconds_count{stage="fetch"} 4', text)
+
+    def test_counters_and_gauges(self):
+        """Test counters accumulate and gauge callbacks are read at scrape time."""
+        counter = self.registry.counter("frames_total", "Frames")
+        counter.inc()
+        counter.inc(2)
+        gauge = self.registry.gauge("staleness_seconds", "Staleness")
+        gauge.set_function(lambda: 42.5)
+        never = self.registry.gauge("never_seconds", "Not fetched yet")
+        never.set_function(lambda: None)
+
+        text = self.registry.expose()
+        self.assertIn("frames_total 3", text)
+        self.assertIn("staleness_seconds 42.5", text)
+        self.assertNotIn("\nnever_seconds ", text)
+
+    def test_duplicate_names_rejected(self):
+        """Test a metric name can only be registered once."""
+        self.registry.counter("frames_total", "Frames")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("frames_total", "Frames")
+
+    def test_http_endpoint(self):
+        """Test /metrics serves the registry and other paths 404."""
+        self.registry.counter("frames_total", "Frames").inc()
+        server = MetricsServer("127.0.0.1", 0, registry=self.registry).start()
+        self.addCleanup(server.stop)
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+            self.assertIn("frames_total 1", response.read().decode())
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/", timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
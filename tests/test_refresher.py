@@ -0,0 +1,72 @@
+import threading
+import unittest
+from train_times.refresher import FeedRefresher
+
+
+class TestFeedRefresher(unittest.TestCase):
+    """Tests for the background refresher's snapshot publishing."""
+
+    def test_publishes_versioned_snapshots(self):
+        """Test each successful fetch publishes a new snapshot version."""
+        results = iter([[("C Train Euclid Av 3m", 3)], [("C Train 168 St 5m", 5)]])
+        refresher = FeedRefresher(lambda: next(results), interval=30)
+
+        initial = refresher.latest()
+        self.assertEqual(initial.version, 0)
+        self.assertIsNone(initial.age())
+
+        self.assertEqual(refresher.refresh_once(), 30)
+        self.assertEqual(refresher.latest().version, 1)
+        refresher.refresh_once()
+        snapshot = refresher.latest()
+        self.assertEqual(snapshot.version, 2)
+        self.assertEqual(snapshot.arrivals, [("C Train 168 St 5m", 5)])
+        self.assertGreaterEqual(snapshot.age(), 0)
+
+    def test_failure_keeps_last_good_snapshot(self):
+        """Test a failed fetch keeps serving the previous data and backs off."""
+        calls = {"n": 0}
+
+        def fetch():
+            calls["n"] += 1
+            if calls["n"] > 1:
+                raise RuntimeError("feed down")
+            return [("C Train Euclid Av 3m", 3)]
+
+        refresher = FeedRefresher(fetch, interval=30)
+        refresher.refresh_once()
+        good = refresher.latest()
+
+        self.assertEqual(refresher.refresh_once(), 2)
+        self.assertEqual(refresher.refresh_once(), 4)
+        self.assertIs(refresher.latest(), good)
+
+    def test_wait_for_update_wakes_on_publish(self):
+        """Test readers waiting on a version are woken by a new snapshot."""
+        refresher = FeedRefresher(lambda: [], interval=30)
+        timer = threading.Timer(0.05, refresher.refresh_once)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        snapshot = refresher.wait_for_update(0, timeout=5)
+        self.assertEqual(snapshot.version, 1)
+
+        # No new data: returns the same snapshot after the timeout
+        self.assertIs(refresher.wait_for_update(1, timeout=0.01), snapshot)
+
+    def test_next_interval_and_wake(self):
+        """Test the next fetch is scheduled from the arrivals and can be brought forward."""
+        fetched = threading.Event()
+        refresher = FeedRefresher(lambda: fetched.set() or [], interval=30, next_interval=lambda arrivals: 3600)
+        self.assertEqual(refresher.refresh_once(), 3600)
+
+        refresher.start()
+        self.addCleanup(refresher.stop, 5)
+        self.assertTrue(fetched.wait(5))
+        fetched.clear()
+        refresher.wake()
+        self.assertTrue(fetched.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
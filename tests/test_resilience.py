@@ -0,0 +1,102 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from train_times.resilience import CircuitBreaker, hedged
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def hedge_stats():
+    return SimpleNamespace(hedges=0, hedge_wins=0, hedge_saved=0.0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for opening, cooling down and closing a circuit."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(3, 60, clock=self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens on the threshold failure and a success resets the count."""
+        self.assertFalse(self.breaker.record_failure())
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.record_failure())
+        self.assertFalse(self.breaker.record_failure())
+        self.assertTrue(self.breaker.record_failure())
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_in(), 60)
+
+    def test_single_trial_after_reset_timeout(self):
+        """Test one trial request goes through after the cool-down and decides the state."""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 60
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())  # trial still in flight
+
+        self.assertTrue(self.breaker.record_failure())  # failed trial reopens
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.opens, 2)
+
+        self.clock.now += 60
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.level, 0)
+
+
+class TestHedged(unittest.TestCase):
+    """Tests for racing a second request against a slow first one."""
+
+    def run_hedged(self, latencies, delay=0.05):
+        """Run hedged() over requests taking `latencies` seconds in turn; returns (result, stats)."""
+        stats = hedge_stats()
+        sent = []
+
+        async def send():
+            index = len(sent)
+            sent.append(index)
+            await asyncio.sleep(latencies[index])
+            return index
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            stragglers = set()
+            result = await hedged(send, delay, stats, loop.time() + 5, stragglers)
+            # Let a losing first request finish so its saving is recorded
+            await asyncio.gather(*stragglers)
+            return result
+
+        return asyncio.run(run()), stats
+
+    def test_fast_request_is_not_hedged(self):
+        """Test a request answering within the delay is sent once."""
+        result, stats = self.run_hedged([0.0])
+        self.assertEqual(result, 0)
+        self.assertEqual(stats.hedges, 0)
+
+    def test_hedge_wins_and_saving_is_measured(self):
+        """Test a faster second request answers and the first's extra latency is recorded."""
+        result, stats = self.run_hedged([0.4, 0.0])
+        self.assertEqual(result, 1)
+        self.assertEqual((stats.hedges, stats.hedge_wins), (1, 1))
+        self.assertAlmostEqual(stats.hedge_saved, 0.35, delta=0.05)
+
+    def test_first_request_can_still_win(self):
+        """Test a hedge that answers later than the first request is discarded."""
+        result, stats = self.run_hedged([0.1, 0.4])
+        self.assertEqual(result, 0)
+        self.assertEqual((stats.hedges, stats.hedge_wins), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
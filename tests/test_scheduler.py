@@ -1,24 +1,131 @@
-# NOTE: This test file references a "scheduler" module that doesn't exist in the current codebase.
-# The README mentions a scheduler.py file, but it's not present in the repository.
-# This test file can be safely removed or updated if scheduler functionality is added.
+import datetime
+import unittest
+import pytz
+from utils.scheduler import DisplaySchedule, PollScheduler, get_sun_times, is_time_between, resolve_time
 
-# If you want to add scheduler functionality, you would need to:
-# 1. Create a scheduler.py module with get_sun_times() and is_time_between() functions
-# 2. Integrate it with main.py to control display on/off times
-# 3. Update these tests accordingly
 
-import unittest
+class ScheduleConfig:
+    LATITUDE = 40.682387
+    LONGITUDE = -73.963004
+    TIMEZONE = "America/New_York"
+    BLANK_START = "sunset+30"
+    BLANK_END = "06:00"
+    OVERNIGHT_START = "01:00"
+    OVERNIGHT_END = "05:00"
+    FETCH_INTERVAL = 30
+    POLL_MIN_INTERVAL = 15
+    POLL_PUBLISH_LAG = 2
+    POLL_IDLE_INTERVAL = 300
+
+
+def minutes_of(moment):
+    return moment.hour * 60 + moment.minute
+
+
+class TestSunTimes(unittest.TestCase):
+    """Tests for the NOAA sunrise/sunset calculation."""
+
+    def test_new_york_solstices(self):
+        """Test sun times for Brooklyn match published values within a few minutes."""
+        # Published: 2024-06-20 sunrise 5:25, sunset 20:31 EDT; 2024-12-21 7:17, 16:32 EST
+        sunrise, sunset = get_sun_times(datetime.date(2024, 6, 20), ScheduleConfig)
+        self.assertEqual(sunrise.tzinfo.zone, "America/New_York")
+        self.assertLessEqual(abs(minutes_of(sunrise) - (5 * 60 + 25)), 3)
+        self.assertLessEqual(abs(minutes_of(sunset) - (20 * 60 + 31)), 3)
+
+        sunrise, sunset = get_sun_times(datetime.date(2024, 12, 21), ScheduleConfig)
+        self.assertLessEqual(abs(minutes_of(sunrise) - (7 * 60 + 17)), 3)
+        self.assertLessEqual(abs(minutes_of(sunset) - (16 * 60 + 32)), 3)
+
+    def test_resolve_time(self):
+        """Test schedule settings resolve to times of day."""
+        day = datetime.date(2024, 6, 20)
+        self.assertEqual(resolve_time("06:30", day, ScheduleConfig), datetime.time(6, 30))
+        sunset = minutes_of(resolve_time("sunset", day, ScheduleConfig))
+        self.assertEqual(minutes_of(resolve_time("sunset+30", day, ScheduleConfig)), sunset + 30)
+        self.assertEqual(minutes_of(resolve_time("Sunset - 15", day, ScheduleConfig)), sunset - 15)
+        with self.assertRaises(ValueError):
+            resolve_time("dusk", day, ScheduleConfig)
+
+
+class TestDisplaySchedule(unittest.TestCase):
+    """Tests for time windows and the blanking/overnight schedule."""
+
+    def test_is_time_between(self):
+        """Test plain and past-midnight windows."""
+        self.assertTrue(is_time_between(datetime.time(9), datetime.time(17), datetime.time(12)))
+        self.assertFalse(is_time_between(datetime.time(9), datetime.time(17), datetime.time(17)))
+        self.assertTrue(is_time_between(datetime.time(22), datetime.time(6), datetime.time(23, 30)))
+        self.assertTrue(is_time_between(datetime.time(22), datetime.time(6), datetime.time(5, 59)))
+        self.assertFalse(is_time_between(datetime.time(22), datetime.time(6), datetime.time(12)))
+        self.assertFalse(is_time_between(datetime.time(8), datetime.time(8), datetime.time(8)))
+
+    def test_blank_and_overnight_windows(self):
+        """Test the schedule blanks after sunset and marks the overnight profile."""
+        schedule = DisplaySchedule(ScheduleConfig)
+        tz = pytz.timezone("America/New_York")
+        evening = tz.localize(datetime.datetime(2024, 6, 20, 21, 30))
+        afternoon = tz.localize(datetime.datetime(2024, 6, 20, 15, 0))
+        night = tz.localize(datetime.datetime(2024, 6, 21, 2, 0))
+
+        self.assertTrue(schedule.is_blank(evening))
+        self.assertFalse(schedule.is_blank(afternoon))
+        self.assertTrue(schedule.is_blank(night.timestamp()))
+        self.assertTrue(schedule.is_overnight(night))
+        self.assertFalse(schedule.is_overnight(evening))
+
+    def test_disabled_window(self):
+        """Test an empty setting disables a window."""
+        config = type("NoBlank", (ScheduleConfig,), {"BLANK_START": ""})
+        self.assertFalse(DisplaySchedule(config).is_blank(0))
+
+
+class TestPollScheduler(unittest.TestCase):
+    """Tests for cadence-driven poll delays."""
+
+    URL = "https://example.com/nyct%2Fgtfs-ace"
+
+    def test_polls_after_expected_publish(self):
+        """Test the scheduler learns the publish cadence and polls just after it."""
+        scheduler = PollScheduler(ScheduleConfig)
+        self.assertEqual(scheduler.next_delay(1000), 30)
+
+        scheduler.observe({self.URL: 1000})
+        scheduler.observe({self.URL: 1020})
+        self.assertEqual(scheduler.cadence(self.URL), 20)
+        # Next publish at 1040, fetched 2s later
+        self.assertEqual(scheduler.next_delay(1021), 21)
+
+        # A publish due sooner than POLL_MIN_INTERVAL is skipped for the one after
+        scheduler.observe({self.URL: 1030})
+        self.assertEqual(scheduler.cadence(self.URL), 10)
+        self.assertEqual(scheduler.next_delay(1031), 21)
+
+    def test_backs_off_while_header_unchanged(self):
+        """Test polls back off from POLL_MIN_INTERVAL while the feed header does not advance."""
+
+        class SlowBackoffConfig(ScheduleConfig):
+            FETCH_INTERVAL = 90
 
+        scheduler = PollScheduler(SlowBackoffConfig)
+        scheduler.observe({self.URL: 1000})
+        scheduler.observe({self.URL: 1020})
+        delays = []
+        for _ in range(4):
+            scheduler.observe({self.URL: 1020})
+            delays.append(scheduler.next_delay(1042))
+        self.assertEqual(delays, [15, 30, 60, 90])
 
-class TestScheduler(unittest.TestCase):
-    """
-    Placeholder test suite for scheduler functionality.
-    Currently disabled as scheduler module doesn't exist.
-    """
+        # A late publish only nudges the learned cadence
+        scheduler.observe({self.URL: 1045})
+        self.assertAlmostEqual(scheduler.cadence(self.URL), 21.5)
+        self.assertAlmostEqual(scheduler.next_delay(1046), 22.5)
 
-    def test_placeholder(self):
-        """Placeholder test to prevent test suite from failing."""
-        self.assertTrue(True)
+    def test_idle_profile(self):
+        """Test idle clocks poll at the low-frequency interval."""
+        scheduler = PollScheduler(ScheduleConfig)
+        scheduler.observe({self.URL: 1000})
+        self.assertEqual(scheduler.next_delay(1001, idle=True), 300)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+import httpx
+from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2
+from train_times.arrivals import Arrival
+from train_times.refresher import FeedRefresher
+from train_times.remote import RemoteArrivalClient
+from train_times.server import ArrivalServer, StopIndex, fetch_stop_index
+
+NOW = 1_700_000_000
+ARRIVAL = Arrival("C", "N", "A44N", "168 St", NOW + 300, 0)
+
+
+def make_feed_client():
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "1.0"
+    message.header.timestamp = NOW
+    trip_update = message.entity.add(id="1").trip_update
+    trip_update.trip.trip_id = "084600_C..N04R"
+    trip_update.trip.route_id = "C"
+    for stop_id, arrival in (("A46N", NOW - 60), ("A44N", NOW + 300), ("A42N", NOW + 420)):
+        trip_update.stop_time_update.add(stop_id=stop_id).arrival.time = arrival
+
+    feed = MagicMock()
+    feed._feed = message
+    feed_client = MagicMock()
+    feed_client.refresh_many.return_value = [feed]
+    feed_client.static_index.headsign.return_value = "168 St"
+    feed_client.age.return_value = 0.0
+    return feed_client
+
+
+class TestArrivalServer(unittest.TestCase):
+    """Tests for the aggregation server and its remote client."""
+
+    def setUp(self):
+        self.feed_client = make_feed_client()
+        self.refresher = FeedRefresher(
+            lambda: fetch_stop_index(self.feed_client, now=NOW), interval=30, initial=StopIndex()
+        )
+        self.server = ArrivalServer(self.refresher, "127.0.0.1", 0).start()
+        self.addCleanup(self.server.stop)
+        self.base_url = f"http://127.0.0.1:{self.server.port}"
+
+    def test_indexes_every_upcoming_stop(self):
+        """Test all stops in the feed are indexed and departed trains are dropped."""
+        index = fetch_stop_index(self.feed_client, now=NOW)
+        self.assertEqual(sorted(index.bodies), ["A42N", "A44N"])
+        self.assertEqual(index.bodies["A44N"], f'[["C","N","A44N","168 St",{NOW + 300},0]]')
+
+    def test_remote_client_uses_etags(self):
+        """Test a clock reads its stops from the server and re-polls with a 304."""
+        client = RemoteArrivalClient(self.base_url, ["A44N", "A99S"])
+        self.addCleanup(client.close)
+        with self.assertRaises(RuntimeError):
+            client.fetch_upcoming()  # server has not fetched yet
+
+        self.refresher.refresh_once()
+        store = client.fetch_upcoming()
+        self.assertEqual(store.countdown(30, NOW), [(ARRIVAL, 5)])
+
+        self.refresher.refresh_once()
+        store = client.fetch_upcoming()
+        self.assertEqual(client.stats.not_modified, 1)
+        self.assertEqual(store.countdown(30, NOW), [(ARRIVAL, 5)])
+        # One upstream fetch per refresh, however many clocks poll
+        self.assertEqual(self.feed_client.refresh_many.call_count, 2)
+
+    def test_long_poll_returns_on_change(self):
+        """Test a waiting request is answered when new arrivals are published."""
+        self.refresher.refresh_once()
+        url = f"{self.base_url}/arrivals?stops=A44N"
+        etag = httpx.get(url).headers["ETag"]
+
+        start = time.monotonic()
+        response = httpx.get(url + "&wait=0.2", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+        trip_update = self.feed_client.refresh_many.return_value[0]._feed.entity[0].trip_update
+        trip_update.stop_time_update[1].arrival.time = NOW + 360
+        self.refresher.start()
+        self.addCleanup(self.refresher.stop, 5)
+        response = httpx.get(url + "&wait=5", headers={"If-None-Match": etag}, timeout=10)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["stops"]["A44N"], [["C", "N", "A44N", "168 St", NOW + 360, 0]])
+
+    def test_bad_requests(self):
+        """Test requests without stops or to unknown paths are rejected."""
+        self.assertEqual(httpx.get(f"{self.base_url}/arrivals").status_code, 400)
+        self.assertEqual(httpx.get(f"{self.base_url}/other").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
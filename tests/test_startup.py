@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from utils.metrics import STARTUP_SECONDS, TIME_TO_FIRST_FRAME
+from utils.startup import Deferred, StartupTimer
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+class TestStartup(unittest.TestCase):
+    """Tests for startup timing and background initialization."""
+
+    def test_timer_marks_phases_from_process_start(self):
+        """Test phases are timed from the given start and exported as metrics."""
+        timer = StartupTimer(started=0.0)
+        first = timer.mark("config")
+        timer.mark("first_frame")
+        self.assertEqual([phase for phase, _ in timer.phases], ["config", "first_frame"])
+        self.assertGreater(first, 0)
+        self.assertEqual(STARTUP_SECONDS.labels("config").value, first)
+        self.assertEqual(TIME_TO_FIRST_FRAME._default().value, timer.phases[1][1])
+        self.assertIn("first_frame", timer.report())
+
+    def test_deferred_result_and_error(self):
+        """Test result() returns the value or re-raises the function's exception."""
+        self.assertEqual(Deferred(lambda: 42).start().result(5), 42)
+
+        def fail():
+            raise ValueError("Unknown route Q9")
+
+        deferred = Deferred(fail).start()
+        with self.assertRaises(ValueError):
+            deferred.result(5)
+        self.assertTrue(deferred.done())
+        self.assertIsInstance(deferred.error, ValueError)
+
+    def test_main_defers_feed_client_imports(self):
+        """Test importing the application does not import httpx, nyct_gtfs or protobuf."""
+        code = (
+            "import sys, main; "
+            "print(','.join(m for m in ('httpx', 'nyct_gtfs', 'google.protobuf') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from train_times.static_index import StaticIndex
+
+
+TRIPS_TXT = (
+    "route_id,service_id,trip_id,trip_headsign,direction_id,block_id,shape_id\n"
+    "C,SVC,SVC_000600_C..N04R,168 St,0,,C..N04R\n"
+    "C,SVC,SVC_001600_C..N04R,168 St,0,,C..N04R\n"
+    "C,SVC,SVC_000700_C..S04R,Euclid Av,1,,C..S04R\n"
+)
+
+STOPS_TXT = (
+    "stop_id,stop_code,stop_name,stop_desc,stop_lat,stop_lon,zone_id,stop_url,location_type,parent_station\n"
+    "A44,,Clinton-Washington Avs,,40.683263,-73.965838,,,1,\n"
+    "A44N,,Clinton-Washington Avs,,40.683263,-73.965838,,,0,A44\n"
+    "A44S,,Clinton-Washington Avs,,40.683263,-73.965838,,,0,A44\n"
+)
+
+
+class TestStaticIndex(unittest.TestCase):
+    """Tests for the compiled GTFS static index."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.trips_file = os.path.join(self.tmpdir.name, "trips.txt")
+        self.stops_file = os.path.join(self.tmpdir.name, "stops.txt")
+        self.index_file = os.path.join(self.tmpdir.name, "cache", "gtfs_static.idx")
+        with open(self.trips_file, "w") as f:
+            f.write(TRIPS_TXT)
+        with open(self.stops_file, "w") as f:
+            f.write(STOPS_TXT)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lookups(self):
+        """Test headsign and stop lookups against the compiled index."""
+        index = StaticIndex.load(self.trips_file, self.stops_file, self.index_file)
+        self.addCleanup(index.close)
+
+        self.assertEqual(index.shape_count, 2)
+        self.assertEqual(index.stop_count, 3)
+        self.assertEqual(index.headsign("C..N04R"), "168 St")
+        self.assertEqual(index.headsign("C..S04R"), "Euclid Av")
+        self.assertIsNone(index.headsign("Z..N99R"))
+        self.assertEqual(index.stop_name("A44N"), "Clinton-Washington Avs")
+        self.assertEqual(index.parent_station("A44S"), "A44")
+        self.assertIsNone(index.parent_station("A44"))
+        self.assertIsNone(index.stop("XXX"))
+
+    def test_nyct_gtfs_compatible_adapters(self):
+        """Test the TripShapes/Stations stand-ins raise ValueError like nyct_gtfs."""
+        index = StaticIndex.load(self.trips_file, self.stops_file, self.index_file)
+        self.addCleanup(index.close)
+
+        self.assertEqual(index.trip_shapes.get_headsign_text("C..N04R"), "168 St")
+        self.assertEqual(index.stations.get_station_name("A44"), "Clinton-Washington Avs")
+        with self.assertRaises(ValueError):
+            index.trip_shapes.get_headsign_text("nope")
+        with self.assertRaises(ValueError):
+            index.stations.get_station_name("nope")
+
+    def test_rebuilds_when_sources_change(self):
+        """Test the index is reused while unchanged and rebuilt after an edit."""
+        first = StaticIndex.load(self.trips_file, self.stops_file, self.index_file)
+        first_digest = first.digest
+        first.close()
+        mtime = os.path.getmtime(self.index_file)
+
+        reused = StaticIndex.load(self.trips_file, self.stops_file, self.index_file)
+        self.assertEqual(reused.digest, first_digest)
+        self.assertEqual(os.path.getmtime(self.index_file), mtime)
+        reused.close()
+
+        with open(self.trips_file, "a") as f:
+            f.write("E,SVC,SVC_000800_E..N55R,Jamaica Center,0,,E..N55R\n")
+
+        rebuilt = StaticIndex.load(self.trips_file, self.stops_file, self.index_file)
+        self.addCleanup(rebuilt.close)
+        self.assertNotEqual(rebuilt.digest, first_digest)
+        self.assertEqual(rebuilt.headsign("E..N55R"), "Jamaica Center")
+
+
+if __name__ == "__main__":
+    unittest.main()
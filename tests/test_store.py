@@ -0,0 +1,112 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from train_times.arrivals import Arrival
+from train_times.extract import ASSIGNED
+from train_times.store import ArrivalStore, SnapshotFile
+
+FETCHED = 1_700_000_000
+NORTH = Arrival("C", "N", "A44N", "168 St", FETCHED + 400, 0)
+SOUTH = Arrival("A", "S", "A44S", "Far Rockaway", FETCHED + 90, ASSIGNED)
+
+
+class TestArrivalStore(unittest.TestCase):
+    """Tests for counting arrivals down locally between fetches."""
+
+    def setUp(self):
+        self.store = ArrivalStore(
+            [NORTH, SOUTH],
+            fetched_epoch=FETCHED,
+            fetched_at=1000.0,
+        )
+
+    def test_counts_down_from_monotonic_clock(self):
+        """Test minutes-away follow the monotonic time elapsed since the fetch."""
+        now = self.store.now(monotonic_now=1000.0)
+        self.assertEqual(
+            self.store.countdown(30, now),
+            [(SOUTH, 1), (NORTH, 6)],
+        )
+        now = self.store.now(monotonic_now=1000.0 + 120)
+        self.assertEqual(self.store.countdown(30, now), [(NORTH, 4)])
+
+    def test_departed_and_distant_trains_excluded(self):
+        """Test trains that have passed drop out and far ones count down into the window."""
+        self.assertEqual(self.store.countdown(5, FETCHED), [(SOUTH, 1)])
+        self.assertEqual(self.store.countdown(5, FETCHED + 100), [(NORTH, 5)])
+        self.assertEqual(self.store.countdown(30, FETCHED + 401), [])
+
+    def test_minute_buckets_and_window_edges(self):
+        """Test floor-minute bucketing and the 0..max_minutes window edges."""
+        now = FETCHED
+        offsets = (30 * 60 + 59, -1, 0, 31 * 60, 59, 5 * 60 + 30)
+        store = ArrivalStore([NORTH._replace(arrival=now + offset) for offset in offsets], fetched_epoch=now)
+        countdown = store.countdown(30, now)
+        self.assertEqual([minutes for _, minutes in countdown], [0, 0, 5, 30])
+        self.assertEqual([arrival.arrival - now for arrival, _ in countdown], [0, 59, 330, 30 * 60 + 59])
+
+    def test_dst_transition_uses_elapsed_seconds(self):
+        """Test minutes away across the 2024-11-03 fall-back hour is real elapsed time."""
+        before_fall_back = 1730611800  # 2024-11-03 01:30 EDT
+        after_fall_back = before_fall_back + 60 * 60  # 01:30 EST, one hour later
+        store = ArrivalStore([NORTH._replace(arrival=after_fall_back)], fetched_epoch=before_fall_back)
+        self.assertEqual(store.countdown(90, before_fall_back), [(store.arrivals[0], 60)])
+
+    def test_staleness(self):
+        """Test the store flags data older than the threshold."""
+        self.assertAlmostEqual(self.store.age(monotonic_now=1030.0), 30.0)
+        self.assertFalse(self.store.is_stale(90, monotonic_now=1090.0))
+        self.assertTrue(self.store.is_stale(90, monotonic_now=1091.0))
+
+        empty = ArrivalStore()
+        self.assertEqual(len(empty), 0)
+        self.assertIsNone(empty.age())
+        self.assertFalse(empty.is_stale(90))
+        self.assertEqual(empty.countdown(30), [])
+
+
+class TestSnapshotFile(unittest.TestCase):
+    """Tests for persisting the last arrivals across restarts."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "cache" / "last_arrivals.json"
+        self.store = ArrivalStore(
+            [NORTH, SOUTH], fetched_epoch=FETCHED
+        )
+
+    def test_round_trip_counts_down_to_now(self):
+        """Test a loaded snapshot is aged by the time since its fetch."""
+        self.assertTrue(SnapshotFile(self.path).save(self.store))
+        loaded = SnapshotFile(self.path).load(now=FETCHED + 120)
+        self.assertAlmostEqual(loaded.age(), 120, delta=1)
+        self.assertTrue(loaded.is_stale(90))
+        self.assertEqual(loaded.countdown(30, FETCHED + 120), [(NORTH, 4)])
+        self.assertIs(loaded.arrivals[1].headsign, sys.intern(NORTH.headsign))
+
+    def test_saves_are_rate_limited(self):
+        """Test saves within min_interval are skipped unless forced, and empty stores never saved."""
+        snapshot_file = SnapshotFile(self.path, min_interval=300)
+        self.assertFalse(snapshot_file.save(ArrivalStore()))
+        self.assertTrue(snapshot_file.save(self.store))
+        self.assertFalse(snapshot_file.save(self.store, force=True))  # already on disk
+        newer = ArrivalStore([NORTH], fetched_epoch=FETCHED + 30)
+        self.assertFalse(snapshot_file.save(newer))
+        self.assertTrue(snapshot_file.save(newer, force=True))
+        self.assertEqual(len(SnapshotFile(self.path).load()), 1)
+
+    def test_missing_or_corrupt_file(self):
+        """Test an absent or unreadable snapshot loads as None."""
+        self.assertIsNone(SnapshotFile(self.path).load())
+        self.path.parent.mkdir(parents=True)
+        self.path.write_text('{"fetched_epoch": 17')
+        self.assertIsNone(SnapshotFile(self.path).load())
+        # Snapshots from before typed arrivals held bare labels
+        self.path.write_text(f'{{"fetched_epoch": {FETCHED}, "arrivals": [["C Train 168 St", {FETCHED + 400}]]}}')
+        self.assertIsNone(SnapshotFile(self.path).load())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from nyct_gtfs.compiled_gtfs import gtfs_realtime_pb2, nyct_subway_pb2
+from benchmarks.make_fixtures import fixture_paths
+from train_times.extract import extract_arrivals
+from train_times.wire import decode_selected
+
+STOPS = ["A44N", "A44S"]
+
+
+def make_payload():
+    """A feed with matching and non-matching trips, and vehicles and alerts for trips of both kinds."""
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "1.0"
+    message.header.timestamp = 1000
+    trips = (
+        ("1", "C", "084600_C..S04R", "0C 1408 207/EUC", ["A42S", "A44S"]),
+        ("2", "A", "085000_A..N55R", "0A 1410 FAR/207", ["A46N", "A45N"]),
+        ("3", "A", "085200_A..S55R", "0A 1412 207/FAR", ["A44S", "A46S"]),
+    )
+    for entity_id, route_id, trip_id, train_id, stop_ids in trips:
+        trip_update = message.entity.add(id=entity_id).trip_update
+        trip_update.trip.trip_id = trip_id
+        trip_update.trip.route_id = route_id
+        trip_update.trip.Extensions[nyct_subway_pb2.nyct_trip_descriptor].train_id = train_id
+        for offset, stop_id in enumerate(stop_ids):
+            trip_update.stop_time_update.add(stop_id=stop_id).arrival.time = 1000 + 60 * offset
+    for entity_id, trip_id in (("4", "084600_C..S04R"), ("5", "085000_A..N55R")):
+        vehicle = message.entity.add(id=entity_id).vehicle
+        vehicle.trip.trip_id = trip_id
+        vehicle.stop_id = "A44S"
+    for entity_id, train_id in (("6", "0A 1410 FAR/207"), ("7", "0A 1412 207/FAR")):
+        informed = message.entity.add(id=entity_id).alert.informed_entity.add()
+        informed.trip.Extensions[nyct_subway_pb2.nyct_trip_descriptor].train_id = train_id
+    return message.SerializeToString()
+
+
+class TestSelectiveDecode(unittest.TestCase):
+    """Tests for wire-level entity selection."""
+
+    def test_keeps_only_trips_at_target_stops(self):
+        """Test non-matching trips, vehicles and alerts are not decoded by default."""
+        message = decode_selected(make_payload(), STOPS)
+        self.assertEqual([entity.id for entity in message.entity], ["1", "3"])
+        self.assertEqual(message.header.timestamp, 1000)
+        descriptor = message.entity[0].trip_update.trip.Extensions[nyct_subway_pb2.nyct_trip_descriptor]
+        self.assertEqual(descriptor.train_id, "0C 1408 207/EUC")
+
+    def test_route_filter(self):
+        """Test trips must also mention one of the routes when routes are given."""
+        message = decode_selected(make_payload(), STOPS, routes=["C"])
+        self.assertEqual([entity.id for entity in message.entity], ["1"])
+
+    def test_vehicles_and_alerts_on_request(self):
+        """Test only the vehicles and alerts of kept trips are kept, and only when asked for."""
+        message = decode_selected(make_payload(), STOPS, include_vehicles=True, include_alerts=True)
+        self.assertEqual([entity.id for entity in message.entity], ["1", "3", "4", "7"])
+        message = decode_selected(make_payload(), STOPS, include_alerts=True)
+        self.assertEqual([entity.id for entity in message.entity], ["1", "3", "7"])
+
+    def test_matches_full_decode_on_fixtures(self):
+        """Test extraction (trip flags included) from the selective decode equals extraction from a full parse."""
+        stops = ["A41N", "A41S", "A44N", "A44S", "A46N", "A46S"]
+        for name, path in fixture_paths().items():
+            payload = path.read_bytes()
+            full = gtfs_realtime_pb2.FeedMessage.FromString(payload)
+            with self.subTest(fixture=name):
+                selected = decode_selected(payload, stops, include_vehicles=True, include_alerts=True)
+                self.assertEqual(extract_arrivals(selected, stops), extract_arrivals(full, stops))
+
+
+if __name__ == "__main__":
+    unittest.main()
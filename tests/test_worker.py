@@ -0,0 +1,99 @@
+import time
+import unittest
+from train_times.arrivals import Arrival
+from train_times.extract import DELAYED
+from train_times.ring import SnapshotRing
+from train_times.store import ArrivalStore
+from train_times.worker import WorkerRefresher
+
+FETCHED = 1_700_000_000
+
+
+def arrival(epoch, route_id="C", headsign="168 St", direction="N", flags=0):
+    return Arrival(route_id, direction, "A44" + (direction or "N"), headsign, epoch, flags)
+
+
+class WorkerConfig:
+    FETCH_INTERVAL = 30
+    WORKER_TIMEOUT = 0.5
+
+
+def hanging_worker(ring_name, log_queue, record_dir):
+    """Publish one snapshot, then stop making progress."""
+    ring = SnapshotRing.attach(ring_name)
+    ring.set_deadline(time.monotonic() + WorkerConfig.WORKER_TIMEOUT)
+    ring.publish(ArrivalStore([arrival(FETCHED + 300)], fetched_epoch=FETCHED))
+    time.sleep(3600)
+
+
+class TestSnapshotRing(unittest.TestCase):
+    """Tests for the shared-memory snapshot ring."""
+
+    def test_publish_and_read_across_attachments(self):
+        """Test a reader sees the newest snapshot, intact, after the ring wraps."""
+        ring = SnapshotRing.create(slots=2, slot_size=512)
+        self.addCleanup(ring.close)
+        reader = SnapshotRing.attach(ring.name)
+        self.addCleanup(reader.close)
+        self.assertEqual(reader.read(), (0, None))
+
+        for minutes in (3, 4, 5):
+            store = ArrivalStore(
+                [arrival(FETCHED + minutes * 60), arrival(FETCHED + 900, "A", "Inwood-207 St", None, DELAYED)],
+                fetched_epoch=FETCHED,
+                fetched_at=100.0,
+            )
+            ring.publish(store)
+        sequence, store = reader.read()
+        self.assertEqual(sequence, 3)
+        self.assertEqual(
+            store.countdown(30, FETCHED),
+            [(arrival(FETCHED + 300), 5), (arrival(FETCHED + 900, "A", "Inwood-207 St", None, DELAYED), 15)],
+        )
+        self.assertEqual((store.fetched_epoch, store.fetched_at), (FETCHED, 100.0))
+
+    def test_oversized_snapshot_keeps_nearest_arrivals(self):
+        """Test a snapshot larger than a slot drops the furthest arrivals."""
+        ring = SnapshotRing.create(slots=2, slot_size=128)
+        self.addCleanup(ring.close)
+        ring.publish(ArrivalStore([arrival(FETCHED + i * 60) for i in range(20)], fetched_epoch=FETCHED))
+        _, store = ring.read()
+        self.assertLess(len(store), 20)
+        self.assertEqual(store.countdown(0, FETCHED), [(arrival(FETCHED), 0)])
+
+    def test_wake_flag(self):
+        """Test the wake flag is taken once."""
+        ring = SnapshotRing.create(slots=2, slot_size=128)
+        self.addCleanup(ring.close)
+        self.assertFalse(ring.take_wake())
+        ring.request_wake()
+        self.assertTrue(ring.take_wake())
+        self.assertFalse(ring.take_wake())
+
+
+class TestWorkerRefresher(unittest.TestCase):
+    """Tests for the supervised fetch worker."""
+
+    def test_watchdog_restarts_wedged_worker_keeping_snapshot(self):
+        """Test a worker that stops heart-beating is restarted while its data stays visible."""
+        refresher = WorkerRefresher(WorkerConfig, target=hanging_worker).start()
+        self.addCleanup(refresher.stop, 5)
+
+        snapshot = refresher.wait_for_update(0, timeout=30)
+        self.assertEqual(snapshot.version, 1)
+
+        deadline = time.monotonic() + 30
+        while refresher.restarts == 0 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self.assertGreaterEqual(refresher.restarts, 1)
+        latest = refresher.latest()
+        self.assertGreaterEqual(latest.version, 1)
+        self.assertEqual(latest.arrivals.countdown(30, FETCHED), [(arrival(FETCHED + 300), 5)])
+
+        # Once stopped (the ring is freed), readers such as a late metrics scrape still get the last snapshot
+        refresher.stop(5)
+        self.assertEqual(refresher.latest().version, latest.version)
+
+
+if __name__ == "__main__":
+    unittest.main()
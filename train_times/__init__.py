@@ -1,4 +1,36 @@
-"""Train times fetching module."""
-from .fetch import fetch_train_times
+"""
+Train times fetching module.
 
-__all__ = ["fetch_train_times"]
+Exports are imported on first use (PEP 562), so `from train_times import
+ArrivalStore` does not pull in httpx, nyct_gtfs and the protobuf modules;
+only the names that need them (FeedClient, fetch_*) do.
+"""
+import importlib
+
+_EXPORTS = {
+    "fetch_arrivals": ".fetch",
+    "fetch_train_times": ".fetch",
+    "fetch_upcoming": ".fetch",
+    "ArrivalBatch": ".arrivals",
+    "ArrivalSnapshot": ".refresher",
+    "ArrivalStore": ".store",
+    "FeedClient": ".client",
+    "FeedRefresher": ".refresher",
+    "SnapshotFile": ".store",
+    "StaticIndex": ".static_index",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
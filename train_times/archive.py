@@ -0,0 +1,151 @@
+"""
+Append-only archive of raw GTFS-realtime payloads.
+
+FeedRecorder writes every feed response body, with its URL and fetch time, to
+gzip-compressed segment files in a directory, rotating to a new segment once
+the current one reaches a size limit and optionally pruning the oldest ones:
+
+    feeds-20240610-081500.rec.gz
+    feeds-20240610-101212.rec.gz
+    ...
+
+A segment starts with the magic b"NYCFREC1", followed by length-prefixed
+records:
+
+    <d fetched_at (POSIX seconds)> <I url length> <I payload length> url payload
+
+Each record is flushed as its own gzip sync point, so a crash loses at most
+the record being written and read_archive() stops cleanly at a torn tail.
+"""
+import gzip
+import logging
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NYCFREC1"
+RECORD_HEADER = struct.Struct("<dII")
+SEGMENT_GLOB = "feeds-*.rec.gz"
+
+ArchiveRecord = namedtuple("ArchiveRecord", ["fetched_at", "url", "payload"])
+
+
+class FeedRecorder:
+    """Appends raw feed payloads to rotating compressed archive segments."""
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, max_files=0):
+        """
+        Args:
+            directory: Directory holding the archive segments (created if missing)
+            max_bytes: Start a new segment once the current one is this large (compressed)
+            max_files: Keep at most this many segments, deleting the oldest (0 = keep all)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.records = 0
+        self._lock = threading.Lock()
+        self._path = None
+        self._file = None
+
+    def _open_segment(self, now):
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        path = self.directory / f"feeds-{stamp}.rec.gz"
+        suffix = 1
+        while path.exists():
+            path = self.directory / f"feeds-{stamp}_{suffix:03d}.rec.gz"
+            suffix += 1
+        self._path = path
+        self._file = gzip.open(path, "wb")
+        self._file.write(MAGIC)
+        logger.info(f"Recording feed payloads to {path}")
+        self._prune()
+
+    def _prune(self):
+        if not self.max_files:
+            return
+        for old in archive_files([self.directory])[: -self.max_files]:
+            logger.info(f"Removing old feed archive {old}")
+            old.unlink()
+
+    def record(self, url, payload, fetched_at=None):
+        """Append one response body to the archive."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        url_bytes = url.encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._open_segment(fetched_at)
+            self._file.write(RECORD_HEADER.pack(fetched_at, len(url_bytes), len(payload)))
+            self._file.write(url_bytes)
+            self._file.write(payload)
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+            self.records += 1
+            if self._path.stat().st_size >= self.max_bytes:
+                self._file.close()
+                self._file = None
+
+    def close(self):
+        """Finish the current segment."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def archive_files(paths):
+    """
+    Expand archive paths into segment files in recording order.
+
+    Args:
+        paths: Iterable of segment files and/or directories of segments
+
+    Returns:
+        list: Path objects, directories expanded and sorted by name (i.e. by start time)
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob(SEGMENT_GLOB)))
+        else:
+            files.append(path)
+    return files
+
+
+def read_archive(paths):
+    """
+    Iterate over the records of one or more archive segments, in order.
+
+    A segment whose last record was cut short (e.g. by a power loss while
+    recording) yields every complete record and then moves on.
+
+    Args:
+        paths: Iterable of segment files and/or directories of segments
+
+    Yields:
+        ArchiveRecord
+    """
+    for path in archive_files(paths):
+        with gzip.open(path, "rb") as f:
+            try:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"Not a feed archive: {path}")
+                while True:
+                    header = f.read(RECORD_HEADER.size)
+                    if not header:
+                        break
+                    if len(header) < RECORD_HEADER.size:
+                        raise EOFError("truncated record header")
+                    fetched_at, url_length, payload_length = RECORD_HEADER.unpack(header)
+                    url = f.read(url_length)
+                    payload = f.read(payload_length)
+                    if len(url) < url_length or len(payload) < payload_length:
+                        raise EOFError("truncated record body")
+                    yield ArchiveRecord(fetched_at, url.decode("utf-8"), payload)
+            except (EOFError, zlib.error) as e:
+                logger.warning(f"Feed archive {path} ends with an incomplete record: {e}")
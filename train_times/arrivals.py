@@ -0,0 +1,71 @@
+"""
+Epoch-based arrival batches, and the Arrival record the display works from.
+
+Arrival times stay as integer POSIX seconds from extraction to display: no
+per-row datetime/pytz objects, and no timezone math at all (minutes-away is
+timezone independent, which also makes it correct across DST transitions).
+Epochs are kept sorted in an array, so dropping the trains that have
+already left is a bisect and a slice (ArrivalStore.countdown selects the
+MAX_MINUTES_AWAY window from its own sorted epochs the same way).
+
+Arrivals cross process and network boundaries (the worker ring, the
+snapshot file, the aggregation server) as their plain field values, in
+field order; decode_arrival() rebuilds them on the other side.
+"""
+import sys
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+Arrival = namedtuple("Arrival", ["route_id", "direction", "stop_id", "headsign", "arrival", "flags"])
+Arrival.__doc__ = """
+One upcoming train at one stop, as stored, shared and displayed.
+
+Fields:
+    route_id: GTFS route id (e.g. "C")
+    direction: "N", "S" or None
+    stop_id: Stop id (e.g. "A44S")
+    headsign: Display headsign (e.g. "Euclid Av"); the same string object for
+        every arrival of a trip pattern, so layouts can be memoized on it
+    arrival: Predicted arrival as POSIX epoch seconds
+    flags: train_times.extract ASSIGNED | UNDERWAY | DELAYED bits
+"""
+
+
+def decode_arrival(fields):
+    """
+    Rebuild an Arrival from its field values (e.g. a JSON row), interning its strings.
+
+    Raises:
+        ValueError, TypeError: if `fields` is not an Arrival's field values
+    """
+    route_id, direction, stop_id, headsign, arrival, flags = fields
+    return Arrival(
+        sys.intern(route_id),
+        None if direction is None else sys.intern(direction),
+        sys.intern(stop_id),
+        sys.intern(headsign),
+        int(arrival),
+        int(flags),
+    )
+
+
+class ArrivalBatch:
+    """Arrival records sorted by arrival epoch, with the epochs in a parallel int64 array."""
+
+    __slots__ = ("epochs", "records")
+
+    def __init__(self, records=()):
+        """
+        Args:
+            records: Iterable of ArrivalRecord (from extract_arrivals), in any order
+        """
+        self.records = sorted(records, key=lambda record: record.arrival)
+        self.epochs = array("q", [record.arrival for record in self.records])
+
+    def __len__(self):
+        return len(self.records)
+
+    def upcoming(self, now):
+        """Records arriving at or after `now` (POSIX seconds), sorted by arrival."""
+        return self.records[bisect_left(self.epochs, now) :]
@@ -0,0 +1,363 @@
+"""
+Long-lived GTFS-realtime feed client.
+
+Replaces NYCTFeed.refresh's one-off requests.get with a pooled keep-alive
+httpx client, explicit connect/read timeouts and conditional GETs. Unchanged
+feeds (304 or byte-identical bodies) skip protobuf parsing entirely.
+
+Routes are deduplicated by feed URL (NYCTFeed._train_to_url) and every
+distinct feed is fetched concurrently over one shared httpx.AsyncClient, so
+a refresh takes as long as the slowest feed rather than the sum of them.
+
+A refresh is bounded by one FETCH_DEADLINE for all its feeds. A feed that
+misses it, fails, or whose circuit breaker is open keeps its last decoded
+payload, and FeedClient.age() reports how old that makes the data.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+import httpx
+from nyct_gtfs import NYCTFeed
+from config import Config
+from utils.metrics import CIRCUIT_STATE, FETCH_FAILURES, PARSE_SKIPS, SHORT_CIRCUITS, time_stage
+from .resilience import CircuitBreaker, CircuitOpenError, hedged
+from .stats import FeedClientStats
+from .wire import load_payload
+
+logger = logging.getLogger(__name__)
+
+
+class _FeedState:
+    """Per-URL cache validators, circuit breaker and the NYCTFeed holding the last parsed payload."""
+
+    def __init__(self, feed, config):
+        self.feed = feed
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+        # time.monotonic() of the last response that confirmed the loaded payload is current
+        self.refreshed_at = None
+        self.breaker = CircuitBreaker(config.BREAKER_FAILURES, config.BREAKER_RESET)
+        CIRCUIT_STATE.labels(self.name).set_function(lambda: self.breaker.level)
+
+    @property
+    def url(self):
+        return self.feed._feed_url
+
+    @property
+    def name(self):
+        """Short feed name for logs and metrics, e.g. "nyct/gtfs-ace"."""
+        return unquote(self.url.rsplit("/", 1)[-1])
+
+    @property
+    def loaded(self):
+        return self.feed._feed is not None
+
+
+class FeedClient:
+    """
+    Fetches NYCT feeds over a persistent connection pool.
+
+    One NYCTFeed is kept per feed URL and re-used across refreshes, so routes
+    that share a feed (e.g. A/C/E) share its validators and parsed payload and
+    the feed is downloaded once per refresh.
+
+    The async client is driven by a private event loop in its own thread,
+    where hedged requests that lost their race finish in the background. A
+    FeedClient must only be refreshed from one thread at a time (the
+    background refresher).
+    """
+
+    def __init__(self, static_index, config=None, http_client=None, recorder=None):
+        """
+        Args:
+            static_index: StaticIndex attached to every NYCTFeed this client creates
+            config: Config object (defaults to global Config if not provided)
+            http_client: Optional pre-built httpx.AsyncClient (mainly for tests)
+            recorder: Optional FeedRecorder archiving every 200 response body
+        """
+        self.config = config or Config
+        self.static_index = static_index
+        self.recorder = recorder
+        self.stats = FeedClientStats()
+        self._states = {}
+        self._route_states = {}
+        self._stragglers = set()
+        self._loop = None
+        self._thread = None
+
+        self._client = http_client or httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                self.config.FEED_READ_TIMEOUT, connect=self.config.FEED_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=8,
+                max_keepalive_connections=8,
+                keepalive_expiry=self.config.FEED_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def close(self):
+        """Close pooled connections and stop the private event loop."""
+        self._run(self._aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    async def _aclose(self):
+        stragglers = list(self._stragglers)
+        for task in stragglers:
+            task.cancel()
+        await asyncio.gather(*stragglers, return_exceptions=True)
+        await self._client.aclose()
+
+    def _get_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="feed-client", daemon=True)
+            self._thread.start()
+        return self._loop
+
+    def _run(self, coroutine):
+        """Run `coroutine` on the client's event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop()).result()
+
+    async def _trace(self, event_name, info):
+        # httpcore trace hook: fires once per newly opened connection
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.handshakes += 1
+
+    def _state_for(self, route):
+        state = self._route_states.get(route)
+        if state is None:
+            # Passing the index as trips_txt/stops_txt makes nyct_gtfs skip its CSV parse
+            feed = NYCTFeed(
+                route,
+                fetch_immediately=False,
+                trips_txt=self.static_index,
+                stops_txt=self.static_index,
+            )
+            if self.config.FEED_BASE_URL:
+                # Same path on another host (a local stand-in server)
+                feed._feed_url = self.config.FEED_BASE_URL.rstrip("/") + urlsplit(feed._feed_url).path
+            url = feed._feed_url
+            if url not in self._states:
+                self.static_index.attach(feed)
+                self._states[url] = _FeedState(feed, self.config)
+            state = self._route_states[route] = self._states[url]
+        return state
+
+    def feed_urls(self, routes):
+        """Return the distinct feed URLs serving `routes`, in first-seen order."""
+        urls = []
+        for route in routes:
+            url = self._state_for(route).url
+            if url not in urls:
+                urls.append(url)
+        return urls
+
+    def generated_times(self):
+        """
+        Header timestamps of the loaded feeds.
+
+        Returns:
+            dict: feed URL -> POSIX time the MTA generated the loaded payload (the value
+            behind NYCTFeed.last_generated, without its naive local datetime)
+        """
+        return {url: state.feed._feed.header.timestamp for url, state in self._states.items() if state.loaded}
+
+    def age(self, routes, now=None):
+        """
+        Age of the data loaded for `routes`.
+
+        Args:
+            routes: Subway line identifiers (e.g. ["A", "C", "F"])
+            now: time.monotonic() to measure against (defaults to now)
+
+        Returns:
+            float: seconds since the least recently confirmed feed serving `routes` was last
+            fetched successfully (0 right after a refresh in which every feed answered), or
+            None if none of them has been loaded
+        """
+        now = time.monotonic() if now is None else now
+        refreshed = [
+            state.refreshed_at
+            for state in {self._state_for(route) for route in routes}
+            if state.refreshed_at is not None
+        ]
+        return now - min(refreshed) if refreshed else None
+
+    async def _get(self, url, headers, deadline):
+        def send():
+            return self._client.get(url, headers=headers, extensions={"trace": self._trace})
+
+        if not self.config.FETCH_HEDGE_AFTER:
+            return await send()
+        return await hedged(send, self.config.FETCH_HEDGE_AFTER, self.stats, deadline, self._stragglers)
+
+    async def _refresh_state(self, state, deadline=None):
+        """
+        Refresh one feed through its circuit breaker, within `deadline` (event loop time).
+
+        Raises:
+            CircuitOpenError without sending a request while the feed's circuit is open
+            TimeoutError if the feed has not been fetched and parsed by the deadline
+        """
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + self.config.FETCH_DEADLINE
+        breaker = state.breaker
+        if not breaker.allow():
+            self.stats.short_circuits += 1
+            SHORT_CIRCUITS.inc()
+            raise CircuitOpenError(f"circuit open for {state.name}, next request in {breaker.retry_in():.0f}s")
+
+        try:
+            try:
+                feed = await asyncio.wait_for(self._fetch_state(state, deadline), deadline - loop.time())
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"no answer within the {self.config.FETCH_DEADLINE:g}s fetch deadline") from None
+        except (Exception, asyncio.CancelledError):
+            if breaker.record_failure():
+                logger.error(
+                    "Circuit opened for %s after %d failed refreshes in a row; next request in %gs",
+                    state.name,
+                    breaker.failures,
+                    breaker.reset_timeout,
+                )
+            raise
+
+        if breaker.state != breaker.CLOSED:
+            logger.info("Circuit closed for %s, feed answering again", state.name)
+        breaker.record_success()
+        state.refreshed_at = time.monotonic()
+        return feed
+
+    async def _fetch_state(self, state, deadline):
+        headers = {}
+        if state.loaded:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+
+        with time_stage("fetch"):
+            response = await self._get(state.url, headers, deadline)
+        self.stats.requests += 1
+        # num_bytes_downloaded is the on-the-wire (possibly compressed) body size
+        self.stats.bytes_transferred += response.num_bytes_downloaded or len(response.content)
+
+        if response.status_code == 304 and state.loaded:
+            self.stats.not_modified += 1
+            self.stats.parse_skips += 1
+            PARSE_SKIPS.inc()
+            logger.debug("Feed not modified (304), skipping parse: %s", state.url)
+            return state.feed
+
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Error accessing MTA data feed: HTTP {response.status_code} {response.content[:200]!r}"
+            )
+
+        if self.recorder is not None:
+            self.recorder.record(state.url, response.content)
+
+        state.etag = response.headers.get("ETag")
+        state.last_modified = response.headers.get("Last-Modified")
+
+        digest = hashlib.blake2b(response.content, digest_size=16).digest()
+        if digest == state.digest and state.loaded:
+            self.stats.parse_skips += 1
+            PARSE_SKIPS.inc()
+            logger.debug("Feed payload unchanged, skipping parse: %s", state.url)
+            return state.feed
+
+        # Same as NYCTFeed.refresh_async, but over the shared pooled client and
+        # decoding only the entities that can matter for STOP_IDS
+        with time_stage("parse"):
+            load_payload(state.feed, response.content, self.config)
+        state.digest = digest
+        self.stats.parses += 1
+        return state.feed
+
+    async def refresh_many_async(self, routes):
+        """
+        Concurrently refresh every distinct feed serving `routes`.
+
+        Every feed must answer within one FETCH_DEADLINE. A feed that fails,
+        misses the deadline or is short-circuited by its breaker keeps its
+        previously loaded payload (if any) so the other feeds' data is still
+        usable; the call only fails when no feed has any data.
+
+        Args:
+            routes: Iterable of subway line identifiers (e.g. ["A", "C", "F"]) or feed URLs
+
+        Returns:
+            list: one NYCTFeed per distinct feed URL that has data loaded
+
+        Raises:
+            The first fetch error if no feed has data to return
+        """
+        states = []
+        for route in routes:
+            state = self._state_for(route)
+            if state not in states:
+                states.append(state)
+
+        deadline = asyncio.get_running_loop().time() + self.config.FETCH_DEADLINE
+        results = await asyncio.gather(
+            *(self._refresh_state(state, deadline) for state in states), return_exceptions=True
+        )
+
+        feeds = []
+        errors = []
+        for state, result in zip(states, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                # A short circuit sent no request; the failures that opened the circuit were counted
+                short_circuited = isinstance(result, CircuitOpenError)
+                if not short_circuited:
+                    FETCH_FAILURES.inc()
+                if state.loaded:
+                    logger.log(
+                        logging.DEBUG if short_circuited else logging.WARNING,
+                        "Feed refresh failed, reusing last payload (%.0fs old) for %s: %s",
+                        time.monotonic() - state.refreshed_at,
+                        state.url,
+                        result,
+                    )
+                    feeds.append(state.feed)
+                else:
+                    logger.error("Feed refresh failed for %s: %s", state.url, result)
+            else:
+                feeds.append(result)
+
+        if errors and not feeds:
+            raise errors[0]
+        return feeds
+
+    def refresh_many(self, routes):
+        """Blocking wrapper around refresh_many_async()."""
+        return self._run(self.refresh_many_async(routes))
+
+    def refresh(self, route):
+        """
+        Bring the feed serving `route` up to date.
+
+        Args:
+            route: Subway line identifier (e.g. "C") or feed URL
+
+        Returns:
+            NYCTFeed: the feed for this route with the latest payload loaded
+
+        Raises:
+            httpx.HTTPError on transport failures or timeouts
+            TimeoutError if the feed is not in within FETCH_DEADLINE
+            CircuitOpenError while the feed's circuit is open
+            RuntimeError if the server returns an unexpected status
+        """
+        return self._run(self._refresh_state(self._state_for(route)))
@@ -0,0 +1,112 @@
+"""
+Single-pass arrival extraction.
+
+NYCTFeed.filter_trips builds a Trip for every entity and rebuilds each trip's
+StopTimeUpdate wrappers once per requested stop. extract_arrivals instead walks
+FeedMessage.entity once, checks each stop_time_update against a precomputed set
+of target stop ids, and emits compact ArrivalRecords straight from the protobuf.
+Vehicle and alert entities met on the way only set the trips' flags.
+"""
+from collections import namedtuple
+
+# ArrivalRecord.flags bits, matching the nyct_gtfs.Trip properties of the same meaning
+ASSIGNED = 1  # Trip.train_assigned: a train has been assigned to the trip
+UNDERWAY = 2  # Trip.underway: the trip has a vehicle position that is not future-dated
+DELAYED = 4  # Trip.has_delay_alert: the feed carries a delay alert for the train
+
+# A vehicle position dated up to this far past the feed timestamp still counts (as in nyct_gtfs)
+UNDERWAY_CLOCK_SLACK = 60
+
+ArrivalRecord = namedtuple(
+    "ArrivalRecord",
+    ["route_id", "shape_id", "stop_id", "arrival", "last_stop_id", "direction", "flags"],
+    defaults=(None, 0),
+)
+ArrivalRecord.__doc__ = """
+Compact arrival of one trip at one target stop.
+
+Fields:
+    route_id: GTFS route id (e.g. "C")
+    shape_id: Shape id parsed from the trip id (e.g. "C..S04R"), the headsign key
+    stop_id: Target stop id (e.g. "A44S")
+    arrival: Predicted arrival as POSIX epoch seconds
+    last_stop_id: Final stop of the trip, the headsign fallback when shape_id is unknown
+    direction: "N" or "S" from the shape id, None if it has none
+    flags: ASSIGNED | UNDERWAY | DELAYED bits
+"""
+
+
+def shape_id_from_trip_id(trip_id):
+    """Parse the shape id out of a realtime trip id, matching nyct_gtfs.Trip.shape_id."""
+    parts = trip_id.split("_")
+    return parts[1] if len(parts) > 1 else None
+
+
+def direction_from_shape_id(shape_id):
+    """Direction of travel ("N" or "S") from a shape id, matching nyct_gtfs.Trip.direction."""
+    if not shape_id:
+        return None
+    parts = shape_id.split("..") if ".." in shape_id else shape_id.split(".")
+    return (parts[1][:1] or None) if len(parts) > 1 else None
+
+
+def extract_arrivals(feed_message, stop_ids):
+    """
+    Extract arrivals at the given stops from a decoded GTFS-realtime feed.
+
+    Args:
+        feed_message: gtfs_realtime_pb2.FeedMessage (or nyct_gtfs cpp proxy)
+        stop_ids: Iterable of stop ids to collect arrivals for, or None for every stop
+
+    Returns:
+        list of ArrivalRecord, in feed order. Stop updates without an arrival
+        time are skipped. UNDERWAY and DELAYED are only set if the message
+        holds the vehicle and alert entities (see train_times.wire).
+    """
+    # Imported here so that importing this module does not load protobuf
+    from nyct_gtfs.compiled_gtfs.nyct_subway_pb2 import nyct_trip_descriptor
+
+    targets = None if stop_ids is None else frozenset(stop_ids)
+    # Matched arrivals wait for the vehicle and alert entities, which may come later in the feed
+    pending = []
+    vehicles = {}
+    delayed_trains = set()
+    for entity in feed_message.entity:
+        if entity.HasField("trip_update"):
+            trip_update = entity.trip_update
+            updates = trip_update.stop_time_update
+
+            trip = None
+            for update in updates:
+                stop_id = update.stop_id
+                if (targets is not None and stop_id not in targets) or not update.HasField("arrival"):
+                    continue
+                if trip is None:
+                    trip = trip_update.trip
+                    shape_id = shape_id_from_trip_id(trip.trip_id)
+                    direction = direction_from_shape_id(shape_id)
+                    descriptor = trip.Extensions[nyct_trip_descriptor]
+                    flags = ASSIGNED if descriptor.is_assigned else 0
+                    last_stop_id = updates[len(updates) - 1].stop_id
+                pending.append(
+                    (trip.route_id, shape_id, stop_id, update.arrival.time, last_stop_id, direction, flags, trip)
+                )
+        elif entity.HasField("vehicle"):
+            vehicles[entity.vehicle.trip.trip_id] = entity.vehicle.timestamp
+        elif entity.HasField("alert"):
+            for informed in entity.alert.informed_entity:
+                delayed_trains.add(informed.trip.Extensions[nyct_trip_descriptor].train_id)
+
+    if not vehicles and not delayed_trains:
+        return [ArrivalRecord(*fields[:7]) for fields in pending]
+
+    underway_before = feed_message.header.timestamp + UNDERWAY_CLOCK_SLACK
+    records = []
+    for *fields, trip in pending:
+        position = vehicles.get(trip.trip_id)
+        if position is not None and position <= underway_before:
+            fields[6] |= UNDERWAY
+        if delayed_trains and trip.Extensions[nyct_trip_descriptor].train_id in delayed_trains:
+            fields[6] |= DELAYED
+        records.append(ArrivalRecord(*fields))
+    return records
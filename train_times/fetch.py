@@ -1,113 +1,137 @@
-import io
 import logging
+import sys
 import time
-from nyct_gtfs import NYCTFeed
-from datetime import datetime
-from utils.helpers import get_current_time, map_route_to_name
+from functools import lru_cache
+from train_times.arrivals import Arrival, ArrivalBatch
+from train_times.extract import extract_arrivals
+from train_times.store import ArrivalStore
+from utils.metrics import time_stage
 from config import Config
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_train_times(trips_content, stops_content, nyc_tz, config=None, max_retries=3):
+def clean_headsign(headsign):
+    """Strip quotes and any characters the MTA font cannot draw from a headsign."""
+    return "".join(
+        c
+        for c in (headsign or "").strip().replace('"', "")
+        if c.isalnum() or c.isspace() or c == "-"
+    )
+
+
+@lru_cache(maxsize=4096)
+def display_headsign(shape_id, last_stop_id, static_index):
     """
-    Fetches train arrival times from the NYC subway GTFS feed.
+    Display headsign of a trip pattern, e.g. "Euclid Av".
+
+    Cached per (shape, last stop), so every fetch reuses the same interned
+    string objects instead of building one per arrival.
+    """
+    return sys.intern(clean_headsign(static_index.headsign(shape_id) or static_index.stop_name(last_stop_id)))
+
+
+def to_arrival(record, static_index):
+    """The Arrival for an ArrivalRecord, with its headsign resolved and its strings shared."""
+    return Arrival(
+        sys.intern(record.route_id),
+        record.direction,
+        sys.intern(record.stop_id),
+        display_headsign(record.shape_id, record.last_stop_id, static_index),
+        record.arrival,
+        record.flags,
+    )
+
+
+def fetch_upcoming(feed_client, config=None, now=None):
+    """
+    Fetches every upcoming arrival at the configured stops once, raising on any failure.
 
     Args:
-        trips_content: String content of trips.txt file
-        stops_content: String content of stops.txt file
-        nyc_tz: pytz timezone object (not string)
+        feed_client: Long-lived FeedClient used to download and cache the feed
         config: Config object (defaults to global Config if not provided)
-        max_retries: Maximum number of retry attempts on failure
+        now: Current time as POSIX epoch seconds (defaults to time.time())
 
     Returns:
-        List of tuples: [(arrival_text, minutes_away), ...]
-        Returns empty list on failure after retries.
+        ArrivalStore: absolute arrival times of all trains not yet arrived, merged
+        across every feed serving cfg.SUBWAY_ROUTES, ready to count down locally.
+        When a feed fell back to its last payload, the store is dated to that
+        payload's fetch, so its age shows on the panel as usual.
     """
     cfg = config or Config
 
-    for attempt in range(max_retries):
-        try:
-            trips_stream = io.StringIO(trips_content)
-            stops_stream = io.StringIO(stops_content)
-
-            logger.info(f"Initializing NYCTFeed for route {cfg.SUBWAY_ROUTE}")
-            feed = NYCTFeed(
-                cfg.SUBWAY_ROUTE,
-                cfg.SUBWAY_ROUTE,
-                trips_txt=trips_stream,
-                stops_txt=stops_stream,
-            )
-            logger.info("NYCTFeed initialized successfully")
-
-            logger.info(f"Filtering trips for stops: {cfg.STOP_IDS}")
-            trains = feed.filter_trips(headed_for_stop_id=cfg.STOP_IDS)
-            logger.info(f"Number of trains found: {len(trains)}")
-
-            # Get current time
-            current_time_nyc = datetime.now(nyc_tz)
-
-            # Process each train - NO MULTIPROCESSING NEEDED
-            # Processing 5-10 trains is trivial and doesn't need separate processes
-            train_times = []
-            for train in trains:
-                stop_updates = [
-                    (stop_update.stop_id, stop_update.arrival)
-                    for stop_update in train.stop_time_updates
-                    if stop_update.stop_id in cfg.STOP_IDS
-                ]
-
-                # Process stop updates for this train
-                for stop_id, arrival_time in stop_updates:
-                    logger.debug(f"Original arrival time: {arrival_time}")
-
-                    # Ensure arrival_time is timezone-aware
-                    if (
-                        arrival_time.tzinfo is None
-                        or arrival_time.tzinfo.utcoffset(arrival_time) is None
-                    ):
-                        arrival_time = nyc_tz.localize(arrival_time)
-
-                    minutes_away = (arrival_time - current_time_nyc).total_seconds() // 60
-                    logger.debug(f"Arrival time: {arrival_time}, Minutes away: {minutes_away}")
-
-                    # Only include trains that haven't arrived yet
-                    if minutes_away >= 0:
-                        # Clean up headsign text
-                        headsign = "".join(
-                            c
-                            for c in train.headsign_text.strip().replace('"', "")
-                            if c.isalnum() or c.isspace() or c == "-"
-                        )
-
-                        # Only include trains within MAX_MINUTES_AWAY
-                        if minutes_away <= cfg.MAX_MINUTES_AWAY:
-                            train_times.append(
-                                (
-                                    f"{map_route_to_name(train.route_id)} {headsign} {int(minutes_away)}m",
-                                    minutes_away,
-                                )
-                            )
-                            logger.debug(f"Added train time: {train_times[-1]}")
-                        else:
-                            logger.debug(
-                                f"Train {train.route_id} is more than {cfg.MAX_MINUTES_AWAY} minutes away."
-                            )
-                    else:
-                        logger.debug(f"Train {train.route_id} has a negative minutes away value.")
-
-            logger.info(f"Filtered train times: {train_times}")
-            return sorted(train_times, key=lambda x: x[1])
-
-        except Exception as e:
-            logger.error(f"Error fetching train times (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                # Exponential backoff: wait 2, 4, 8 seconds
-                wait_time = 2 ** (attempt + 1)
-                logger.info(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                logger.error("Max retries reached. Returning empty list.")
-                return []
-
-    return []
+    feeds = feed_client.refresh_many(cfg.SUBWAY_ROUTES)
+    age = feed_client.age(cfg.SUBWAY_ROUTES) or 0.0
+
+    with time_stage("extract"):
+        records = []
+        for feed in feeds:
+            records.extend(extract_arrivals(feed._feed, cfg.STOP_IDS))
+
+        # Trains beyond MAX_MINUTES_AWAY are kept too: they count down into view before the next fetch
+        now = int(time.time()) if now is None else int(now)
+        upcoming = ArrivalBatch(records).upcoming(now)
+
+        static_index = feed_client.static_index
+        store = ArrivalStore(
+            [to_arrival(record, static_index) for record in upcoming],
+            fetched_epoch=now - age,
+            fetched_at=time.monotonic() - age,
+        )
+
+    # One summary record per cycle; the rows themselves only at DEBUG
+    logger.info(
+        "Fetch cycle: %d feed(s) for %s, %d arrivals at %s, %d upcoming, data %.0fs old; %s",
+        len(feeds),
+        cfg.SUBWAY_ROUTES,
+        len(records),
+        cfg.STOP_IDS,
+        len(store),
+        age,
+        feed_client.stats,
+    )
+    return store
+
+
+def fetch_arrivals(feed_client, config=None, now=None):
+    """
+    Fetches train arrival times once, raising on any failure.
+
+    Args:
+        feed_client: Long-lived FeedClient used to download and cache the feed
+        config: Config object (defaults to global Config if not provided)
+        now: Current time as POSIX epoch seconds (defaults to time.time())
+
+    Returns:
+        List of tuples: [(Arrival, minutes_away), ...] sorted by minutes_away,
+        merged across every feed serving cfg.SUBWAY_ROUTES
+    """
+    cfg = config or Config
+    now = int(time.time()) if now is None else int(now)
+    store = fetch_upcoming(feed_client, cfg, now)
+    train_times = store.countdown(cfg.MAX_MINUTES_AWAY, now)
+    logger.debug("Filtered train times: %s", train_times)
+    return train_times
+
+
+def fetch_train_times(feed_client, config=None):
+    """
+    Fetches train arrival times from the NYC subway GTFS feed.
+
+    Never sleeps or retries: the feed client bounds the fetch by FETCH_DEADLINE,
+    skips feeds whose circuit is open and falls back to each feed's last good
+    payload, so this only comes back empty before any feed has been loaded.
+
+    Args:
+        feed_client: Long-lived FeedClient used to download and cache the feed
+        config: Config object (defaults to global Config if not provided)
+
+    Returns:
+        List of tuples: [(Arrival, minutes_away), ...]
+        Returns empty list if there is no data at all.
+    """
+    try:
+        return fetch_arrivals(feed_client, config)
+    except Exception as e:
+        logger.error("Error fetching train times, no earlier data to show: %s", e)
+        return []
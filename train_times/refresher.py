@@ -0,0 +1,156 @@
+"""
+Background feed refresher.
+
+Fetches arrivals on its own schedule in a daemon thread and publishes them as
+immutable, versioned snapshots. The display loop reads the latest snapshot
+without ever waiting on the network (stale-while-revalidate): a failed fetch
+keeps the previous snapshot in place and only its age grows.
+"""
+import logging
+import threading
+import time
+from config import Config
+from utils.metrics import FETCH_RETRIES
+from .store import ArrivalStore
+
+logger = logging.getLogger(__name__)
+
+
+class ArrivalSnapshot:
+    """Immutable set of arrivals published by the refresher."""
+
+    __slots__ = ("version", "arrivals", "fetched_at")
+
+    def __init__(self, version, arrivals, fetched_at):
+        """
+        Args:
+            version: Monotonically increasing snapshot number (0 = nothing fetched yet)
+            arrivals: Whatever the refresher's fetch function returned (an ArrivalStore
+                from fetch_upcoming in the clock, a list from fetch_arrivals in tests)
+            fetched_at: time.monotonic() when the data was fetched, or None
+        """
+        self.version = version
+        self.arrivals = arrivals
+        self.fetched_at = fetched_at
+
+    def age(self, now=None):
+        """Seconds since this snapshot was fetched (None if never fetched)."""
+        if self.fetched_at is None:
+            return None
+        return (time.monotonic() if now is None else now) - self.fetched_at
+
+
+class FeedRefresher:
+    """
+    Runs a fetch function periodically in a background thread.
+
+    Successful fetches are published as a new ArrivalSnapshot; failures are
+    retried with exponential backoff (capped at the normal interval) while
+    the last good snapshot stays visible.
+    """
+
+    def __init__(self, fetch_fn, interval=None, config=None, initial=None, next_interval=None):
+        """
+        Args:
+            fetch_fn: Callable returning the arrivals to publish, raising on failure
+            interval: Seconds between successful fetches (defaults to Config.FETCH_INTERVAL),
+                and the cap on the retry backoff
+            config: Config object (defaults to global Config if not provided)
+            initial: Arrivals of the version 0 snapshot shown before the first fetch
+                (defaults to an empty list)
+            next_interval: Optional callable taking the fetched arrivals and returning the
+                seconds until the next fetch, instead of the fixed interval
+        """
+        self.config = config or Config
+        self.fetch_fn = fetch_fn
+        self.interval = interval if interval is not None else self.config.FETCH_INTERVAL
+        self.next_interval = next_interval
+
+        initial = [] if initial is None else initial
+        # An ArrivalStore saved by an earlier run (SnapshotFile) keeps the age of its fetch
+        fetched_at = initial.fetched_at if isinstance(initial, ArrivalStore) else None
+        self._snapshot = ArrivalSnapshot(0, initial, fetched_at)
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._failures = 0
+
+    def latest(self):
+        """Return the most recently published snapshot (never blocks on a fetch)."""
+        return self._snapshot
+
+    def wait_for_update(self, version, timeout):
+        """
+        Wait until a snapshot newer than `version` is published or `timeout` elapses.
+
+        Returns:
+            ArrivalSnapshot: the latest snapshot (unchanged if the wait timed out)
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._snapshot.version != version or self._stop.is_set(), timeout
+            )
+            return self._snapshot
+
+    def refresh_once(self):
+        """
+        Run one fetch and publish the result.
+
+        Returns:
+            float: seconds to wait before the next fetch
+        """
+        try:
+            arrivals = self.fetch_fn()
+        except Exception as e:
+            self._failures += 1
+            retry_in = min(2**self._failures, self.interval)
+            FETCH_RETRIES.inc()
+            age = self._snapshot.age()
+            logger.error(
+                "Background fetch failed (%d in a row), retrying in %ss; showing data %s: %s",
+                self._failures,
+                retry_in,
+                "never fetched" if age is None else "%.0fs old" % age,
+                e,
+            )
+            return retry_in
+
+        self._failures = 0
+        # A store dated to an older fetch (a feed that fell back to its last payload) keeps that age
+        fetched_at = arrivals.fetched_at if isinstance(arrivals, ArrivalStore) else None
+        with self._condition:
+            self._snapshot = ArrivalSnapshot(
+                self._snapshot.version + 1, arrivals, time.monotonic() if fetched_at is None else fetched_at
+            )
+            self._condition.notify_all()
+        logger.debug("Published snapshot v%d with %d arrivals", self._snapshot.version, len(arrivals))
+        if self.next_interval is None:
+            return self.interval
+        return self.next_interval(arrivals)
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self.refresh_once()
+            logger.debug("Next fetch in %.1fs", delay)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def wake(self):
+        """Fetch now instead of at the scheduled time (e.g. when the panel turns back on)."""
+        self._wake.set()
+
+    def start(self):
+        """Start the background thread (fetches immediately)."""
+        self._thread = threading.Thread(target=self._run, name="feed-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Ask the background thread to exit and wake any waiting readers."""
+        self._stop.set()
+        self._wake.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
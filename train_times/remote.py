@@ -0,0 +1,85 @@
+"""
+Client for the arrivals aggregation server (see train_times.server).
+
+RemoteArrivalClient stands in for FeedClient + fetch_upcoming on clocks that
+read from a local server instead of the MTA: it asks for its STOP_IDS with
+If-None-Match, so an unchanged poll is a bodyless 304, and returns the same
+ArrivalStore the display loop counts down from.
+"""
+import logging
+import time
+import httpx
+from config import Config
+from utils.metrics import FETCH_FAILURES, time_stage
+from .arrivals import decode_arrival
+from .stats import FeedClientStats
+from .store import ArrivalStore
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteArrivalClient:
+    """Fetches per-stop arrival snapshots from an aggregation server."""
+
+    def __init__(self, base_url, stop_ids=None, config=None, http_client=None):
+        """
+        Args:
+            base_url: Server root, e.g. "http://subway-clock-server.local:8088"
+            stop_ids: Stops to ask for (defaults to config.STOP_IDS)
+            config: Config object (defaults to global Config if not provided)
+            http_client: Optional pre-built httpx.Client (mainly for tests)
+        """
+        self.config = config or Config
+        self.url = base_url.rstrip("/") + "/arrivals"
+        self.stop_ids = list(stop_ids or self.config.STOP_IDS)
+        self.stats = FeedClientStats()
+        self._etag = None
+        self._arrivals = []
+        self._client = http_client or httpx.Client(
+            timeout=httpx.Timeout(self.config.FEED_READ_TIMEOUT, connect=self.config.FEED_CONNECT_TIMEOUT)
+        )
+
+    def close(self):
+        """Close pooled connections."""
+        self._client.close()
+
+    def fetch_upcoming(self):
+        """
+        Fetches the arrivals at this clock's stops once, raising on any failure.
+
+        Returns:
+            ArrivalStore anchored at the server's fetch time, so the staleness bar
+            reflects the age of the upstream data rather than of this request
+        """
+        headers = {"If-None-Match": self._etag} if self._etag else {}
+        try:
+            with time_stage("fetch"):
+                response = self._client.get(self.url, params={"stops": ",".join(self.stop_ids)}, headers=headers)
+        except httpx.HTTPError:
+            FETCH_FAILURES.inc()
+            raise
+        self.stats.requests += 1
+        self.stats.bytes_transferred += response.num_bytes_downloaded or len(response.content)
+
+        if response.status_code == 304 and self._etag:
+            self.stats.not_modified += 1
+        elif response.status_code == 200:
+            data = response.json()
+            arrivals = []
+            for stop_id in self.stop_ids:
+                arrivals.extend(decode_arrival(fields) for fields in data["stops"].get(stop_id, []))
+            self._arrivals = arrivals
+            self._etag = response.headers.get("ETag")
+            self.stats.parses += 1
+        else:
+            FETCH_FAILURES.inc()
+            raise RuntimeError(f"Error accessing arrivals server: HTTP {response.status_code}")
+
+        fetched_header = response.headers.get("X-Fetched-At")
+        if fetched_header is None:
+            # The server has not completed its first fetch yet
+            raise RuntimeError("Arrivals server has no data yet")
+        fetched_epoch = float(fetched_header)
+        age = max(0.0, time.time() - fetched_epoch)
+        logger.debug("Remote arrivals: %d at %s, %.0fs old; %s", len(self._arrivals), self.stop_ids, age, self.stats)
+        return ArrivalStore(self._arrivals, fetched_epoch=fetched_epoch, fetched_at=time.monotonic() - age)
@@ -0,0 +1,170 @@
+"""
+Failure handling for feed requests: circuit breakers and hedged requests.
+
+A CircuitBreaker stops requests to an endpoint after repeated failures and
+lets a single trial request through once a cool-down has passed, so an MTA
+outage costs one request per cool-down instead of one (plus retries) per
+poll. Callers fall back to the last payload they decoded meanwhile.
+
+hedged() sends a second copy of a request when the first has not answered
+after a delay and takes whichever answers first. The copy that loses is left
+to finish on its own (until the caller's deadline), which is what lets the tail
+latency saved by the hedge be measured rather than guessed.
+"""
+import asyncio
+import time
+from utils.metrics import HEDGE_SAVED_SECONDS, HEDGE_WINS, HEDGED_REQUESTS
+
+
+class CircuitOpenError(RuntimeError):
+    """A request was not sent because the endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one endpoint."""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    # Gauge value of each state
+    LEVELS = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial request is let through
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opens = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._trial or self.clock() >= self._opened_at + self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def level(self):
+        """The state as a number for the metrics gauge (0 closed, 1 half-open, 2 open)."""
+        return self.LEVELS[self.state]
+
+    def retry_in(self):
+        """Seconds until the next trial request is allowed (0 unless open)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return self._opened_at + self.reset_timeout - self.clock()
+
+    def allow(self):
+        """
+        Whether a request may be sent now.
+
+        While half-open, only one trial request is allowed until its outcome
+        is recorded.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN or self._trial:
+            return False
+        self._trial = True
+        return True
+
+    def record_success(self):
+        """Close the circuit."""
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        """
+        Count a failed request.
+
+        Returns:
+            bool: True if this failure opened (or, after a failed trial, reopened) the circuit
+        """
+        self.failures += 1
+        if self._trial or (self._opened_at is None and self.failures >= self.failure_threshold):
+            self._opened_at = self.clock()
+            self._trial = False
+            self.opens += 1
+            return True
+        return False
+
+
+async def hedged(send, delay, stats, deadline, stragglers):
+    """
+    Await send(), sending a second copy if the first takes longer than `delay`.
+
+    Args:
+        send: Zero-argument coroutine function making the request
+        delay: Seconds to wait for the first request before hedging
+        stats: Object with hedges, hedge_wins and hedge_saved counters to update
+        deadline: Event loop time a losing first request is cut off at (it keeps running until
+            then only to measure the saving)
+        stragglers: Set the losing request's task is kept in until it finishes
+
+    Returns:
+        The first successful result
+
+    Raises:
+        The first request's error if both copies fail
+    """
+    loop = asyncio.get_running_loop()
+    first = asyncio.ensure_future(send())
+    second = None
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        stats.hedges += 1
+        HEDGED_REQUESTS.inc()
+        second = asyncio.ensure_future(send())
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [task for task in done if task.exception() is None]
+            if winners:
+                break
+        else:
+            # Both failed: report the original request's error
+            return first.result()
+    except asyncio.CancelledError:
+        first.cancel()
+        if second is not None:
+            second.cancel()
+        raise
+
+    if first in winners:
+        second.cancel()
+        return first.result()
+
+    stats.hedge_wins += 1
+    HEDGE_WINS.inc()
+    answered = loop.time()
+
+    def record_saving(task):
+        # Time the first request would still have kept the caller waiting (at least, if cut off)
+        stragglers.discard(task)
+        saved = loop.time() - answered
+        stats.hedge_saved += saved
+        HEDGE_SAVED_SECONDS.observe(saved)
+        if not task.cancelled():
+            task.exception()  # retrieved, so a failed straggler is not reported as unhandled
+
+    if first.done():
+        record_saving(first)
+    else:
+        stragglers.add(first)
+        first.add_done_callback(record_saving)
+        loop.call_at(deadline, first.cancel)
+    return second.result()
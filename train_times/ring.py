@@ -0,0 +1,190 @@
+"""
+Shared-memory ring buffer of arrival snapshots.
+
+The fetch worker process (train_times.worker) publishes each ArrivalStore
+into the next slot of a multiprocessing.shared_memory block; the render
+process only ever reads the newest one. Every slot carries the sequence
+number of the snapshot in it, written after the payload and checked again
+after copying it out (a seqlock), so a reader never decodes a half-written
+slot and neither side ever waits for the other.
+
+The header also holds the worker's heartbeat deadline (time.monotonic(),
+which is system-wide on Linux) for the watchdog, and a wake flag the render
+process sets to ask for a fetch straight away.
+
+Layout (little-endian):
+
+    header  magic "NYCRING2", slot count u32, slot size u32,
+            latest sequence u64, heartbeat deadline f64, wake u8, padding to 64 bytes
+    slot    sequence u64, payload length u32, padding u32, payload[slot size]
+    payload fetched_epoch f64, fetched_at f64, arrival count u32,
+            then per arrival: arrival epoch i64, flags u8, UTF-8 lengths of
+            route_id u8, direction u8, stop_id u8 and headsign u16, and the
+            four strings back to back (an empty direction is None)
+"""
+import struct
+from multiprocessing import shared_memory
+from .arrivals import decode_arrival
+from .store import ArrivalStore
+
+MAGIC = b"NYCRING2"
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct("<QI4x")
+
+_GEOMETRY = struct.Struct("<II")  # at offset 8
+_LATEST = struct.Struct("<Q")  # at offset 16
+_DEADLINE = struct.Struct("<d")  # at offset 24
+_WAKE = struct.Struct("<B")  # at offset 32
+
+_PAYLOAD_HEADER = struct.Struct("<ddI")
+_ENTRY = struct.Struct("<qBBBBH")
+
+
+def encode_store(store, limit):
+    """
+    Serialize an ArrivalStore into at most `limit` bytes.
+
+    Arrivals furthest in the future are dropped if the store does not fit.
+    """
+    pieces = []
+    size = _PAYLOAD_HEADER.size
+    for arrival in store.arrivals:
+        route_id = arrival.route_id.encode("utf-8")[:0xFF]
+        direction = (arrival.direction or "").encode("utf-8")[:0xFF]
+        stop_id = arrival.stop_id.encode("utf-8")[:0xFF]
+        headsign = arrival.headsign.encode("utf-8")[:0xFFFF]
+        piece = (
+            _ENTRY.pack(arrival.arrival, arrival.flags, len(route_id), len(direction), len(stop_id), len(headsign))
+            + route_id
+            + direction
+            + stop_id
+            + headsign
+        )
+        if size + len(piece) > limit:
+            break
+        pieces.append(piece)
+        size += len(piece)
+    fetched_epoch = -1.0 if store.fetched_epoch is None else float(store.fetched_epoch)
+    fetched_at = -1.0 if store.fetched_at is None else float(store.fetched_at)
+    return _PAYLOAD_HEADER.pack(fetched_epoch, fetched_at, len(pieces)) + b"".join(pieces)
+
+
+def decode_store(payload):
+    """Rebuild the ArrivalStore serialized by encode_store()."""
+    fetched_epoch, fetched_at, count = _PAYLOAD_HEADER.unpack_from(payload, 0)
+    pos = _PAYLOAD_HEADER.size
+    arrivals = []
+    for _ in range(count):
+        epoch, flags, *lengths = _ENTRY.unpack_from(payload, pos)
+        pos += _ENTRY.size
+        strings = []
+        for length in lengths:
+            strings.append(bytes(payload[pos : pos + length]).decode("utf-8"))
+            pos += length
+        route_id, direction, stop_id, headsign = strings
+        arrivals.append(decode_arrival((route_id, direction or None, stop_id, headsign, epoch, flags)))
+    if fetched_epoch < 0:
+        return ArrivalStore(arrivals)
+    return ArrivalStore(arrivals, fetched_epoch=fetched_epoch, fetched_at=fetched_at)
+
+
+class SnapshotRing:
+    """Single-writer, multi-reader ring of ArrivalStore snapshots in shared memory."""
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._buf = shm.buf
+        self._owner = owner
+        magic = bytes(self._buf[0:8])
+        if magic != MAGIC:
+            raise ValueError(f"Not a snapshot ring: {shm.name}")
+        self.slots, self.slot_size = _GEOMETRY.unpack_from(self._buf, 8)
+
+    @classmethod
+    def create(cls, slots=4, slot_size=16384, name=None):
+        """Allocate a new ring (the creating process unlinks it on close)."""
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=HEADER_SIZE + slots * (SLOT_HEADER.size + slot_size)
+        )
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        shm.buf[0:8] = MAGIC
+        _GEOMETRY.pack_into(shm.buf, 8, slots, slot_size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Open an existing ring by name (from another process)."""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def _slot_offset(self, sequence):
+        return HEADER_SIZE + (sequence % self.slots) * (SLOT_HEADER.size + self.slot_size)
+
+    @property
+    def sequence(self):
+        """Sequence number of the newest snapshot (0 = none published yet)."""
+        return _LATEST.unpack_from(self._buf, 16)[0]
+
+    def publish(self, store):
+        """Write `store` into the next slot and make it the latest (writer only)."""
+        sequence = self.sequence + 1
+        offset = self._slot_offset(sequence)
+        payload = encode_store(store, self.slot_size)
+        # Invalidate the slot, fill it, then stamp it with its sequence number
+        SLOT_HEADER.pack_into(self._buf, offset, 0, 0)
+        start = offset + SLOT_HEADER.size
+        self._buf[start : start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self._buf, offset, sequence, len(payload))
+        _LATEST.pack_into(self._buf, 16, sequence)
+        return sequence
+
+    def read(self, retries=3):
+        """
+        Copy out the newest snapshot.
+
+        Returns:
+            tuple: (sequence, ArrivalStore), or (0, None) if nothing is published
+            or the writer kept overwriting the slot being read
+        """
+        for _ in range(retries):
+            sequence = self.sequence
+            if sequence == 0:
+                return 0, None
+            offset = self._slot_offset(sequence)
+            stamped, length = SLOT_HEADER.unpack_from(self._buf, offset)
+            if stamped != sequence:
+                continue
+            start = offset + SLOT_HEADER.size
+            payload = bytes(self._buf[start : start + length])
+            if SLOT_HEADER.unpack_from(self._buf, offset)[0] == sequence:
+                return sequence, decode_store(payload)
+        return 0, None
+
+    def set_deadline(self, deadline):
+        """Promise the next heartbeat by `deadline` (time.monotonic() seconds)."""
+        _DEADLINE.pack_into(self._buf, 24, deadline)
+
+    @property
+    def deadline(self):
+        return _DEADLINE.unpack_from(self._buf, 24)[0]
+
+    def request_wake(self):
+        """Ask the worker to fetch now."""
+        _WAKE.pack_into(self._buf, 32, 1)
+
+    def take_wake(self):
+        """Return and clear the wake flag (worker side)."""
+        if _WAKE.unpack_from(self._buf, 32)[0]:
+            _WAKE.pack_into(self._buf, 32, 0)
+            return True
+        return False
+
+    def close(self):
+        """Detach; the creating process also frees the shared memory."""
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,207 @@
+"""
+Arrivals aggregation server.
+
+One process (main.py --serve) fetches each feed once per poll, extracts the
+arrivals at every stop, and serves them to any number of clocks on the local
+network, so the upstream request rate stays constant however many panels
+and stops there are:
+
+    GET /arrivals?stops=A44N,A44S[&wait=SECONDS]
+
+returns {"fetched_at": epoch, "stops": {"A44N": [arrival, ...], ...}}, each
+arrival being the field values of a train_times.arrivals.Arrival
+([route_id, direction, stop_id, headsign, arrival_epoch, flags]).
+Each response carries a weak ETag covering the arrivals (not fetched_at), so
+an unchanged stop set answers If-None-Match with 304; X-Fetched-At gives the
+time of the underlying fetch on both. With wait > 0 a matching If-None-Match
+is held until the arrivals change or the wait elapses (long polling).
+
+Per-stop JSON is serialized once per fetch, so a request is a dict lookup and
+a join. Clocks read from the server with train_times.remote.RemoteArrivalClient.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from config import Config
+from utils.metrics import time_stage
+from .extract import extract_arrivals
+from .fetch import to_arrival
+
+logger = logging.getLogger(__name__)
+
+# Longest a long-poll request is held open (seconds)
+MAX_WAIT = 60
+
+
+class ServerConfig(Config):
+    """Config for the server's FeedClient: clients may ask for any stop, so whole feeds are decoded."""
+
+    FEED_DECODE = "full"
+
+
+class StopIndex:
+    """Arrivals of one fetch, grouped by stop id and pre-serialized."""
+
+    __slots__ = ("fetched_at", "bodies", "digests")
+
+    def __init__(self, stops=None, fetched_at=None):
+        """
+        Args:
+            stops: Dict of stop id -> list of Arrival sorted by arrival
+            fetched_at: POSIX time of the fetch (None before the first one)
+        """
+        self.fetched_at = fetched_at
+        self.bodies = {}
+        self.digests = {}
+        for stop_id, arrivals in (stops or {}).items():
+            body = json.dumps([list(arrival) for arrival in arrivals], separators=(",", ":"))
+            self.bodies[stop_id] = body
+            self.digests[stop_id] = hashlib.blake2b(body.encode("utf-8"), digest_size=8).digest()
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def etag(self, stop_ids):
+        """Weak ETag of the arrivals at `stop_ids` (stable while they do not change)."""
+        digest = hashlib.blake2b(digest_size=12)
+        for stop_id in stop_ids:
+            digest.update(stop_id.encode("utf-8"))
+            digest.update(self.digests.get(stop_id, b""))
+        return f'W/"{digest.hexdigest()}"'
+
+    def render(self, stop_ids):
+        """JSON body for `stop_ids` (stops without arrivals get an empty list)."""
+        stops = ",".join(f"{json.dumps(stop_id)}:{self.bodies.get(stop_id, '[]')}" for stop_id in stop_ids)
+        return f'{{"fetched_at":{json.dumps(self.fetched_at)},"stops":{{{stops}}}}}'.encode("utf-8")
+
+
+def fetch_stop_index(feed_client, config=None, now=None):
+    """
+    Fetches every feed serving config.SUBWAY_ROUTES once and indexes all its stops.
+
+    Args:
+        feed_client: FeedClient decoding whole feeds (FEED_DECODE = "full")
+        config: Config object (defaults to global Config if not provided)
+        now: Current time as POSIX epoch seconds (defaults to time.time())
+
+    Returns:
+        StopIndex of every upcoming arrival in the feeds
+    """
+    cfg = config or Config
+    feeds = feed_client.refresh_many(cfg.SUBWAY_ROUTES)
+    age = feed_client.age(cfg.SUBWAY_ROUTES) or 0.0
+    now = int(time.time()) if now is None else int(now)
+
+    with time_stage("extract"):
+        static_index = feed_client.static_index
+        stops = defaultdict(list)
+        for feed in feeds:
+            for record in extract_arrivals(feed._feed, None):
+                if record.arrival < now:
+                    continue
+                stops[record.stop_id].append(to_arrival(record, static_index))
+        for arrivals in stops.values():
+            arrivals.sort(key=lambda arrival: arrival.arrival)
+        # Dated to the oldest feed payload, so clocks see the age of a fallback
+        index = StopIndex(stops, fetched_at=int(now - age))
+
+    logger.info(
+        "Fetch cycle: %d feed(s) for %s, %d stops indexed; %s",
+        len(feeds),
+        cfg.SUBWAY_ROUTES,
+        len(index),
+        feed_client.stats,
+    )
+    return index
+
+
+class _ArrivalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    refresher = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != "/arrivals":
+            self.send_error(404)
+            return
+        query = parse_qs(url.query)
+        stop_ids = [s for value in query.get("stops", []) for s in value.split(",") if s]
+        try:
+            wait = min(float(query.get("wait", ["0"])[0]), MAX_WAIT)
+        except ValueError:
+            self.send_error(400, "wait must be a number of seconds")
+            return
+        if not stop_ids:
+            self.send_error(400, "stops is required")
+            return
+
+        snapshot = self.refresher.latest()
+        etag = snapshot.arrivals.etag(stop_ids)
+        if wait > 0 and etag == self.headers.get("If-None-Match"):
+            # Long poll: hold the request until these stops change or the wait is over
+            deadline = time.monotonic() + wait
+            while etag == self.headers.get("If-None-Match"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                snapshot = self.refresher.wait_for_update(snapshot.version, remaining)
+                etag = snapshot.arrivals.etag(stop_ids)
+
+        index = snapshot.arrivals
+        if etag == self.headers.get("If-None-Match"):
+            self.send_response(304)
+            self._send_common_headers(etag, index)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = index.render(stop_ids)
+        self.send_response(200)
+        self._send_common_headers(etag, index)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_common_headers(self, etag, index):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        if index.fetched_at is not None:
+            self.send_header("X-Fetched-At", str(index.fetched_at))
+
+    def log_message(self, format, *args):
+        logger.debug("arrivals %s - %s", self.address_string(), format % args)
+
+
+class ArrivalServer:
+    """Serves the StopIndex snapshots published by a FeedRefresher, from a daemon thread."""
+
+    def __init__(self, refresher, host="0.0.0.0", port=8088):
+        """
+        Args:
+            refresher: FeedRefresher whose fetch function returns a StopIndex
+                (created with initial=StopIndex())
+            host: Interface to bind (0.0.0.0 serves the whole local network)
+            port: TCP port (0 picks a free one; see .port)
+        """
+        handler = type("ArrivalHandler", (_ArrivalHandler,), {"refresher": refresher})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        """Start serving in the background; returns self."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="arrival-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,317 @@
+"""
+Compiled GTFS static index.
+
+trips.txt and stops.txt are parsed once into a compact binary file that is
+memory-mapped at startup and shared by every feed fetch, instead of letting
+nyct_gtfs re-run its CSV readers each time a NYCTFeed is constructed.
+
+File layout (little-endian):
+    header:      magic (8s), sha256 of the source files (32s), shape count (I), stop count (I)
+    shape table: per shape, sorted by shape_id: key off/len, headsign off/len
+    stop table:  per stop, sorted by stop_id: key off/len, name off/len, parent off/len
+    strings:     UTF-8 blob that all offsets point into
+"""
+import csv
+import hashlib
+import io
+import logging
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NYCSIDX1"
+_HEADER = struct.Struct("<8s32sII")
+_SHAPE_ENTRY = struct.Struct("<IHIH")
+_STOP_ENTRY = struct.Struct("<IHIHIH")
+
+
+def source_digest(trips_file, stops_file):
+    """
+    Hash the contents of the GTFS static source files.
+
+    Args:
+        trips_file: Path to trips.txt
+        stops_file: Path to stops.txt
+
+    Returns:
+        bytes: 32-byte sha256 digest of both files
+    """
+    digest = hashlib.sha256()
+    for path in (trips_file, stops_file):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    return digest.digest()
+
+
+def _parse_trips(trips_text):
+    """Return {shape_id: headsign} using the same shape_id rules as nyct_gtfs.TripShapes."""
+    shapes = {}
+    reader = csv.reader(io.StringIO(trips_text))
+    header = next(reader, [])
+    trip_id_col = header.index("trip_id") if "trip_id" in header else 2
+    headsign_col = header.index("trip_headsign") if "trip_headsign" in header else 3
+    for row in reader:
+        if len(row) <= max(trip_id_col, headsign_col):
+            continue
+        parts = row[trip_id_col].split("_")
+        if len(parts) < 3:
+            continue
+        shapes.setdefault(parts[2], row[headsign_col])
+    return shapes
+
+
+def _parse_stops(stops_text):
+    """Return {stop_id: (stop_name, parent_station)}."""
+    stops = {}
+    reader = csv.DictReader(io.StringIO(stops_text))
+    for row in reader:
+        stop_id = row.get("stop_id")
+        if stop_id:
+            stops[stop_id] = (row.get("stop_name") or "", row.get("parent_station") or "")
+    return stops
+
+
+def compile_index(trips_file, stops_file, index_file, digest=None):
+    """
+    Parse the GTFS static files and write the binary index atomically.
+
+    Args:
+        trips_file: Path to trips.txt
+        stops_file: Path to stops.txt
+        index_file: Destination path for the compiled index
+        digest: Precomputed source digest (computed if not provided)
+
+    Returns:
+        tuple: (shape count, stop count)
+    """
+    if digest is None:
+        digest = source_digest(trips_file, stops_file)
+
+    with open(trips_file, "r", encoding="utf-8") as f:
+        shapes = _parse_trips(f.read())
+    with open(stops_file, "r", encoding="utf-8") as f:
+        stops = _parse_stops(f.read())
+
+    blob = bytearray()
+    offsets = {}
+
+    def intern(text):
+        if text not in offsets:
+            encoded = text.encode("utf-8")
+            offsets[text] = (len(blob), len(encoded))
+            blob.extend(encoded)
+        return offsets[text]
+
+    shape_table = bytearray()
+    for shape_id in sorted(shapes):
+        shape_table += _SHAPE_ENTRY.pack(*intern(shape_id), *intern(shapes[shape_id]))
+
+    stop_table = bytearray()
+    for stop_id in sorted(stops):
+        name, parent = stops[stop_id]
+        stop_table += _STOP_ENTRY.pack(*intern(stop_id), *intern(name), *intern(parent))
+
+    index_path = Path(index_file)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, digest, len(shapes), len(stops)))
+        f.write(shape_table)
+        f.write(stop_table)
+        f.write(blob)
+    os.replace(tmp_path, index_path)
+
+    return len(shapes), len(stops)
+
+
+class StaticIndex:
+    """
+    Read-only view over a compiled GTFS static index.
+
+    Lookups binary-search the memory-mapped tables, so startup cost is a single
+    mmap and per-fetch cost is a handful of lookups for the trains on screen.
+    """
+
+    def __init__(self, index_file):
+        """
+        Memory-map a compiled index file.
+
+        Args:
+            index_file: Path to a file written by compile_index()
+        """
+        self.index_file = str(index_file)
+        with open(self.index_file, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.digest, self.shape_count, self.stop_count = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            self._buf.close()
+            raise ValueError(f"Not a GTFS static index: {self.index_file}")
+
+        self._shape_base = _HEADER.size
+        self._stop_base = self._shape_base + self.shape_count * _SHAPE_ENTRY.size
+        self._blob_base = self._stop_base + self.stop_count * _STOP_ENTRY.size
+        # Decoded lookups by id; values are interned, so platforms and stations named alike share one string
+        self._headsigns = {}
+        self._stops = {}
+
+        self.trip_shapes = IndexedTripShapes(self)
+        self.stations = IndexedStations(self)
+
+    @classmethod
+    def load(cls, trips_file, stops_file, index_file):
+        """
+        Open the index for the given source files, rebuilding it if they changed.
+
+        Args:
+            trips_file: Path to trips.txt
+            stops_file: Path to stops.txt
+            index_file: Path of the compiled index (created if missing or stale)
+
+        Returns:
+            StaticIndex
+        """
+        digest = source_digest(trips_file, stops_file)
+
+        if os.path.exists(index_file):
+            try:
+                index = cls(index_file)
+                if index.digest == digest:
+                    logger.info(f"Using compiled GTFS static index {index_file}")
+                    return index
+                index.close()
+                logger.info("GTFS static files changed, rebuilding index")
+            except (ValueError, struct.error, OSError) as e:
+                logger.warning(f"Discarding unreadable GTFS static index: {e}")
+
+        shape_count, stop_count = compile_index(trips_file, stops_file, index_file, digest)
+        logger.info(f"Compiled GTFS static index: {shape_count} shapes, {stop_count} stops")
+        return cls(index_file)
+
+    @property
+    def mapped_bytes(self):
+        """Size of the memory-mapped index file (shared, read-only pages)."""
+        return len(self._buf)
+
+    def close(self):
+        """Unmap the index file."""
+        self._buf.close()
+
+    def _string(self, offset, length):
+        start = self._blob_base + offset
+        return self._buf[start : start + length].decode("utf-8")
+
+    def _find(self, base, entry, count, key):
+        encoded = key.encode("utf-8")
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            fields = entry.unpack_from(self._buf, base + mid * entry.size)
+            start = self._blob_base + fields[0]
+            candidate = self._buf[start : start + fields[1]]
+            if candidate < encoded:
+                lo = mid + 1
+            elif candidate > encoded:
+                hi = mid
+            else:
+                return fields
+        return None
+
+    def headsign(self, shape_id):
+        """
+        Look up the headsign for a GTFS shape id (e.g. "A..N55R").
+
+        Returns:
+            str or None if the shape id is unknown
+        """
+        try:
+            return self._headsigns[shape_id]
+        except KeyError:
+            pass
+        fields = None
+        if shape_id:
+            fields = self._find(self._shape_base, _SHAPE_ENTRY, self.shape_count, shape_id)
+        headsign = self._headsigns[shape_id] = sys.intern(self._string(*fields[2:4])) if fields else None
+        return headsign
+
+    def stop(self, stop_id):
+        """
+        Look up a stop.
+
+        Returns:
+            tuple: (stop_name, parent_station) or None if the stop id is unknown
+        """
+        try:
+            return self._stops[stop_id]
+        except KeyError:
+            pass
+        fields = None
+        if stop_id:
+            fields = self._find(self._stop_base, _STOP_ENTRY, self.stop_count, stop_id)
+        stop = self._stops[stop_id] = (
+            (sys.intern(self._string(*fields[2:4])), sys.intern(self._string(*fields[4:6]))) if fields else None
+        )
+        return stop
+
+    def stop_name(self, stop_id):
+        """Return the human-readable name for a stop id, or None if unknown."""
+        stop = self.stop(stop_id)
+        return stop[0] if stop else None
+
+    def parent_station(self, stop_id):
+        """Return the parent station id for a stop id, or None if unknown or top-level."""
+        stop = self.stop(stop_id)
+        return (stop[1] or None) if stop else None
+
+    def attach(self, feed):
+        """
+        Point an NYCTFeed at this index instead of its own CSV-backed tables.
+
+        nyct_gtfs has no public hook for this, so the feed's private static
+        tables are replaced; build the feed with trips_txt/stops_txt set to the
+        index so its constructor skips the CSV parse.
+        """
+        feed._trip_shapes = self.trip_shapes
+        feed._stops = self.stations
+        return feed
+
+
+class IndexedTripShapes:
+    """Drop-in for nyct_gtfs.TripShapes backed by a StaticIndex."""
+
+    def __init__(self, index):
+        self._index = index
+
+    def get_headsign_text(self, shape_id):
+        """
+        Find the headsign text for a shape id.
+
+        :raises: ValueError if the shape_id is not in the index (matches nyct_gtfs)
+        """
+        headsign = self._index.headsign(shape_id)
+        if headsign is None:
+            raise ValueError(f"Invalid shape_id: {shape_id}, not found in trips.txt file")
+        return headsign
+
+
+class IndexedStations:
+    """Drop-in for nyct_gtfs.Stations backed by a StaticIndex."""
+
+    def __init__(self, index):
+        self._index = index
+
+    def get_station_name(self, stop_id):
+        """
+        Find the stop name for a stop id.
+
+        :raises: ValueError if the stop_id is not in the index (matches nyct_gtfs)
+        """
+        name = self._index.stop_name(stop_id)
+        if name is None:
+            raise ValueError(f"Invalid stop_id: {stop_id}, not found in stops.txt file")
+        return name
@@ -0,0 +1,39 @@
+"""
+Bandwidth and parse counters shared by the feed clients.
+
+Kept apart from train_times.client so the stand-in clients that only report
+these counters (RemoteArrivalClient, ReplayFeedClient) do not have to import
+the whole fetch client for them.
+"""
+
+
+class FeedClientStats:
+    """Running totals for bandwidth and parse work done by a FeedClient."""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_transferred = 0
+        self.handshakes = 0
+        self.not_modified = 0
+        self.parse_skips = 0
+        self.parses = 0
+        self.short_circuits = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_saved = 0.0
+
+    def as_dict(self):
+        """Return the counters as a plain dict."""
+        return dict(vars(self))
+
+    def summary(self):
+        """One-line human-readable summary for the log (also str(stats), for lazy log arguments)."""
+        return (
+            f"requests={self.requests} bytes={self.bytes_transferred} "
+            f"handshakes={self.handshakes} not_modified={self.not_modified} "
+            f"parse_skips={self.parse_skips} parses={self.parses} "
+            f"short_circuits={self.short_circuits} hedges={self.hedges} "
+            f"hedge_wins={self.hedge_wins} hedge_saved={self.hedge_saved:.1f}s"
+        )
+
+    __str__ = summary
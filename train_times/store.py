@@ -0,0 +1,152 @@
+"""
+Arrival store: absolute arrival times counted down locally.
+
+A fetch yields absolute arrival epochs. The store keeps them, anchors the
+wall-clock time of the fetch to time.monotonic(), and computes minutes-away
+afresh whenever it is asked, so the panel keeps counting down (and trains
+that have left drop off) between fetches, and a wall-clock step from NTP
+does not make the countdown jump.
+
+SnapshotFile keeps the last store on disk, so a restarted clock can draw its
+first frame straight away, counting down from the saved arrival times while
+the first fetch is still in flight.
+"""
+import json
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from .arrivals import decode_arrival
+
+logger = logging.getLogger(__name__)
+
+
+class ArrivalStore:
+    """Upcoming Arrivals from one fetch, sorted by arrival."""
+
+    __slots__ = ("arrivals", "epochs", "fetched_epoch", "fetched_at")
+
+    def __init__(self, arrivals=(), fetched_epoch=None, fetched_at=None):
+        """
+        Args:
+            arrivals: Iterable of Arrival, in any order
+            fetched_epoch: Wall-clock POSIX time of the fetch (None for an empty store)
+            fetched_at: time.monotonic() at the same moment (defaults to now)
+        """
+        self.arrivals = sorted(arrivals, key=lambda arrival: arrival.arrival)
+        self.epochs = array("q", [arrival.arrival for arrival in self.arrivals])
+        self.fetched_epoch = fetched_epoch
+        if fetched_at is None and fetched_epoch is not None:
+            fetched_at = time.monotonic()
+        self.fetched_at = fetched_at
+
+    def __len__(self):
+        return len(self.arrivals)
+
+    def now(self, monotonic_now=None):
+        """Current POSIX time, advanced from the fetch time by the monotonic clock."""
+        if self.fetched_epoch is None:
+            return time.time()
+        elapsed = (time.monotonic() if monotonic_now is None else monotonic_now) - self.fetched_at
+        return self.fetched_epoch + elapsed
+
+    def age(self, monotonic_now=None):
+        """Seconds since the fetch (None for an empty store that was never fetched)."""
+        if self.fetched_at is None:
+            return None
+        return (time.monotonic() if monotonic_now is None else monotonic_now) - self.fetched_at
+
+    def is_stale(self, threshold, monotonic_now=None):
+        """True if the data is older than `threshold` seconds."""
+        age = self.age(monotonic_now)
+        return age is not None and age > threshold
+
+    def countdown(self, max_minutes, now=None):
+        """
+        Arrivals 0..max_minutes whole minutes away at `now`.
+
+        Args:
+            max_minutes: Largest minutes-away value to include
+            now: POSIX time to count down to (defaults to self.now())
+
+        Returns:
+            List of tuples: [(Arrival, minutes_away), ...] sorted by arrival
+        """
+        now = self.now() if now is None else now
+        lo = bisect_left(self.epochs, now)
+        hi = bisect_left(self.epochs, now + (max_minutes + 1) * 60, lo)
+        return [(self.arrivals[index], int((self.epochs[index] - now) // 60)) for index in range(lo, hi)]
+
+
+class SnapshotFile:
+    """The last fetched ArrivalStore, persisted as JSON for a warm start."""
+
+    def __init__(self, path, min_interval=300):
+        """
+        Args:
+            path: File to keep the snapshot in (its directory is created on save)
+            min_interval: Least seconds between saves, to spare the SD card;
+                save(force=True) ignores it
+        """
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self._saved_at = None
+        self._saved_epoch = None
+
+    def save(self, store, force=False):
+        """
+        Write `store` atomically (temp file + rename).
+
+        Returns:
+            bool: True if written; stores never fetched, the store already on
+            disk, and saves within min_interval of the last one are skipped
+        """
+        if store.fetched_epoch is None or store.fetched_epoch == self._saved_epoch:
+            return False
+        now = time.monotonic()
+        if not force and self._saved_at is not None and now - self._saved_at < self.min_interval:
+            return False
+        data = {
+            "fetched_epoch": store.fetched_epoch,
+            "arrivals": [list(arrival) for arrival in store.arrivals],
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save arrivals snapshot to %s: %s", self.path, e)
+            return False
+        self._saved_at = now
+        self._saved_epoch = store.fetched_epoch
+        return True
+
+    def load(self, now=None):
+        """
+        Read the saved store back.
+
+        Args:
+            now: Current POSIX time (defaults to time.time())
+
+        Returns:
+            ArrivalStore anchored so that its age() is the time since the saved
+            fetch (it counts down and shows as stale like any other store), or
+            None if there is no readable snapshot
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            fetched_epoch = float(data["fetched_epoch"])
+            arrivals = [decode_arrival(fields) for fields in data["arrivals"]]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable arrivals snapshot %s: %s", self.path, e)
+            return None
+        age = max(0.0, (time.time() if now is None else now) - fetched_epoch)
+        self._saved_epoch = fetched_epoch
+        return ArrivalStore(arrivals, fetched_epoch=fetched_epoch, fetched_at=time.monotonic() - age)
@@ -0,0 +1,223 @@
+"""
+Fetch worker process and its supervisor.
+
+With FETCH_WORKER=process, fetching, protobuf parsing and arrival extraction
+run in a separate process, so a slow parse, a GC pause or a wedged socket in
+the worker cannot stall the render loop: the two processes share no GIL and
+meet only at a SnapshotRing in shared memory.
+
+run_worker() is the worker's entry point: the same FeedClient, PollScheduler
+and FeedRefresher retry logic as the in-process refresher, publishing every
+new ArrivalStore into the ring and promising its next heartbeat there.
+
+WorkerRefresher lives in the render process and offers FeedRefresher's read
+side (latest, wait_for_update, wake) on top of the ring. Its watchdog thread
+restarts the worker when it exits or misses its heartbeat deadline; the ring
+outlives the worker, so the panel keeps counting down the last snapshot (with
+the staleness bar growing) while the new worker starts.
+"""
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from config import Config
+from utils.metrics import WORKER_RESTARTS
+from utils.scheduler import DisplaySchedule, PollScheduler, clock_is_idle
+from .refresher import ArrivalSnapshot, FeedRefresher
+from .ring import SnapshotRing
+from .store import ArrivalStore
+
+logger = logging.getLogger(__name__)
+
+# Seconds between wake-flag checks while the worker sleeps, and between ring
+# polls in WorkerRefresher.wait_for_update
+POLL_STEP = 0.25
+
+
+def run_worker(ring_name, log_queue=None, record_dir=None):
+    """
+    Worker process entry point: fetch on schedule and publish into the ring forever.
+
+    Args:
+        ring_name: Name of the SnapshotRing created by the render process
+        log_queue: multiprocessing.Queue the worker's log records are sent to
+        record_dir: Optional directory to archive raw feed payloads into
+    """
+    # Ctrl-C reaches the whole process group; the render process shuts the worker down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if log_queue is not None:
+        root = logging.getLogger()
+        root.handlers[:] = [QueueHandler(log_queue)]
+        root.setLevel(getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO))
+
+    # Only the worker needs the feed client (httpx, nyct_gtfs, protobuf) and the static index
+    from .archive import FeedRecorder
+    from .client import FeedClient
+    from .fetch import fetch_upcoming
+    from .static_index import StaticIndex
+
+    ring = SnapshotRing.attach(ring_name)
+    static_index = StaticIndex.load(Config.TRIPS_FILE, Config.STOPS_FILE, Config.STATIC_INDEX_FILE)
+    recorder = FeedRecorder(record_dir, Config.RECORD_MAX_BYTES, Config.RECORD_MAX_FILES) if record_dir else None
+    feed_client = FeedClient(static_index, recorder=recorder)
+    display_schedule = DisplaySchedule()
+    poll_scheduler = PollScheduler()
+
+    def fetch():
+        store = fetch_upcoming(feed_client)
+        poll_scheduler.observe(feed_client.generated_times())
+        return store
+
+    def next_fetch(store):
+        now = time.time()
+        return poll_scheduler.next_delay(now, idle=clock_is_idle(display_schedule, store, now))
+
+    refresher = FeedRefresher(fetch, initial=ArrivalStore(), next_interval=next_fetch)
+    logger.info("Fetch worker started (pid %d)", multiprocessing.current_process().pid)
+    published = 0
+    while True:
+        ring.set_deadline(time.monotonic() + Config.WORKER_TIMEOUT)
+        delay = refresher.refresh_once()
+        snapshot = refresher.latest()
+        if snapshot.version != published:
+            ring.publish(snapshot.arrivals)
+            published = snapshot.version
+
+        # Sleep until the next fetch, waking early if the render process asks
+        wake_at = time.monotonic() + delay
+        ring.set_deadline(wake_at + Config.WORKER_TIMEOUT)
+        while not ring.take_wake():
+            remaining = wake_at - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(POLL_STEP, remaining))
+
+
+class WorkerRefresher:
+    """
+    FeedRefresher look-alike whose fetches run in a supervised worker process.
+
+    latest() and wait_for_update() read the ring, so the render loop is the
+    same as with the in-process refresher.
+    """
+
+    def __init__(self, config=None, target=run_worker, record_dir=None, initial=None):
+        """
+        Args:
+            config: Config object (defaults to global Config if not provided)
+            target: Worker entry point, called as target(ring_name, log_queue, record_dir)
+            record_dir: Optional directory the worker archives raw payloads into
+            initial: ArrivalStore shown until the worker publishes (defaults to an empty one)
+        """
+        self.config = config or Config
+        self.interval = self.config.FETCH_INTERVAL
+        self.target = target
+        self.record_dir = record_dir
+        self.timeout = self.config.WORKER_TIMEOUT
+        self.restarts = 0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._ring = None
+        self._process = None
+        self._spawned_at = 0
+        self._log_queue = None
+        self._log_listener = None
+        initial = ArrivalStore() if initial is None else initial
+        self._snapshot = ArrivalSnapshot(0, initial, initial.fetched_at)
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        """Create the ring, start the worker and the watchdog; returns self."""
+        self._ring = SnapshotRing.create()
+        # Worker log records are handed to this process's handlers (and its log file)
+        self._log_queue = self._context.Queue()
+        self._log_listener = QueueListener(self._log_queue, *logging.getLogger().handlers)
+        self._log_listener.start()
+        self._spawn()
+        self._watchdog = threading.Thread(target=self._watch, name="worker-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    def _spawn(self):
+        # Startup (importing, loading the static index) gets one timeout too
+        self._ring.set_deadline(time.monotonic() + self.timeout)
+        self._spawned_at = self._ring.sequence
+        self._process = self._context.Process(
+            target=self.target,
+            args=(self._ring.name, self._log_queue, self.record_dir),
+            name="fetch-worker",
+            daemon=True,
+        )
+        self._process.start()
+
+    def _terminate(self):
+        process = self._process
+        if process is None:
+            return
+        process.terminate()
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join(5)
+
+    def _watch(self):
+        backoff = 1.0
+        while not self._stop.wait(1.0):
+            alive = self._process.is_alive()
+            if alive and time.monotonic() <= self._ring.deadline:
+                if self._ring.sequence > self._spawned_at:
+                    backoff = 1.0
+                continue
+            if alive:
+                logger.warning("Fetch worker missed its heartbeat by more than %ss, restarting", self.timeout)
+            else:
+                logger.warning("Fetch worker exited with code %s, restarting", self._process.exitcode)
+            self._terminate()
+            self.restarts += 1
+            WORKER_RESTARTS.inc()
+            # Keep a crash-looping worker from spinning (the display keeps the last snapshot)
+            if self._stop.wait(backoff):
+                return
+            backoff = min(backoff * 2, 60.0)
+            self._spawn()
+
+    def latest(self):
+        """Return the newest snapshot published by the worker (never blocks)."""
+        # stop() may detach the ring from another thread (e.g. a metrics scrape)
+        ring = self._ring
+        if ring is not None and ring.sequence != self._snapshot.version:
+            sequence, store = ring.read()
+            if store is not None:
+                self._snapshot = ArrivalSnapshot(sequence, store, store.fetched_at)
+        return self._snapshot
+
+    def wait_for_update(self, version, timeout):
+        """Wait until a snapshot newer than `version` is published or `timeout` elapses."""
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self.latest()
+            remaining = deadline - time.monotonic()
+            if snapshot.version != version or remaining <= 0 or self._stop.is_set():
+                return snapshot
+            self._stop.wait(min(POLL_STEP, remaining))
+
+    def wake(self):
+        """Ask the worker to fetch now."""
+        self._ring.request_wake()
+
+    def stop(self, timeout=None):
+        """Stop the watchdog and the worker, and free the ring."""
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout)
+        self._terminate()
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
+        # Detach before closing, so latest() never reads a closed ring
+        ring, self._ring = self._ring, None
+        if ring is not None:
+            ring.close()
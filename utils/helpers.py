@@ -21,14 +21,20 @@ def hex_to_rgb(hex_color):
 def truncate_text(text, font, max_width):
     """
     Truncate the text so that it fits within the specified width.
+    Binary-searches the prefix length, so only O(log n) strings are measured.
     """
-    text_width = font.getbbox(text)[2] - font.getbbox(text)[0]
+    def width(prefix):
+        bbox = font.getbbox(prefix)
+        return bbox[2] - bbox[0]
 
-    while text and text_width > max_width:
-        text = text[:-1]
-        text_width = font.getbbox(text)[2] - font.getbbox(text)[0]
-
-    return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if width(text[:mid]) <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
 
 def map_route_to_name(route_id):
     """
@@ -0,0 +1,133 @@
+"""
+Logging handlers that keep disk I/O off the fetch and render threads.
+
+main.setup_logging() puts a QueueHandler on the root logger, so logging
+calls only format and enqueue records; a QueueListener thread hands them to
+the handlers below, which do the writing.
+
+BatchingRotatingFileHandler buffers formatted lines and writes them to the
+(SD card) log file in one write per batch, rotating like RotatingFileHandler
+but tracking the file size itself instead of seeking and stat-ing on every
+record. RateLimitFilter caps how often any one message template is logged
+below WARNING.
+"""
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that writes in batches.
+
+    Buffered lines are written when `capacity` records are pending, at most
+    `flush_interval` seconds after the first of them was buffered (a timer
+    thread flushes a quiet buffer), when a record at `flush_level` or above
+    arrives, and on close. A power loss can
+    therefore lose at most one batch of sub-WARNING lines.
+    """
+
+    def __init__(
+        self,
+        filename,
+        maxBytes=0,
+        backupCount=0,
+        capacity=100,
+        flush_interval=5.0,
+        flush_level=logging.WARNING,
+        encoding=None,
+    ):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.batches = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._timer = None
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+
+    def emit(self, record):
+        try:
+            self._buffer.append(self.format(record) + self.terminator)
+            if (
+                len(self._buffer) >= self.capacity
+                or record.levelno >= self.flush_level
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self.flush()
+            elif self._timer is None:
+                # Nothing else may be logged for a while; write this batch on time anyway
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """Write out the pending batch (rotating first if it would overflow the file)."""
+        self.acquire()
+        try:
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            data = "".join(self._buffer).encode(self.encoding or "utf-8", "backslashreplace")
+            self._buffer.clear()
+            if self.maxBytes > 0 and self._size and self._size + len(data) >= self.maxBytes:
+                self.doRollover()
+                self._size = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.buffer.write(data)
+            self.stream.flush()
+            self._size += len(data)
+            self.batches += 1
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let each message template through at most `limit` times per `period` seconds.
+
+    Records at WARNING and above always pass. Templates are keyed by logger
+    name and the unformatted message, so lazily formatted calls such as
+    logger.debug("Frame %d rendered in %.2f ms", ...) count as one message.
+    When a template is let through again, the number of records suppressed
+    since its last appearance is appended to it.
+    """
+
+    def __init__(self, limit=20, period=60.0):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self.suppressed = 0
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, dropped = self._windows.get(key, (now, 0, 0))
+            if now - window_start >= self.period:
+                window_start, count = now, 0
+            if count >= self.limit:
+                self._windows[key] = (window_start, count, dropped + 1)
+                self.suppressed += 1
+                return False
+            self._windows[key] = (window_start, count + 1, 0)
+        if dropped:
+            record.msg = f"{record.msg} [{dropped} similar messages suppressed]"
+        return True
@@ -0,0 +1,171 @@
+"""
+Memory report mode (main.py --memory-report SECONDS).
+
+Traces Python allocations with tracemalloc and logs, every SECONDS:
+
+    footprint   deep size of the clock's long-lived structures (arrival store,
+                static index lookups, layout caches), plus byte counts for
+                memory tracemalloc cannot see (the memory-mapped static index)
+    per cycle   for each fetch cycle since the last report: peak bytes
+                allocated during the cycle, bytes still held after it, and
+                generation-0 garbage collections it triggered (tracing is
+                process-wide, so frames drawn meanwhile are included)
+    top files   project source files holding the most traced memory, with the
+                change since the previous report
+
+tracemalloc sees the Python heap only: the protobuf parser's C arena and
+image pixel buffers show up in process_resident_memory_bytes, not here.
+Tracing slows every allocation, so this is a diagnostic mode.
+"""
+import gc
+import logging
+import sys
+import threading
+import tracemalloc
+from array import array
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+# Allocation sites listed in the report (a venv inside the project is left out)
+_SOURCE_FILTERS = [
+    tracemalloc.Filter(True, str(PROJECT_ROOT / pattern)) for pattern in ("main.py", "config.py", "*/*.py")
+] + [tracemalloc.Filter(False, str(PROJECT_ROOT / pattern / "*")) for pattern in ("venv", ".venv")]
+
+
+def deep_sizeof(obj):
+    """
+    Bytes held by `obj` and every object reachable from it through containers,
+    instance dicts and __slots__ (each object counted once).
+
+    Classes, modules and functions are not followed.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, (str, bytes, bytearray, array, int, float)):
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for cls in type(current).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name != "__weakref__" and hasattr(current, name):
+                    stack.append(getattr(current, name))
+    return total
+
+
+def _format_bytes(size):
+    if abs(size) < 1024:
+        return f"{size:.0f} B"
+    if abs(size) < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / (1024 * 1024):.1f} MiB"
+
+
+class MemoryReport:
+    """Periodic tracemalloc report of structure footprints and per-cycle allocation."""
+
+    def __init__(self, structures, top=8):
+        """
+        Args:
+            structures: Callable returning {name: object}; each object is measured
+                with deep_sizeof(), except ints, which are reported as byte counts
+            top: Number of source files listed in each report
+        """
+        self.structures = structures
+        self.top = top
+        self._lock = threading.Lock()
+        self._cycles = []
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def track(self, function):
+        """Wrap a fetch function so each call is recorded as one cycle."""
+
+        def tracked(*args, **kwargs):
+            collections = gc.get_stats()[0]["collections"]
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                after, peak = tracemalloc.get_traced_memory()
+                cycle = (peak - before, after - before, gc.get_stats()[0]["collections"] - collections)
+                with self._lock:
+                    self._cycles.append(cycle)
+
+        return tracked
+
+    def report(self):
+        """Build one report (and start the next interval); returns its lines."""
+        lines = []
+        current, _ = tracemalloc.get_traced_memory()
+        lines.append(f"Memory report: {_format_bytes(current)} traced")
+
+        for name, value in self.structures().items():
+            size = value if isinstance(value, int) else deep_sizeof(value)
+            lines.append(f"  {name:<28} {_format_bytes(size)}")
+
+        with self._lock:
+            cycles, self._cycles = self._cycles, []
+        if cycles:
+            count = len(cycles)
+            peak = sum(cycle[0] for cycle in cycles) / count
+            retained = sum(cycle[1] for cycle in cycles) / count
+            collections = sum(cycle[2] for cycle in cycles) / count
+            lines.append(
+                f"  per fetch cycle ({count}): {_format_bytes(peak)} peak allocated, "
+                f"{_format_bytes(retained)} retained, {collections:.1f} gen-0 collections"
+            )
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SOURCE_FILTERS)
+        if self._snapshot is None:
+            stats = [(stat, None) for stat in snapshot.statistics("filename")]
+        else:
+            stats = [(stat, stat.size_diff) for stat in snapshot.compare_to(self._snapshot, "filename")]
+            stats.sort(key=lambda pair: pair[0].size, reverse=True)
+        self._snapshot = snapshot
+        for stat, diff in stats[: self.top]:
+            filename = Path(stat.traceback[0].filename)
+            try:
+                filename = filename.relative_to(PROJECT_ROOT)
+            except ValueError:
+                pass
+            change = "" if diff is None else f" ({'+' if diff >= 0 else '-'}{_format_bytes(abs(diff))})"
+            lines.append(f"  {str(filename):<28} {_format_bytes(stat.size)} in {stat.count} blocks{change}")
+        return lines
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                logger.info("\n".join(self.report()))
+            except Exception as e:
+                logger.warning("Memory report failed: %s", e)
+
+    def start(self, interval):
+        """Start tracing (if not already) and log a report every `interval` seconds; returns self."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="memory-report", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop reporting and tracing."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        tracemalloc.stop()
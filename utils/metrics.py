@@ -0,0 +1,310 @@
+"""
+In-process metrics with a Prometheus text endpoint.
+
+Histograms, counters and gauges are plain Python objects guarded by a lock;
+recording a sample is a bisect and two additions, cheap enough to leave on in
+production. MetricsServer serves the registry at http://host:port/metrics in
+the Prometheus text exposition format, from a daemon thread.
+
+Every stage of the clock records into STAGE_SECONDS with a "stage" label:
+
+    fetch       HTTP round trip for one feed
+    parse       protobuf decode of one payload
+    static_load opening (or rebuilding) the GTFS static index
+    extract     arrival extraction and windowing for one fetch cycle
+    layout      line layout lookups for one frame
+    push        pushing one frame to the display backend
+    scroll      one marquee animation frame (blit and push)
+    wait        time cycle_display spends waiting between frames
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond frame work to slow fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """Return the child metric for one combination of label values."""
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        return self._children[()]
+
+    def expose(self):
+        """Render the metric family in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for values, child in list(self._children.items()):
+            lines.extend(child.expose(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def expose(self, name, labelnames, values):
+        return [f"{name}{_label_text(labelnames, values)} {self.value:g}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (e.g. fetch failures)."""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Compute the value at scrape time instead (return None to leave it out)."""
+        self.function = function
+
+    def expose(self, name, labelnames, values):
+        value = self.value
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception as e:
+                logger.debug("Gauge %s callback failed: %s", name, e)
+                value = None
+        if value is None:
+            return []
+        return [f"{name}{_label_text(labelnames, values)} {value:g}"]
+
+
+class Gauge(_Metric):
+    """Point-in-time value (e.g. data staleness), set directly or computed per scrape."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def expose(self, name, labelnames, values):
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            labels = _label_text(labelnames + ("le",), values + (le,))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _label_text(labelnames, values)
+        lines.append(f"{name}_sum{labels} {total:g}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies in seconds) in fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+class MetricsRegistry:
+    """A named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def expose(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "subway_clock_stage_seconds", "Time spent in each pipeline stage", labelnames=("stage",)
+)
+FETCH_FAILURES = REGISTRY.counter("subway_clock_fetch_failures_total", "Feed fetches that failed")
+FETCH_RETRIES = REGISTRY.counter("subway_clock_fetch_retries_total", "Fetch cycles retried after a failure")
+PARSE_SKIPS = REGISTRY.counter(
+    "subway_clock_parse_skips_total", "Feed payloads not parsed because they were unchanged"
+)
+SHORT_CIRCUITS = REGISTRY.counter(
+    "subway_clock_fetch_short_circuits_total", "Feed requests not sent because the feed's circuit was open"
+)
+CIRCUIT_STATE = REGISTRY.gauge(
+    "subway_clock_circuit_state", "Feed circuit breaker state (0 closed, 1 half-open, 2 open)", labelnames=("feed",)
+)
+HEDGED_REQUESTS = REGISTRY.counter(
+    "subway_clock_hedged_requests_total", "Second feed requests sent because the first was slow"
+)
+HEDGE_WINS = REGISTRY.counter("subway_clock_hedge_wins_total", "Hedged feed requests that answered first")
+HEDGE_SAVED_SECONDS = REGISTRY.histogram(
+    "subway_clock_hedge_saved_seconds", "Time a winning hedge saved over the request it raced"
+)
+WORKER_RESTARTS = REGISTRY.counter(
+    "subway_clock_worker_restarts_total", "Fetch worker processes restarted by the watchdog"
+)
+FRAMES_RENDERED = REGISTRY.counter("subway_clock_frames_rendered_total", "Frames pushed to the display")
+DATA_STALENESS = REGISTRY.gauge(
+    "subway_clock_data_staleness_seconds", "Age of the arrival data currently displayed"
+)
+STARTUP_SECONDS = REGISTRY.gauge(
+    "subway_clock_startup_seconds", "Seconds from process start to the end of each startup phase", labelnames=("phase",)
+)
+TIME_TO_FIRST_FRAME = REGISTRY.gauge(
+    "subway_clock_time_to_first_frame_seconds", "Seconds from process start to the first frame on the panel"
+)
+RESIDENT_MEMORY = REGISTRY.gauge("process_resident_memory_bytes", "Resident set size of the clock process")
+
+_process = psutil.Process()
+RESIDENT_MEMORY.set_function(lambda: _process.memory_info().rss)
+
+
+@contextmanager
+def time_stage(stage):
+    """Record the duration of the with-block in STAGE_SECONDS under `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics %s - %s", self.address_string(), format % args)
+
+
+class MetricsServer:
+    """Serves a registry at /metrics from a daemon thread."""
+
+    def __init__(self, host="127.0.0.1", port=9108, registry=REGISTRY):
+        """
+        Args:
+            host: Interface to bind (127.0.0.1 keeps it local to the Pi)
+            port: TCP port (0 picks a free one; see .port)
+            registry: MetricsRegistry to expose
+        """
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        """Start serving in the background; returns self."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,260 @@
+"""
+Time-of-day display schedule and adaptive feed polling.
+
+DisplaySchedule decides when the panel is blanked (BLANK_START..BLANK_END)
+and when the overnight polling profile applies (OVERNIGHT_START..OVERNIGHT_END).
+Both windows take "HH:MM" local times or "sunrise"/"sunset", optionally with
+a minute offset ("sunset+30", "sunrise-15"); sun times are computed for
+Config.LATITUDE/LONGITUDE with the NOAA solar equations.
+
+PollScheduler picks the delay before the next feed fetch. The MTA publishes
+each feed on a fairly regular cadence, which it learns from the feed header
+timestamps (NYCTFeed.last_generated); it then polls shortly after the next
+publish is due instead of on a fixed timer, backs off while a feed's header
+has not advanced, and drops to POLL_IDLE_INTERVAL when told the clock is idle
+(overnight, blanked, or no trains within MAX_MINUTES_AWAY).
+"""
+import datetime
+import math
+import re
+import time
+from functools import lru_cache
+import pytz
+from config import Config
+
+_TIME_SPEC = re.compile(r"^\s*(?:(sunrise|sunset)\s*([+-]\s*\d+)?|(\d{1,2}):(\d{2}))\s*$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=8)
+def _sun_times_utc(day, latitude, longitude):
+    # NOAA "General Solar Position" approximation, accurate to a minute or two
+    gamma = 2 * math.pi / 365 * (day.timetuple().tm_yday - 1)
+    eqtime = 229.18 * (
+        0.000075
+        + 0.001868 * math.cos(gamma)
+        - 0.032077 * math.sin(gamma)
+        - 0.014615 * math.cos(2 * gamma)
+        - 0.040849 * math.sin(2 * gamma)
+    )
+    decl = (
+        0.006918
+        - 0.399912 * math.cos(gamma)
+        + 0.070257 * math.sin(gamma)
+        - 0.006758 * math.cos(2 * gamma)
+        + 0.000907 * math.sin(2 * gamma)
+        - 0.002697 * math.cos(3 * gamma)
+        + 0.00148 * math.sin(3 * gamma)
+    )
+    lat = math.radians(latitude)
+    # 90.833 degrees allows for refraction and the size of the solar disc
+    cos_ha = math.cos(math.radians(90.833)) / (math.cos(lat) * math.cos(decl)) - math.tan(lat) * math.tan(decl)
+    ha = math.degrees(math.acos(max(-1.0, min(1.0, cos_ha))))
+
+    midnight = datetime.datetime(day.year, day.month, day.day, tzinfo=pytz.utc)
+    sunrise = midnight + datetime.timedelta(minutes=720 - 4 * (longitude + ha) - eqtime)
+    sunset = midnight + datetime.timedelta(minutes=720 - 4 * (longitude - ha) - eqtime)
+    return sunrise, sunset
+
+
+def get_sun_times(day, config=None):
+    """
+    Sunrise and sunset for a date at the configured location.
+
+    Args:
+        day: datetime.date
+        config: Config object (defaults to global Config if not provided)
+
+    Returns:
+        tuple: (sunrise, sunset) as timezone-aware datetimes in Config.TIMEZONE
+        (inside the polar circles, where the sun does not rise or set, both
+        fall at solar midnight or noon)
+    """
+    cfg = config or Config
+    tz = pytz.timezone(cfg.TIMEZONE)
+    sunrise, sunset = _sun_times_utc(day, cfg.LATITUDE, cfg.LONGITUDE)
+    return sunrise.astimezone(tz), sunset.astimezone(tz)
+
+
+def is_time_between(start, end, check):
+    """
+    Whether `check` lies in [start, end), all datetime.time values.
+
+    A window whose end is earlier than its start wraps past midnight
+    (e.g. 22:00-06:00); start == end is an empty window.
+    """
+    if start <= end:
+        return start <= check < end
+    return check >= start or check < end
+
+
+def resolve_time(spec, day, config=None):
+    """
+    Turn a schedule setting into a local time of day.
+
+    Args:
+        spec: "HH:MM", "sunrise" or "sunset", the latter two with an optional
+            offset in minutes ("sunset+30")
+        day: datetime.date used for sunrise/sunset
+        config: Config object (defaults to global Config if not provided)
+
+    Returns:
+        datetime.time
+
+    Raises:
+        ValueError if the spec cannot be parsed
+    """
+    match = _TIME_SPEC.match(spec)
+    if match is None:
+        raise ValueError(f"Invalid schedule time {spec!r} (expected HH:MM, sunrise or sunset[+/-minutes])")
+    event, offset, hours, minutes = match.groups()
+    if event is None:
+        return datetime.time(int(hours), int(minutes))
+    sunrise, sunset = get_sun_times(day, config)
+    moment = sunrise if event.lower() == "sunrise" else sunset
+    if offset:
+        moment += datetime.timedelta(minutes=int(offset.replace(" ", "")))
+    return moment.time().replace(second=0, microsecond=0)
+
+
+class DisplaySchedule:
+    """Blanking and overnight windows from the BLANK_* and OVERNIGHT_* settings."""
+
+    def __init__(self, config=None):
+        """
+        Args:
+            config: Config object (defaults to global Config if not provided)
+
+        Raises:
+            ValueError if a window setting cannot be parsed
+        """
+        self.config = config or Config
+        self.tz = pytz.timezone(self.config.TIMEZONE)
+        self.blank = self._window(self.config.BLANK_START, self.config.BLANK_END)
+        self.overnight = self._window(self.config.OVERNIGHT_START, self.config.OVERNIGHT_END)
+
+    def _window(self, start, end):
+        if not start or not end:
+            return None
+        # Parse up front so a typo fails at startup rather than at sunset
+        today = datetime.date.today()
+        resolve_time(start, today, self.config)
+        resolve_time(end, today, self.config)
+        return start, end
+
+    def _inside(self, window, now):
+        if window is None:
+            return False
+        local = datetime.datetime.fromtimestamp(now, self.tz) if isinstance(now, (int, float)) else now
+        day = local.date()
+        start, end = (resolve_time(spec, day, self.config) for spec in window)
+        return is_time_between(start, end, local.time())
+
+    def is_blank(self, now):
+        """Whether the panel should be dark at `now` (POSIX seconds or an aware datetime)."""
+        return self._inside(self.blank, now)
+
+    def is_overnight(self, now):
+        """Whether the overnight polling profile applies at `now`."""
+        return self._inside(self.overnight, now)
+
+
+def clock_is_idle(display_schedule, store, now=None, config=None):
+    """
+    Whether fresh data can wait: the panel is blanked, it is overnight, or no train is due.
+
+    Args:
+        display_schedule: DisplaySchedule
+        store: ArrivalStore currently displayed
+        now: POSIX time (defaults to time.time())
+        config: Config object (defaults to global Config if not provided)
+    """
+    cfg = config or Config
+    now = time.time() if now is None else now
+    return (
+        display_schedule.is_blank(now)
+        or display_schedule.is_overnight(now)
+        or not store.countdown(cfg.MAX_MINUTES_AWAY)
+    )
+
+
+class _FeedCadence:
+    __slots__ = ("generated", "cadence", "misses")
+
+    def __init__(self, generated):
+        self.generated = generated
+        self.cadence = None
+        self.misses = 0
+
+
+class PollScheduler:
+    """Chooses the delay before the next fetch from each feed's observed publish cadence."""
+
+    def __init__(self, config=None):
+        """
+        Args:
+            config: Config object (defaults to global Config if not provided)
+        """
+        cfg = config or Config
+        self.min_interval = cfg.POLL_MIN_INTERVAL
+        self.max_interval = cfg.FETCH_INTERVAL
+        self.idle_interval = cfg.POLL_IDLE_INTERVAL
+        self.publish_lag = cfg.POLL_PUBLISH_LAG
+        self._feeds = {}
+
+    def cadence(self, url):
+        """Estimated seconds between publishes of the feed at `url` (None until learned)."""
+        state = self._feeds.get(url)
+        return None if state is None else state.cadence
+
+    def observe(self, generated):
+        """
+        Record the header timestamps seen on the latest fetch.
+
+        Args:
+            generated: Dict of feed URL -> feed header timestamp (POSIX seconds)
+        """
+        for url, timestamp in generated.items():
+            state = self._feeds.get(url)
+            if state is None:
+                self._feeds[url] = _FeedCadence(timestamp)
+            elif timestamp > state.generated:
+                interval = timestamp - state.generated
+                # Polls can skip publishes, so an interval is a multiple of the real
+                # cadence; the smoothed minimum converges on the cadence itself
+                if state.cadence is not None:
+                    interval = min(interval, 0.7 * state.cadence + 0.3 * interval)
+                state.cadence = interval
+                state.generated = timestamp
+                state.misses = 0
+            else:
+                state.misses += 1
+
+    def next_delay(self, now, idle=False):
+        """
+        Seconds to wait before the next fetch.
+
+        Args:
+            now: Current POSIX time
+            idle: Use the low-frequency profile (overnight, blanked or no trains due)
+
+        Returns:
+            float: at most FETCH_INTERVAL, or POLL_IDLE_INTERVAL when idle
+        """
+        if idle:
+            return self.idle_interval
+        delays = [self._feed_delay(state, now) for state in self._feeds.values()]
+        return min(delays + [self.max_interval])
+
+    def _feed_delay(self, state, now):
+        if state.cadence is None:
+            return self.max_interval
+        if state.misses:
+            # The header has not advanced since the publish we expected: back off,
+            # never polling sooner than POLL_MIN_INTERVAL
+            return min(self.min_interval * 2 ** (state.misses - 1), self.max_interval)
+        # First expected publish at least min_interval from now, plus the lag before it is served
+        due = state.generated + self.publish_lag
+        earliest = now + self.min_interval
+        if due < earliest:
+            due += math.ceil((earliest - due) / state.cadence) * state.cadence
+        return due - now
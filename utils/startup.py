@@ -0,0 +1,99 @@
+"""
+Startup helpers: phase timing and background initialization.
+
+StartupTimer measures each startup phase from the moment the process was
+created (so interpreter start and module imports are included), logs one
+report line, and exports the figures as metrics, time-to-first-frame among
+them. Deferred runs slow initialization (loading the static index, importing
+the feed client) in a background thread while the first frame is drawn.
+"""
+import logging
+import threading
+import time
+import psutil
+from utils.metrics import STARTUP_SECONDS, TIME_TO_FIRST_FRAME
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Seconds from process start to the end of each named startup phase."""
+
+    def __init__(self, started=None):
+        """
+        Args:
+            started: POSIX time the process started (defaults to its creation time)
+        """
+        self.started = psutil.Process().create_time() if started is None else started
+        self.phases = []
+
+    def mark(self, phase):
+        """Record that `phase` has just finished; returns seconds since process start."""
+        elapsed = time.time() - self.started
+        self.phases.append((phase, elapsed))
+        STARTUP_SECONDS.labels(phase).set(elapsed)
+        if phase == "first_frame":
+            TIME_TO_FIRST_FRAME.set(elapsed)
+        return elapsed
+
+    def report(self):
+        """Log and return one line with every phase's end time and duration."""
+        parts = []
+        previous = 0.0
+        for phase, elapsed in self.phases:
+            parts.append(f"{phase} {elapsed:.2f}s (+{elapsed - previous:.2f})")
+            previous = elapsed
+        line = "Startup: " + ", ".join(parts)
+        logger.info(line)
+        return line
+
+
+class Deferred:
+    """Runs a function in a daemon thread; result() waits for its return value."""
+
+    def __init__(self, function, name="deferred"):
+        """
+        Args:
+            function: Callable taking no arguments
+            name: Thread name (shows up in logs)
+        """
+        self._function = function
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        """Start running in the background; returns self."""
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self._result = self._function()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def done(self):
+        """True once the function has returned or raised."""
+        return self._done.is_set()
+
+    @property
+    def error(self):
+        """Exception the function raised (None if it has not, or has not finished)."""
+        return self._error
+
+    def result(self, timeout=None):
+        """
+        Wait for the function and return its result, re-raising its exception.
+
+        Raises:
+            TimeoutError: if it is still running after `timeout` seconds
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self._thread.name} still running after {timeout}s")
+        if self._error is not None:
+            raise self._error
+        return self._result